@@ -5,6 +5,10 @@ import pandas as pd
 from openai import OpenAI
 import io
 from datetime import datetime
+from llm_cache import cached_stream, cache_stats
+from table_stream import MarkdownTableParser
+from request_scheduler import INTERACTIVE, acquire
+import metrics
 
 # --- Configuration ---
 st.set_page_config(page_title="ESG Risk Assessment Tool", layout="wide")
@@ -57,11 +61,19 @@ Provide all this in table format for Excel export. Color code rows using the RAG
 """
 
 # --- Processing Function ---
-def run_esg_chatgpt(suppliers):
+def stream_completion_text(**kwargs):
+    acquire("openai", INTERACTIVE)
+    metrics.count_request("openai")
+    for chunk in client.chat.completions.create(stream=True, **kwargs):
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def stream_esg_chatgpt(suppliers):
     supplier_text = "\n".join([f"{s['name']}, £{s['spend']}" for s in suppliers])
     prompt = base_prompt + f"\n\nSuppliers:\n{supplier_text}"
 
-    response = client.chat.completions.create(
+    return cached_stream(
+        stream_completion_text,
         model="gpt-4",
         messages=[
             {"role": "system", "content": "You are a sustainability analyst."},
@@ -69,14 +81,10 @@ def run_esg_chatgpt(suppliers):
         ],
         temperature=0.3
     )
-    return response.choices[0].message.content
 
 # --- Generate Excel File ---
-def generate_excel_from_text(text):
-    rows = [r.strip() for r in text.strip().split("\n") if r]
-    headers = [h.strip() for h in rows[0].split("|") if h]
-    data = [[c.strip() for c in row.split("|") if c] for row in rows[2:]]
-    df = pd.DataFrame(data, columns=headers)
+def generate_excel_from_rows(headers, rows):
+    df = pd.DataFrame(rows, columns=headers)
 
     # Apply RAG coloring and save
     def rag_color(val):
@@ -98,15 +106,34 @@ def generate_excel_from_text(text):
 
 # --- Run and Display ---
 if submitted and suppliers_data:
-    with st.spinner("Running ESG risk assessments using GPT..."):
-        report_text = run_esg_chatgpt(suppliers_data)
-        st.markdown("### ESG Risk Report")
+    st.markdown("### ESG Risk Report")
+    status = st.empty()
+    table_placeholder = st.empty()
+    parser = MarkdownTableParser()
+    chunks = []
+
+    status.info("Running ESG risk assessments using GPT...")
+    for delta in stream_esg_chatgpt(suppliers_data):
+        chunks.append(delta)
+        # Only redraw when a row has been completed, not on every token
+        if parser.feed(delta) and parser.headers:
+            table_placeholder.dataframe(pd.DataFrame(parser.rows, columns=parser.headers))
+    if parser.close() and parser.headers:
+        table_placeholder.dataframe(pd.DataFrame(parser.rows, columns=parser.headers))
+    report_text = "".join(chunks)
+
+    status.success(f"Report complete: {len(parser.rows)} rows")
+    st.caption(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    with st.expander("Raw Output"):
         st.text_area("Raw Output", report_text, height=400)
 
-        file_buffer = generate_excel_from_text(report_text)
+    if parser.headers and parser.rows:
+        file_buffer = generate_excel_from_rows(parser.headers, parser.rows)
         st.download_button(
             label="📥 Download ESG Report (Excel)",
             data=file_buffer,
             file_name="esg_risk_report.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
+    else:
+        st.warning("No table found in the GPT response.")
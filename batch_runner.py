@@ -0,0 +1,230 @@
+# ESG Risk Assessment - headless batch runner
+#
+# Runs the same engine as the Streamlit app over a supplier file without a UI session, e.g. from cron:
+#
+#   python batch_runner.py suppliers.xlsx -o results.parquet --workers 16 --cpu-backend process
+#
+# The output format follows the extension of each -o path (.parquet, .xlsx or .csv). The whole input is
+# loaded into memory and duplicate suppliers are resolved across it, so a supplier that recurs
+# throughout a large file is enriched once. --chunksize does not bound that memory: it sets how many
+# resolved suppliers are assessed at a time, each chunk checkpointed under its own journal. Typed,
+# column-pruned input costs far less than the results, which are held in full to write the outputs.
+# With --refresh-view every supplier is enriched live (ignoring the precomputed risk view) and the
+# results are upserted into the view; scheduled over the known supplier list, this keeps the view
+# that interactive assessments are served from up to date.
+
+import argparse
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from emissions_uncertainty import add_emissions_bands
+from evidence_store import MODES as EVIDENCE_MODES, evidence_mode
+from entity_resolution import fan_out, resolve_entities
+from esg_pipeline import DEFAULT_EMISSIONS_FACTOR, NEWS_SOURCES, assess_esg_risks, run_options
+from exporters import export_to_excel
+from ingest import format_issues, iter_supplier_chunks
+from portfolio import build_cube, entity_keys
+from profiling import profile_run
+from request_scheduler import BATCH, request_deadline, scheduler_stats, time_left
+from risk_view import update_view
+from run_journal import RUNS_DIR, RunJournal, default_run_id
+
+OUTPUT_FORMATS = (".parquet", ".xlsx", ".csv")
+
+
+def write_results(result_df, path, cube=None):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        result_df.to_parquet(path, index=False)
+    elif extension == ".xlsx":
+        with open(path, "wb") as f:
+            f.write(export_to_excel(result_df, cube))
+    else:
+        result_df.to_csv(path, index=False)
+
+
+def print_summary(result_df, elapsed, cube=None):
+    rows = len(result_df)
+    print(f"Assessed {rows} suppliers in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.2f} suppliers/s)")
+    if "Resolved Entity" in result_df.columns:
+        print(f"  {entity_keys(result_df).nunique()} distinct suppliers after entity resolution")
+    if rows:
+        for rag, count in result_df["RAG Rating"].value_counts().items():
+            print(f"  {rag}: {count}")
+    if cube is not None:
+        totals = cube["totals"]
+        print(f"  Spend {totals['Spend']:,.2f}, emissions {totals['Emissions (kg CO2e)']:,.2f} kg CO2e, "
+              f"{totals['Red Spend Share']:.1%} of spend rated Red")
+        if cube.get("emissions_bands") is not None:
+            for _, row in cube["emissions_bands"].iterrows():
+                print(f"  {row['Emissions']}: P5 {row['P5 (kg CO2e)']:,.0f}, P50 {row['P50 (kg CO2e)']:,.0f}, "
+                      f"P95 {row['P95 (kg CO2e)']:,.0f} kg CO2e")
+    for row in scheduler_stats():
+        if row["Requests"]:
+            circuit = f", circuit {row['Circuit']}" if row["Circuit"] != "closed" else ""
+            print(f"  {row['Source']} ({row['Priority']}): {row['Requests']} requests, avg wait {row['Avg Wait (s)']}s{circuit}")
+    for row in metrics.stage_summary():
+        print(f"  {row['Stage']}: {row['Count']} calls, {row['Total (s)']}s total, {row['Errors']} errors")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ESG risk assessment over a supplier file.")
+    parser.add_argument("input", help="Supplier list (.csv or .xlsx) with Supplier, Spend and Category columns")
+    parser.add_argument("-o", "--output", action="append", required=True,
+                        help="Output path; repeat for several formats (.parquet, .xlsx, .csv)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent evidence lookups (default: 8)")
+    parser.add_argument("--cpu-backend", choices=["inline", "process"], default="inline",
+                        help="Where parsing and sentiment run (default: inline)")
+    parser.add_argument("--cpu-workers", type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Suppliers per processing batch (default: 64)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Assess this many resolved suppliers at a time, each chunk checkpointed separately "
+                             "(default: all at once). The input file is always loaded in full.")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Seconds allowed for fetching evidence over the whole run, highest spend first; "
+                             "suppliers not reached get lower confidence")
+    parser.add_argument("--news", choices=NEWS_SOURCES, default="live",
+                        help="live: a news search per supplier; feeds: the local headline store built with "
+                             "news_feeds.py (default: live)")
+    parser.add_argument("--refresh-view", action="store_true",
+                        help="Enrich every supplier live and upsert the results into the precomputed risk view")
+    parser.add_argument("--emissions-draws", type=int, default=0,
+                        help="Monte Carlo draws for P5/P50/P95 emissions bands, in total and by scope "
+                             "(default: 0, point estimates only)")
+    parser.add_argument("--run-id", default=None,
+                        help="Checkpoint id; re-running with the same id resumes, or returns the results if the run "
+                             "finished (default: derived from the input file, the options that change results and "
+                             "the lookup datasets' modification times)")
+    parser.add_argument("--rerun", action="store_true",
+                        help="Assess again even if an identical run already finished (an interrupted run still resumes)")
+    parser.add_argument("--runs-dir", default=RUNS_DIR, help=f"Where checkpoint journals are kept (default: {RUNS_DIR})")
+    parser.add_argument("--no-journal", action="store_true", help="Do not checkpoint progress")
+    parser.add_argument("--profile", action="store_true",
+                        help="Save a CPU profile, sampled stacks and allocation report next to the first output "
+                             "(runs inline from scratch, without the journal)")
+    parser.add_argument("--evidence", choices=EVIDENCE_MODES, default="off",
+                        help="record: archive every fetched response; replay: answer from the archive "
+                             "with no network access (default: off)")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Write stage timings and counters (.prom for Prometheus text, otherwise JSON)")
+    args = parser.parse_args(argv)
+    if args.emissions_draws < 0:
+        parser.error("--emissions-draws must be 0 or more")
+    for path in args.output:
+        if not path.lower().endswith(OUTPUT_FORMATS):
+            parser.error(f"Unsupported output format: {path}")
+    return args
+
+
+def assess_entities(entities, df, codes, args, run_id):
+    # (entity results, risk view size or None), assessing --chunksize entities at a time. A time
+    # budget is one deadline for the whole run: each chunk gets the time that is left.
+    step = args.chunksize or max(len(entities), 1)
+    results, view_size = [], None
+    for first in range(0, max(len(entities), 1), step):
+        journal = None
+        if run_id:
+            # Chunk journals are keyed on the entity range they cover, so a rerun with another
+            # --chunksize never picks up a chunk holding other suppliers; whole-file runs keep the
+            # plain run id
+            journal = RunJournal(f"{run_id}-e{first}-{first + step}" if args.chunksize else run_id,
+                                 directory=args.runs_dir)
+            if args.rerun:
+                journal.discard_final()
+        results.append(assess_esg_risks(
+            entities.iloc[first:first + step],
+            max_workers=args.workers,
+            cpu_backend="process" if args.cpu_backend == "process" and not args.profile else None,
+            cpu_workers=args.cpu_workers,
+            batch_size=args.batch_size,
+            priority=BATCH,
+            journal=journal,
+            dedupe=False,
+            time_budget=None if args.time_budget is None else max(0.0, time_left()),
+            news_source=args.news,
+            use_view=not args.refresh_view,
+        ))
+        if args.refresh_view:
+            # Upserted per chunk, under every spelling of the chunk's suppliers, so an interrupted
+            # refresh still keeps what it finished
+            in_chunk = (codes >= first) & (codes < first + step)
+            view_size = update_view(fan_out(results[-1], df[in_chunk], codes[in_chunk] - first,
+                                            DEFAULT_EMISSIONS_FACTOR))
+    return (pd.concat(results, ignore_index=True) if len(results) > 1 else results[0]), view_size
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    run_id = None
+    if not args.no_journal and not args.profile:
+        run_id = args.run_id or default_run_id(args.input, run_options(
+            news_source=args.news, use_view=not args.refresh_view, time_budget=args.time_budget,
+            evidence=args.evidence, dedupe=True,
+        ))
+        print(f"Run id: {run_id}")
+
+    profile_dir = os.path.dirname(os.path.abspath(args.output[0]))
+    profile_name = os.path.splitext(os.path.basename(args.output[0]))[0] + "_profile"
+    start = time.perf_counter()
+    with profile_run(profile_dir, profile_name) if args.profile else nullcontext({}) as profile_report, \
+            evidence_mode(args.evidence):
+        frames, issues = [], []
+        for df, chunk_issues in iter_supplier_chunks(args.input, chunksize=args.chunksize):
+            frames.append(df)
+            issues.extend(chunk_issues)
+        if not frames:
+            # e.g. a header-only file read with --chunksize: nothing to assess, write or upsert
+            print(f"No suppliers to assess in {args.input}; no output written", file=sys.stderr)
+            if issues:
+                print(format_issues(issues), file=sys.stderr)
+            return 1
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        loaded = len(df)
+        with metrics.timed("entity_resolution"):
+            entities, codes = resolve_entities(df)
+        if args.time_budget is not None:
+            # Highest spend first across the whole input, not just within each chunk
+            order = np.argsort(-entities["Spend"].to_numpy(dtype=np.float64), kind="stable")
+            entities = entities.iloc[order].reset_index(drop=True)
+            codes = np.argsort(order)[codes]
+        with request_deadline(args.time_budget):
+            entity_df, view_size = assess_entities(entities, df, codes, args, run_id)
+        result_df = fan_out(entity_df, df, codes, DEFAULT_EMISSIONS_FACTOR)
+        elapsed = time.perf_counter() - start
+        print(f"Loaded {loaded} suppliers from {args.input}")
+        if args.refresh_view:
+            print(f"Risk view now covers {view_size} suppliers")
+        if issues:
+            print(f"Skipped or corrected {len(issues)} row(s):")
+            print(format_issues(issues))
+
+        emissions_bands = None
+        if args.emissions_draws:
+            with metrics.timed("emissions_bands"):
+                result_df, emissions_bands = add_emissions_bands(result_df, draws=args.emissions_draws)
+        cube = build_cube(result_df)
+        cube["emissions_bands"] = emissions_bands
+        for path in args.output:
+            write_results(result_df, path, cube)
+            print(f"Wrote {path}")
+    for path in profile_report.get("files", []):
+        print(f"Wrote {path}")
+    print_summary(result_df, elapsed, cube)
+    if args.metrics_out:
+        with open(args.metrics_out, "w") as f:
+            f.write(metrics.to_prometheus() if args.metrics_out.endswith(".prom") else metrics.to_json())
+        print(f"Wrote {args.metrics_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
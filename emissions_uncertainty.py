@@ -0,0 +1,136 @@
+# Monte Carlo uncertainty bands for spend-based emissions
+#
+# A spend-based estimate (spend x category factor) is a point value. Here it is the median of a
+# sampled distribution with two sources of spread:
+#   - the category factor itself, shared by every supplier in the category in a given draw
+#     (a systematic error, so it does not average out across the portfolio)
+#   - how far an individual supplier's intensity sits from its category average
+# Each draw also splits emissions into Scope 1 and Scope 2 with a per-category Beta-distributed share.
+#
+#   bands, portfolio = emissions_bands(result_df, draws=10_000)
+#   bands["Emissions P95 (kg CO2e)"], bands["Scope 1 P95 (kg CO2e)"]
+#   portfolio  # rows "Scope 1 & 2", "Scope 1", "Scope 2"
+#
+# A supplier's bands are its point estimate scaled by percentiles of its category's sampled
+# deviation, and of that deviation times the sampled Scope 1 (or Scope 2) share. Portfolio bands
+# sum every supplier's independent draws: NumPy blocks of shape (rows, draws), a bounded number
+# of rows at a time, in parallel threads. Each block has its own seeded stream, so results depend
+# on the seed, not on the thread count. The portfolio draws cost rows x draws samples, so a large
+# portfolio uses fewer of them (at least MIN_PORTFOLIO_DRAWS); supplier bands always use every draw.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+EMISSIONS_COLUMN = "Scope 1 & 2 Emissions (kg CO2e)"
+PERCENTILES = (5, 50, 95)
+BAND_COLUMNS = [f"{scope} P{p} (kg CO2e)" for scope in ("Emissions", "Scope 1", "Scope 2") for p in PERCENTILES]
+DEFAULT_DRAWS = 10_000
+# Elements per (rows, draws) block, bounding each thread's working memory to a few tens of MiB
+CHUNK_ELEMENTS = 1 << 21
+# Supplier-draw samples for the portfolio bands, about 4s of sampling; 10k draws x 100k suppliers
+# would take 20s
+MAX_PORTFOLIO_SAMPLES = 200_000_000
+MIN_PORTFOLIO_DRAWS = 1_000
+
+# category -> (geometric standard deviation of the factor, mean Scope 1 share of Scope 1 & 2).
+# Indicative values for spend-based factors; tune them to the factor set in use.
+CATEGORY_UNCERTAINTY = {
+    "Professional Services": (1.5, 0.30),
+    "Construction": (1.4, 0.70),
+    "IT Equipment": (1.6, 0.35),
+    "Transport Services": (1.3, 0.85),
+    "Facilities Management": (1.4, 0.50),
+    "Healthcare Products": (1.6, 0.45),
+    "Utilities": (1.3, 0.60),
+    "Food and Catering": (1.5, 0.55),
+    "Office Equipment": (1.6, 0.40),
+    "Cleaning Services": (1.4, 0.50),
+    "Printing and Paper": (1.4, 0.50),
+}
+DEFAULT_UNCERTAINTY = (1.8, 0.55)
+# Spread of individual suppliers around their category's intensity
+SUPPLIER_GSD = 1.5
+# Beta concentration of the Scope 1 share (higher is tighter around the mean)
+SCOPE_SHARE_CONCENTRATION = 20.0
+
+
+def _category_draws(categories, draws, rng):
+    # Per category and draw: log factor multiplier (median 1) and Scope 1 share, plus percentiles
+    # (categories, 3 scopes x PERCENTILES) of one supplier's ratio to its point estimate (category
+    # + own spread) for Scope 1 & 2, Scope 1 and Scope 2
+    gsd, share = np.array([CATEGORY_UNCERTAINTY.get(category, DEFAULT_UNCERTAINTY) for category in categories],
+                          dtype=np.float64).reshape(-1, 2).T
+    shape = (len(categories), draws)
+    log_multiplier = np.log(gsd)[:, None] * rng.standard_normal(shape)
+    scope1_share = rng.beta(share[:, None] * SCOPE_SHARE_CONCENTRATION,
+                            (1 - share[:, None]) * SCOPE_SHARE_CONCENTRATION, shape)
+    ratio = np.exp(log_multiplier + np.log(SUPPLIER_GSD) * rng.standard_normal(shape))
+    scope_ratios = (ratio, ratio * scope1_share, ratio * (1 - scope1_share))
+    return log_multiplier, scope1_share, np.concatenate(
+        [np.percentile(values, PERCENTILES, axis=1).T for values in scope_ratios], axis=1)
+
+
+def _chunk_totals(point, codes, categories, draws, seed):
+    # One block of suppliers -> (categories, draws) emissions before the category multiplier:
+    # each supplier's own spread sampled, then summed per category as one matrix product
+    rng = np.random.default_rng(seed)
+    spread = rng.standard_normal((len(point), draws), dtype=np.float32)
+    spread *= np.float32(np.log(SUPPLIER_GSD))
+    np.exp(spread, out=spread)
+    weights = np.zeros((categories, len(point)), dtype=np.float32)
+    weights[codes, np.arange(len(point))] = point
+    return (weights @ spread).astype(np.float64)
+
+
+def emissions_bands(result_df, draws=DEFAULT_DRAWS, seed=0, workers=None):
+    # (per-row bands frame aligned with result_df, portfolio bands frame)
+    point = pd.to_numeric(result_df[EMISSIONS_COLUMN], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+    codes, categories = pd.factorize(result_df["Category"].astype(object).fillna("Unknown"))
+    category_seed, chunk_seed = np.random.SeedSequence(seed).spawn(2)
+    log_multiplier, scope1_share, ratios = _category_draws(list(categories), draws,
+                                                              np.random.default_rng(category_seed))
+
+    # A supplier's percentiles are its point estimate scaled by its category's sampled ratios
+    bands = point[:, None] * ratios[codes]
+
+    # Portfolio draws need every supplier's independent spread, evaluated in bounded blocks.
+    # Capped draws are the first of the category draws, so they stay a sample of the same distribution.
+    portfolio_draws = min(draws, max(MIN_PORTFOLIO_DRAWS, MAX_PORTFOLIO_SAMPLES // max(len(point), 1)))
+    if portfolio_draws < draws:
+        print(f"Portfolio emissions bands use {portfolio_draws} of {draws} draws for {len(point)} suppliers")
+        log_multiplier, scope1_share = log_multiplier[:, :portfolio_draws], scope1_share[:, :portfolio_draws]
+    rows = max(1, CHUNK_ELEMENTS // portfolio_draws)
+    starts = range(0, len(point), rows)
+    category_totals = np.zeros((len(categories), portfolio_draws), dtype=np.float64)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_chunk_totals, point[start:start + rows].astype(np.float32), codes[start:start + rows],
+                        len(categories), portfolio_draws, chunk_rng)
+            for start, chunk_rng in zip(starts, chunk_seed.spawn(len(starts)))
+        ]
+        for future in futures:
+            category_totals += future.result()
+    category_totals *= np.exp(log_multiplier)
+    total = category_totals.sum(axis=0)
+    scope1 = (category_totals * scope1_share).sum(axis=0)
+
+    supplier_bands = pd.DataFrame(bands.round(2), columns=BAND_COLUMNS, index=result_df.index)
+    portfolio = pd.DataFrame(
+        [np.percentile(values, PERCENTILES) for values in (total, scope1, total - scope1)],
+        index=pd.Index(["Scope 1 & 2", "Scope 1", "Scope 2"], name="Emissions"),
+        columns=[f"P{p} (kg CO2e)" for p in PERCENTILES],
+    ).round(2)
+    portfolio["Point Estimate (kg CO2e)"] = [round(float(point.sum()), 2), None, None]
+    return supplier_bands, portfolio.reset_index()
+
+
+def add_emissions_bands(result_df, draws=DEFAULT_DRAWS, seed=0, workers=None):
+    # result_df with the band columns placed after the point estimate, and the portfolio bands
+    supplier_bands, portfolio = emissions_bands(result_df, draws, seed, workers)
+    banded = result_df.drop(columns=BAND_COLUMNS, errors="ignore")
+    position = banded.columns.get_loc(EMISSIONS_COLUMN) + 1
+    for offset, column in enumerate(BAND_COLUMNS):
+        banded.insert(position + offset, column, supplier_bands[column].to_numpy())
+    return banded, portfolio
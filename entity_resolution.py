@@ -0,0 +1,181 @@
+# Supplier entity resolution ahead of enrichment
+#
+# ERP exports are invoice lines: one supplier appears many times, often under different spellings
+# ("ACME Ltd", "Acme Limited", "Acme Ltd."). Rows are clustered into entities so each real supplier
+# is enriched once, then the entity's assessment is fanned back out to every original row:
+#
+#   entities, codes = resolve_entities(df)
+#   entity_results = assess(entities)
+#   result_df = fan_out(entity_results, df, codes, DEFAULT_EMISSIONS_FACTOR)
+#
+# Rows join the same entity when they share a company number, the same normalised name, or a
+# normalised name within FUZZY_THRESHOLD of another in the same block (same first word) that
+# carries the same numbers. A company number is authoritative: an entity never holds two different
+# ones, so "Acme Ltd" under 01234567 and "Acme Ltd" under 07654321 stay two suppliers. A row
+# without a number joins the first entity its name or spelling links it to.
+
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+FUZZY_THRESHOLD = 92
+# Bound on names compared pairwise in one block; larger blocks fall back to exact matching
+MAX_BLOCK_SIZE = 2000
+
+LEGAL_SUFFIXES = {
+    "ltd", "limited", "plc", "llp", "lp", "inc", "incorporated", "corp", "corporation",
+    "co", "company", "gmbh", "sa", "bv", "ag", "uk",
+}
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_name(name):
+    if name is None or name is pd.NA or (isinstance(name, float) and np.isnan(name)):
+        return ""
+    words = _PUNCTUATION.sub(" ", str(name).lower().replace("&", " and ")).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def normalize_company_number(number):
+    # Companies House numbers are 8 characters; spreadsheets often drop the leading zeros, and a
+    # numeric column with blanks is read back as floats ("1234567.0")
+    if number is None or number is pd.NA or (isinstance(number, float) and np.isnan(number)):
+        return ""
+    number = re.sub(r"\s", "", str(number)).upper()
+    if number.endswith(".0") and number[:-2].isdigit():
+        number = number[:-2]
+    return number.zfill(8) if number.isdigit() else number
+
+
+class _UnionFind:
+    # Each set carries at most one company number; unions that would join two are refused
+    def __init__(self, numbers):
+        self.parent = np.arange(len(numbers))
+        self.number = list(numbers)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b or (self.number[a] and self.number[b] and self.number[a] != self.number[b]):
+            return
+        root, child = min(a, b), max(a, b)
+        self.parent[child] = root
+        self.number[root] = self.number[root] or self.number[child]
+
+
+def _fuzzy_pairs(names, threshold):
+    # Pairs of indices into names whose similarity reaches threshold, compared within blocks
+    blocks = {}
+    for i, name in enumerate(names):
+        blocks.setdefault(name.split(" ", 1)[0], []).append(i)
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        scores = process.cdist([names[i] for i in members], [names[i] for i in members],
+                               scorer=fuzz.token_sort_ratio, score_cutoff=threshold)
+        for a, b in zip(*np.nonzero(np.triu(scores, k=1))):
+            a, b = members[a], members[b]
+            # "Store 12" and "Store 13" are different suppliers however similar the names
+            if _DIGITS.findall(names[a]) == _DIGITS.findall(names[b]):
+                yield a, b
+
+
+def cluster_suppliers(df, threshold=FUZZY_THRESHOLD):
+    # Entity code (0..n-1, in order of first appearance) for every row of df. Nodes are distinct
+    # (normalised name, company number) pairs, so one spelling can belong to two companies.
+    if not len(df):
+        return np.zeros(0, dtype=np.intp)
+    names = df["Supplier"].map(normalize_name)
+    numbers = (df["Company Number"].map(normalize_company_number) if "Company Number" in df.columns
+               else pd.Series("", index=df.index))
+    node_codes, nodes = pd.factorize(pd.MultiIndex.from_arrays([names, numbers]))
+    uf = _UnionFind([number for _, number in nodes])
+
+    # Same number first, so numbered nodes anchor their entities before names link anything to them
+    nodes_by_name, first_node_for_number = {}, {}
+    for node, (name, number) in enumerate(nodes):
+        nodes_by_name.setdefault(name, []).append(node)
+        if number:
+            uf.union(first_node_for_number.setdefault(number, node), node)
+    for members in nodes_by_name.values():
+        for node in members[1:]:
+            uf.union(members[0], node)
+
+    unique_names = list(nodes_by_name)
+    for a, b in _fuzzy_pairs(unique_names, threshold):
+        for node_a in nodes_by_name[unique_names[a]]:
+            for node_b in nodes_by_name[unique_names[b]]:
+                uf.union(node_a, node_b)
+
+    roots = np.array([uf.find(node) for node in range(len(nodes))])
+    entity_codes, _ = pd.factorize(roots[node_codes])
+    return entity_codes
+
+
+def resolve_entities(df, threshold=FUZZY_THRESHOLD):
+    # (entities, codes): one row per entity with spend summed, and each input row's entity position.
+    # An entity is named after its highest-spend spelling and takes the category of its largest spend.
+    codes = cluster_suppliers(df, threshold)
+    work = pd.DataFrame({
+        "entity": codes,
+        "Supplier": df["Supplier"].fillna("").to_numpy(),
+        "Spend": pd.to_numeric(df["Spend"], errors="coerce").fillna(0.0).to_numpy() if "Spend" in df.columns else 0.0,
+    })
+    spend_by_spelling = work.groupby(["entity", "Supplier"], sort=False)["Spend"].agg(["sum", "size"])
+    names = (spend_by_spelling.sort_values(["sum", "size"], ascending=False)
+             .reset_index().drop_duplicates("entity").set_index("entity")["Supplier"])
+
+    # The row with the largest spend carries the entity's category, factor and company number
+    lead_rows = work.assign(position=np.arange(len(work))).sort_values("Spend", ascending=False, kind="stable")
+    lead_rows = lead_rows.drop_duplicates("entity").set_index("entity")["position"].sort_index()
+    entities = df.iloc[lead_rows.to_numpy()].reset_index(drop=True)
+    entities["Supplier"] = names.sort_index().to_numpy()
+    entities["Spend"] = work.groupby("entity")["Spend"].sum().sort_index().to_numpy()
+    if "Company Number" in df.columns:
+        # An entity holds at most one distinct number (see cluster_suppliers)
+        numbers = df["Company Number"].map(normalize_company_number).astype("string").replace("", pd.NA)
+        entities["Company Number"] = numbers.groupby(codes).first().sort_index().to_numpy()
+    entities["Source Rows"] = np.bincount(codes, minlength=len(entities))
+    return entities, codes
+
+
+def fan_out(entity_results, df, codes, default_emissions_factor):
+    # One result row per input row: the entity's assessment with the row's own supplier name,
+    # spend, category, region and emissions
+    result = entity_results.iloc[codes].reset_index(drop=True)
+    result.insert(1, "Resolved Entity", result["Supplier"])
+    result["Supplier"] = df["Supplier"].to_numpy()
+    if "Company Number" in df.columns:
+        # Rows without a number inherit the entity's. A row whose own number differs from its
+        # entity's would label another company's evidence, which cluster_suppliers rules out
+        numbers = df["Company Number"].map(normalize_company_number).to_numpy()
+        entity_numbers = result["Company Number"].map(normalize_company_number).to_numpy()
+        conflicts = (numbers != "") & (entity_numbers != "") & (numbers != entity_numbers)
+        if conflicts.any():
+            raise ValueError(f"{int(conflicts.sum())} rows carry a company number other than their entity's")
+        result["Company Number"] = np.where(numbers != "", numbers, result["Company Number"].to_numpy())
+    spend = pd.to_numeric(df["Spend"], errors="coerce").fillna(0.0).to_numpy() if "Spend" in df.columns else 0.0
+    result["Spend"] = spend
+    for column in ("Category", "Region"):
+        if column in df.columns:
+            # Labels stay categorical when the entity results hold them that way
+            categorical = isinstance(result[column].dtype, pd.CategoricalDtype)
+            result[column] = pd.Categorical(df[column]) if categorical else df[column].array
+    factor = (pd.to_numeric(df["Emissions Factor"], errors="coerce").fillna(default_emissions_factor).to_numpy()
+              if "Emissions Factor" in df.columns else default_emissions_factor)
+    result["Scope 1 & 2 Emissions (kg CO2e)"] = np.round(spend * factor, 2)
+    return result
@@ -0,0 +1,750 @@
+# ESG assessment engine (importable, no Streamlit dependency)
+#
+# Each supplier goes through two stages:
+#   1. evidence collection - network I/O (Companies House, Google), runs in the calling process
+#   2. evidence analysis   - registry matching, page checks, HTML parsing and TextBlob polarity,
+#                            pure-Python CPU work that can be fanned out to a process pool
+# followed by scoring, which is cheap and stays in the caller.
+
+import contextvars
+import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from textblob import TextBlob
+
+import evidence_store
+import metrics
+import modern_slavery
+import news_feeds
+import risk_view
+from entity_resolution import fan_out, normalize_company_number, normalize_name, resolve_entities
+from modern_slavery import describe_coverage, get_statement_index
+from news_feeds import portfolio_sentiment
+from request_scheduler import BATCH, INTERACTIVE, request_deadline, request_priority, scheduled_get
+from result_columns import ResultColumns
+from risk_view import VIEW_RESULT_COLUMNS, get_risk_view
+from run_journal import row_key
+from single_flight import coalesce
+
+LOOKUP_DIR = "lookups"
+ENRICHMENT_LOOKUP_FILE = "enrichment_lookup.csv"
+ENRICHMENT_FIELDS = ["b_corp", "modern_slavery_statement", "llw", "fair_payment", "sbti"]
+
+# Headers that hold a Companies House number, for registries that publish one
+REGISTRY_NUMBER_COLUMNS = ["Company Number", "CompanyNumber", "company_number", "Company Registration Number"]
+
+# Pre-downloaded registries: flag -> (file in LOOKUP_DIR, column holding the company name)
+REGISTRY_FILES = {
+    "sbti": ("sbti.csv", "Company"),
+    "b_corp": ("bcorp.csv", "Company"),
+    "llw": ("llw.csv", "Employer"),
+    "fair_payment": ("fair_payment.csv", "Name"),
+}
+
+# Suppliers per CPU task; large enough that pickling overhead is amortised
+CPU_BATCH_SIZE = 64
+
+# Where News Sentiment comes from: a Google news query per supplier, or one scan of the local
+# headline store (see news_feeds)
+NEWS_SOURCES = ("live", "feeds")
+
+# Runs up to this size are treated as interactive and jump ahead of queued bulk work
+INTERACTIVE_MAX_ROWS = 20
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Based on UK Government GHG Conversion Factors for Company Reporting (kg CO2e per £)
+EMISSIONS_CATEGORIES = {
+    "Professional Services": 0.045,
+    "Construction": 0.134,
+    "IT Equipment": 0.156,
+    "Transport Services": 0.123,
+    "Facilities Management": 0.111,
+    "Healthcare Products": 0.149,
+    "Utilities": 0.210,
+    "Food and Catering": 0.232,
+    "Office Equipment": 0.095,
+    "Cleaning Services": 0.102,
+    "Printing and Paper": 0.141
+}
+DEFAULT_EMISSIONS_FACTOR = 0.05
+
+# Scoring: evidence -> change in ESG Score (higher is riskier), with the justification it adds.
+# The what-if panel re-scores a finished assessment with other weights (see what_if).
+SCORING_WEIGHTS = {
+    "b_corp": -1,
+    "modern_slavery_statement": 1,
+    "llw": -1,
+    "fair_payment": -1,
+    "sbti": -1,
+    "negative_news": 2,
+}
+EVIDENCE_LABELS = {
+    "b_corp": "Certified B Corp",
+    "modern_slavery_statement": "Modern Slavery Statement found",
+    "llw": "London Living Wage Accredited",
+    "fair_payment": "Fair Payment Code Signatory",
+    "sbti": "SBTi Commitment or Validation",
+    "negative_news": "Negative ESG news sentiment",
+}
+# News polarity below this counts as negative news
+NEGATIVE_SENTIMENT = -0.3
+# RAG cut-offs: Green up to the first score, Amber up to the second, Red above
+RAG_THRESHOLDS = (0, 1)
+
+RESULT_SCHEMA = {
+    "Supplier": "str",
+    "Company Number": "str",
+    "Spend": "float64",
+    "ESG Score": "int8",
+    "RAG Rating": "category",
+    "Confidence Level": "int8",
+    "Justification": "category",
+    "News Sentiment": "str",
+    "Sentiment Score": "float32",
+    "Scope 1 & 2 Emissions (kg CO2e)": "float64",
+    "Category": "category",
+    "Region": "category",
+    "B Corp": "bool",
+    "Modern Slavery Statement": "bool",
+    "LLW Accredited": "bool",
+    "Fair Payment Code": "bool",
+    "SBTi Committed": "bool",
+    "Modern Slavery Statement Year": "category",
+    "Modern Slavery Coverage": "category",
+    "Evidence Date": "str",
+}
+
+
+# -----------------------------
+# Registries (loaded once per process, read-only afterwards)
+# -----------------------------
+
+_registries = None
+_registries_version = None
+
+
+def load_lookup_datasets(lookup_dir=LOOKUP_DIR):
+    # Per registry: hash sets of company numbers and normalised names for joins, plus the lower-cased
+    # names for the substring fallback, so nothing is re-normalised per supplier
+    registries = {}
+    for key, (filename, column) in REGISTRY_FILES.items():
+        registries[key] = {"numbers": set(), "names": set(), "raw": []}
+        try:
+            path = os.path.join(lookup_dir, filename)
+            header = pd.read_csv(path, nrows=0).columns
+            number_column = next((c for c in REGISTRY_NUMBER_COLUMNS if c in header), None)
+            usecols = [column] + ([number_column] if number_column else [])
+            registry = pd.read_csv(path, usecols=usecols, dtype="string")
+            names = registry[column].dropna()
+            registries[key]["raw"] = names.str.lower().tolist()
+            registries[key]["names"] = set(names.map(normalize_name)) - {""}
+            if number_column:
+                registries[key]["numbers"] = set(registry[number_column].map(normalize_company_number)) - {""}
+        except Exception as e:
+            print(f"Error loading lookup dataset {filename}: {e}")
+    return registries
+
+
+def get_registries(lookup_dir=LOOKUP_DIR):
+    # Reloaded whenever a registry file is refreshed (e.g. from the app's refresh buttons)
+    global _registries, _registries_version
+    version = (lookup_dir, tuple(
+        os.path.getmtime(path) if os.path.exists(path) else None
+        for path in (os.path.join(lookup_dir, filename) for filename, _ in REGISTRY_FILES.values())
+    ))
+    if _registries is None or version != _registries_version:
+        _registries = load_lookup_datasets(lookup_dir)
+        _registries_version = version
+    return _registries
+
+
+def join_registries(company_numbers, names, registries):
+    # Hash join of many suppliers (a batch or a whole portfolio) against every registry:
+    # a hit on company number or exact normalised name. Returns one flag dict per supplier.
+    with metrics.timed("registry_join"):
+        frame = pd.DataFrame({
+            "number": [normalize_company_number(number) for number in company_numbers],
+            "name": [normalize_name(name) for name in names],
+        })
+        flags = pd.DataFrame(index=frame.index)
+        for key, registry in registries.items():
+            flags[key] = frame["number"].isin(registry["numbers"]) | frame["name"].isin(registry["names"])
+        return flags.to_dict(orient="records")
+
+
+def match_registries(supplier_clean, registries, company_number=None, joined=None):
+    # joined: flags from join_registries. Suppliers with a company number are decided by the join;
+    # only those without one fall back to substring matching against registry names.
+    with metrics.timed("registry_lookup"):
+        if joined is None:
+            joined = join_registries([company_number], [supplier_clean], registries)[0]
+        if normalize_company_number(company_number):
+            return dict(joined)
+        return {
+            key: joined.get(key) or any(supplier_clean in name for name in registry["raw"])
+            for key, registry in registries.items()
+        }
+
+
+# -----------------------------
+# Stage 1: evidence collection (network)
+# -----------------------------
+
+def get_registered_company_name(supplier_name, company_number=None):
+    # Concurrent sessions asking for the same company share one Companies House lookup
+    number = normalize_company_number(company_number)
+    official_name = coalesce("companies_house", f"#{number}" if number else normalize_name(supplier_name),
+                             _lookup_registered_name, supplier_name, number)
+    return official_name or supplier_name
+
+
+def _lookup_registered_name(supplier_name, number):
+    api_key = os.getenv("COMPANIES_HOUSE_API_KEY", "demo")  # Replace with real key in deployment
+    if number:
+        # A known number resolves exactly through the company profile, no name search
+        url = f"https://api.company-information.service.gov.uk/company/{number}"
+        try:
+            with metrics.timed("companies_house"):
+                response = scheduled_get("companies_house", url, auth=(api_key, ""), timeout=5)
+                if response.status_code == 200 and response.json().get("company_name"):
+                    return response.json()["company_name"]
+        except Exception as e:
+            print(f"Companies House profile error for {number}: {e}")
+        return None
+    url = f"https://api.company-information.service.gov.uk/search/companies?q={supplier_name}"
+    try:
+        with metrics.timed("companies_house"):
+            response = scheduled_get("companies_house", url, auth=(api_key, ""), timeout=5)
+            if response.status_code == 200:
+                items = response.json().get("items", [])
+                if items:
+                    official_name = items[0].get("title")
+                    print(f"🔎 Matched '{supplier_name}' to Companies House: {official_name}")
+                    return official_name
+    except Exception as e:
+        print(f"Companies House lookup error: {e}")
+    return None
+
+
+# flag -> Google query template for the live page checks
+SEARCH_QUERIES = {
+    "b_corp": "{} site:bcorporation.uk",
+    "llw": "{} site:livingwage.org.uk",
+    "fair_payment": "{} Prompt Payment Code site:.uk",
+}
+
+
+def _fetch_search_page(url):
+    with metrics.timed("search_fetch"):
+        return scheduled_get("google", url, headers=HEADERS, timeout=5).text
+
+
+def fetch_live_pages(supplier_name):
+    # Pages that could not be fetched are left out; once the source's circuit is open the
+    # remaining queries fail fast instead of waiting on it. A page another session is already
+    # fetching for the same supplier is waited for, not fetched again.
+    search_url = lambda query: f"https://www.google.com/search?q={query}"
+    supplier_key = normalize_name(supplier_name)
+    pages = {}
+    for key, template in SEARCH_QUERIES.items():
+        try:
+            pages[key] = coalesce(f"search:{key}", supplier_key, _fetch_search_page,
+                                  search_url(template.format(supplier_name)))
+        except Exception as e:
+            print(f"Live scrape error for {supplier_name} ({key}): {e}")
+    return pages
+
+
+def fetch_news_page(supplier_name):
+    query = f"{supplier_name} ESG news"
+    url = f"https://www.google.com/search?q={query}"
+    with metrics.timed("news_fetch"):
+        return scheduled_get("google", url, headers=HEADERS).text
+
+
+# "Input Name" is the supplier name as uploaded, so a later run finds the entry without first
+# asking Companies House for the registered name
+ENRICHMENT_COLUMNS = ["Supplier", "Company Number", "Input Name"] + ENRICHMENT_FIELDS
+
+
+def enrichment_key(company_number, name):
+    # Cache entries are keyed by company number where there is one, by registered name otherwise
+    number = normalize_company_number(company_number)
+    return f"#{number}" if number else name.strip()
+
+
+def load_enrichment_lookup(lookup_file=ENRICHMENT_LOOKUP_FILE):
+    enrichment_lookup = {}
+    if os.path.exists(lookup_file):
+        with open(lookup_file, mode="r", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                info = {key: row[key].lower() == "true" for key in ENRICHMENT_FIELDS}
+                enrichment_lookup[enrichment_key(row.get("Company Number"), row["Supplier"])] = info
+                if row.get("Input Name"):
+                    enrichment_lookup.setdefault(enrichment_key(row.get("Company Number"), row["Input Name"]), info)
+    return enrichment_lookup
+
+
+def _upgrade_enrichment_lookup(lookup_file):
+    # Files written before a column existed are rewritten once with it empty
+    with open(lookup_file, mode="r", newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or set(ENRICHMENT_COLUMNS) <= set(reader.fieldnames):
+            return
+        rows = list(reader)
+    with open(lookup_file, mode="w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=ENRICHMENT_COLUMNS)
+        writer.writeheader()
+        writer.writerows({key: row.get(key, "") for key in ENRICHMENT_COLUMNS} for row in rows)
+
+
+def append_enrichment_lookup(supplier_name, result, lookup_file=ENRICHMENT_LOOKUP_FILE, company_number=None,
+                             input_name=None):
+    if os.path.exists(lookup_file) and os.stat(lookup_file).st_size:
+        _upgrade_enrichment_lookup(lookup_file)
+    with open(lookup_file, mode="a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=ENRICHMENT_COLUMNS)
+        if os.stat(lookup_file).st_size == 0:
+            writer.writeheader()
+        writer.writerow({
+            "Supplier": supplier_name.strip(),
+            "Company Number": normalize_company_number(company_number),
+            "Input Name": (input_name or "").strip(),
+            **{k: str(v) for k, v in result.items()},
+        })
+
+
+def collect_evidence(supplier, enrichment_lookup, include_news=True, company_number=None):
+    # The cache is checked by the row's own number or name before any network call; Companies House
+    # is only asked for the registered name when that misses
+    cached = enrichment_lookup.get(enrichment_key(company_number, supplier))
+    registered_name = supplier
+    if cached is None:
+        registered_name = get_registered_company_name(supplier, company_number)
+        cached = enrichment_lookup.get(enrichment_key(company_number, registered_name))
+    metrics.record_cache("enrichment_lookup", cached is not None)
+    evidence = {
+        "supplier": supplier,
+        "company_number": normalize_company_number(company_number),
+        "registered_name": registered_name,
+        "cached_info": cached,
+        "pages": fetch_live_pages(registered_name) if cached is None else {},
+        "news_html": None,
+        "news_error": None if include_news else "not requested",
+    }
+    # Checks whose evidence could not be fetched; they lower confidence instead of failing the supplier
+    evidence["missing"] = [key for key in SEARCH_QUERIES if key not in evidence["pages"]] if cached is None else []
+    if include_news:
+        try:
+            evidence["news_html"] = coalesce("news", normalize_name(supplier), fetch_news_page, supplier)
+        except Exception as e:
+            evidence["news_error"] = str(e)
+            evidence["missing"].append("news")
+    return evidence
+
+
+# -----------------------------
+# Stage 2: evidence analysis (CPU)
+# -----------------------------
+
+def flags_from_pages(registry_flags, pages):
+    result = {
+        "b_corp": registry_flags.get("b_corp", False),
+        "modern_slavery_statement": False,
+        "llw": registry_flags.get("llw", False),
+        "fair_payment": registry_flags.get("fair_payment", False),
+        "sbti": registry_flags.get("sbti", False),
+    }
+    checks = {
+        "b_corp": "bcorporation",
+        "llw": "accredited",
+        "fair_payment": "signatory",
+    }
+    for key, needle in checks.items():
+        if key in pages and needle in pages[key].lower():
+            result[key] = True
+    return result
+
+
+def sentiment_from_html(supplier_name, html):
+    with metrics.timed("html_parse"):
+        soup = BeautifulSoup(html, "html.parser")
+        headlines = [h.get_text() for h in soup.find_all("h3") if supplier_name.lower() in h.get_text().lower()][:3]
+    combined = " ".join(headlines)
+    with metrics.timed("sentiment"):
+        sentiment = TextBlob(combined).sentiment.polarity if combined else 0
+    return sentiment, combined or "No relevant news found."
+
+
+def analyze_evidence(evidence, registries):
+    info = evidence["cached_info"]
+    if info is None:
+        registry_flags = match_registries(evidence["registered_name"].strip().lower(), registries,
+                                          evidence.get("company_number"), evidence.get("registry_flags"))
+        info = flags_from_pages(registry_flags, evidence["pages"])
+
+    if evidence["news_error"] is not None:
+        sentiment = (0, f"Sentiment error: {evidence['news_error']}")
+    else:
+        try:
+            sentiment = sentiment_from_html(evidence["supplier"], evidence["news_html"])
+        except Exception as e:
+            metrics.count_error("sentiment")
+            sentiment = (0, f"Sentiment error: {e}")
+    return info, sentiment[0], sentiment[1]
+
+
+def apply_statement_registry(info, company_number, *names):
+    # The modern slavery flag comes from the local registry index (a dict lookup), not from
+    # search pages or the enrichment cache, so a registry refresh applies to every supplier
+    statement = get_statement_index().lookup(company_number, *names)
+    return {**info, "modern_slavery_statement": statement is not None}, statement
+
+
+def analyze_evidence_batch(batch):
+    # Unit of work shipped to a CPU worker; registries come from the worker's own memory
+    registries = get_registries()
+    return [analyze_evidence(evidence, registries) for evidence in batch]
+
+
+def _analyze_in_worker(batch):
+    # Worker metrics live in the worker process; hand them back with the results
+    results = analyze_evidence_batch(batch)
+    return results, metrics.export_state(reset_after=True)
+
+
+def _init_cpu_worker(lookup_dir):
+    # Forked workers inherit the parent's registries copy-on-write; spawned ones load them once here.
+    # A forked worker also inherits the parent's metric counts, which must not be reported twice.
+    metrics.reset()
+    get_registries(lookup_dir)
+
+
+def make_cpu_executor(cpu_workers, lookup_dir=LOOKUP_DIR):
+    get_registries(lookup_dir)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(
+        max_workers=cpu_workers,
+        mp_context=context,
+        initializer=_init_cpu_worker,
+        initargs=(lookup_dir,),
+    )
+
+
+# -----------------------------
+# Single-supplier helpers
+# -----------------------------
+
+def get_company_info(supplier_name, company_number=None):
+    enrichment_lookup = load_enrichment_lookup()
+    evidence = collect_evidence(supplier_name, enrichment_lookup, include_news=False, company_number=company_number)
+    info, _, _ = analyze_evidence(evidence, get_registries())
+    if evidence["cached_info"] is None and not evidence["missing"]:
+        append_enrichment_lookup(evidence["registered_name"], info, company_number=company_number,
+                                 input_name=supplier_name)
+    info, _ = apply_statement_registry(info, company_number, evidence["registered_name"], supplier_name)
+    return info
+
+
+def analyze_sentiment(supplier_name):
+    try:
+        return sentiment_from_html(supplier_name, fetch_news_page(supplier_name))
+    except Exception as e:
+        return 0, f"Sentiment error: {e}"
+
+
+def estimate_emissions(spend, emissions_factor):
+    try:
+        return round(float(spend) * emissions_factor, 2)
+    except:
+        return 0.0
+
+
+# -----------------------------
+# Scoring and assessment
+# -----------------------------
+
+def rag_rating(score, rag_thresholds=RAG_THRESHOLDS):
+    green_max, amber_max = rag_thresholds
+    return "Green" if score <= green_max else "Amber" if score <= amber_max else "Red"
+
+
+def score_supplier(info, sentiment_score, weights=SCORING_WEIGHTS, negative_sentiment=NEGATIVE_SENTIMENT,
+                   rag_thresholds=RAG_THRESHOLDS):
+    score = 0
+    confidence = 0
+    justification = []
+
+    evidence = {key: bool(info.get(key)) for key in ENRICHMENT_FIELDS}
+    evidence["negative_news"] = sentiment_score < negative_sentiment
+    for key, label in EVIDENCE_LABELS.items():
+        if evidence[key]:
+            score += weights[key]
+            justification.append(label)
+            confidence += 1
+
+    return score, rag_rating(score, rag_thresholds), confidence, justification
+
+
+def result_from_view(row, record):
+    # A precomputed assessment (see risk_view) applied to this row's spend, category and region
+    spend = row.get("Spend", 0)
+    region = row.get("Region")
+    number = normalize_company_number(row.get("Company Number")) or record["company_number"]
+    with metrics.timed("emissions"):
+        emissions = estimate_emissions(spend, row.get("Emissions Factor", DEFAULT_EMISSIONS_FACTOR))
+    return {
+        "Supplier": row.get("Supplier"),
+        "Company Number": number or None,
+        "Spend": spend,
+        **{column: record.get(column) for column in VIEW_RESULT_COLUMNS},
+        "Scope 1 & 2 Emissions (kg CO2e)": emissions,
+        "Category": row.get("Category", "Unknown"),
+        "Region": region if isinstance(region, str) and region else None,
+    }
+
+
+def _iter_row_batches(df, batch_size):
+    batch = []
+    for _, row in df.iterrows():
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def collect_batch_evidence(rows, enrichment_lookup, io_pool=None, include_news=True):
+    if io_pool is None:
+        evidence = [collect_evidence(row.get("Supplier"), enrichment_lookup, include_news, row.get("Company Number"))
+                    for row in rows]
+    else:
+        # Each task runs in a copy of the caller's context so the request priority carries over
+        futures = [
+            io_pool.submit(contextvars.copy_context().run, collect_evidence, row.get("Supplier"), enrichment_lookup,
+                           include_news, row.get("Company Number"))
+            for row in rows
+        ]
+        evidence = [future.result() for future in futures]
+    # One hash join per batch against every registry, on the input name as well as the registered
+    # one so a match does not depend on the Companies House lookup; the analysis stage only falls
+    # back to name substring matching for suppliers without a company number
+    uncached = [ev for ev in evidence if ev["cached_info"] is None]
+    if uncached:
+        registries = get_registries()
+        numbers = [ev["company_number"] for ev in uncached]
+        by_input = join_registries(numbers, [ev["supplier"] for ev in uncached], registries)
+        by_registered = join_registries(numbers, [ev["registered_name"] for ev in uncached], registries)
+        for ev, input_flags, registered_flags in zip(uncached, by_input, by_registered):
+            ev["registry_flags"] = {key: input_flags[key] or registered_flags[key] for key in registered_flags}
+    return evidence
+
+
+def run_options(news_source="live", use_view=True, **settings):
+    # Everything besides the input that changes an assessment's output, for run ids: the settings
+    # given to assess_esg_risks and the evidence mode, plus the modification times of the local
+    # datasets the run reads. The enrichment cache is left out: every run appends to it.
+    datasets = [os.path.join(LOOKUP_DIR, filename) for filename, _ in REGISTRY_FILES.values()]
+    datasets.append(os.path.join(modern_slavery.LOOKUP_DIR, modern_slavery.INDEX_FILE))
+    if news_source == "feeds":
+        datasets.append(os.path.join(news_feeds.LOOKUP_DIR, news_feeds.HEADLINE_STORE))
+    if use_view:
+        datasets.append(os.path.join(risk_view.LOOKUP_DIR, risk_view.VIEW_FILE))
+    settings.update(news_source=news_source, use_view=use_view)
+    return {
+        "evidence": evidence_store.get_mode(),
+        **settings,
+        "datasets": {path: os.path.getmtime(path) if os.path.exists(path) else None for path in datasets},
+    }
+
+
+def assess_esg_risks(df, max_workers=1, cpu_backend=None, cpu_workers=None, batch_size=CPU_BATCH_SIZE, priority=None,
+                     journal=None, dedupe=True, time_budget=None, news_source="live", use_view=True):
+    # max_workers > 1 collects evidence for a batch concurrently (network-bound; the request
+    # scheduler still enforces each source's rate). cpu_backend="process" runs the analysis
+    # stage in a process pool, one task per batch of suppliers; the default analyses inline,
+    # which is cheapest for a handful of rows. priority defaults to interactive for small runs
+    # and batch for bulk ones.
+    # With a RunJournal, each finished supplier is checkpointed; re-running with the same
+    # journal skips suppliers already done and a completed run is served from its artefact.
+    # dedupe clusters rows that are the same supplier (see entity_resolution) and enriches each
+    # entity once; the result still has one row per input row.
+    # time_budget (seconds) bounds the run: suppliers are taken in descending spend order, local
+    # evidence (cache, registries) always applies, and once the budget is spent no more pages are
+    # fetched. Every supplier is still returned; missing evidence lowers its Confidence Level.
+    # Such a partial run is not finalised in the journal, so running it again fills the gaps.
+    # news_source="feeds" takes News Sentiment from the local headline store, matched for every
+    # supplier in one pass, instead of a news query per supplier.
+    # use_view serves suppliers covered by the precomputed risk view without any enrichment;
+    # the scheduled job that refreshes the view runs with use_view=False.
+    if news_source not in NEWS_SOURCES:
+        raise ValueError(f"Unknown news source '{news_source}', expected one of {', '.join(NEWS_SOURCES)}")
+    if journal is not None and evidence_store.get_mode() == "record":
+        # A recording must fetch every supplier, so it neither returns nor resumes an earlier run
+        print(f"Evidence is being recorded; not resuming run {journal.run_id}")
+        journal = None
+    if journal is not None and journal.is_finished():
+        return typed_results(journal.load_final())
+    if dedupe:
+        with metrics.timed("entity_resolution"):
+            entities, codes = resolve_entities(df)
+    else:
+        entities = df
+    if priority is None:
+        priority = INTERACTIVE if len(entities) <= INTERACTIVE_MAX_ROWS else BATCH
+    order = None
+    if time_budget is not None and "Spend" in entities.columns:
+        # Highest spend first, so the suppliers that matter most get live evidence before the deadline
+        spend = pd.to_numeric(entities["Spend"], errors="coerce").fillna(0.0).to_numpy()
+        order = np.argsort(-spend, kind="stable")
+        entities = entities.iloc[order]
+    news = portfolio_sentiment(entities["Supplier"]) if news_source == "feeds" else None
+    try:
+        with request_priority(priority), request_deadline(time_budget):
+            result_df, incomplete = _assess_esg_risks(entities, max_workers, cpu_backend, cpu_workers, batch_size,
+                                                      journal, news, get_risk_view() if use_view else None)
+    finally:
+        if journal is not None:
+            journal.close()
+    if order is not None:
+        result_df = result_df.iloc[np.argsort(order)].reset_index(drop=True)
+    if dedupe:
+        result_df = fan_out(result_df, df, codes, DEFAULT_EMISSIONS_FACTOR)
+    if journal is not None and not incomplete:
+        journal.compact(result_df)
+    return result_df
+
+
+def typed_results(result_df):
+    # Parquet cannot carry every RESULT_SCHEMA dtype (an all-missing category column comes back
+    # as object), so a finished run's artefact is rebuilt through the same typed columns as a fresh run
+    schema = {name: kind for name, kind in RESULT_SCHEMA.items() if name in result_df.columns}
+    columns = ResultColumns(schema)
+    columns.extend(result_df[list(schema)].to_dict("records"))
+    typed = columns.to_frame()
+    return result_df.assign(**{name: typed[name].array for name in schema})
+
+
+def _assess_esg_risks(df, max_workers, cpu_backend, cpu_workers, batch_size, journal, news=None, view=None):
+    results = ResultColumns(RESULT_SCHEMA)
+    enrichment_lookup = load_enrichment_lookup()
+    completed = journal.completed() if journal is not None else {}
+    if completed:
+        print(f"Resuming run {journal.run_id}: {len(completed)} suppliers already done")
+    cpu_workers = cpu_workers or os.cpu_count() or 1
+    executor = make_cpu_executor(cpu_workers) if cpu_backend == "process" else None
+    io_pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    max_in_flight = 2 * cpu_workers
+    pending = deque()
+    incomplete = 0
+
+    def finish(rows, evidence, analysed):
+        nonlocal incomplete
+        fresh = zip(evidence, analysed)
+        for row in rows:
+            key = row_key(row)
+            if key in completed:
+                results.append(completed[key])
+                continue
+
+            ev, (info, sentiment_score, sentiment_summary) = next(fresh)
+            if news is not None:
+                sentiment_score, sentiment_summary = news.get(normalize_name(row.get("Supplier")),
+                                                              (0, "No relevant news found."))
+            missing = ev.get("missing", [])
+            # Flags from incomplete evidence are not cached, so the next run fetches them again
+            if ev["cached_info"] is None and not missing:
+                append_enrichment_lookup(ev["registered_name"], info, company_number=ev["company_number"],
+                                         input_name=ev["supplier"])
+                enrichment_lookup[enrichment_key(ev["company_number"], ev["registered_name"])] = info
+                enrichment_lookup.setdefault(enrichment_key(ev["company_number"], ev["supplier"]), info)
+
+            info, statement = apply_statement_registry(info, ev["company_number"], ev["registered_name"],
+                                                       row.get("Supplier"))
+            spend = row.get("Spend", 0)
+            region = row.get("Region")
+            with metrics.timed("scoring"):
+                score, rag, confidence, justification = score_supplier(info, sentiment_score)
+            if missing:
+                confidence = max(0, confidence - len(missing))
+                justification.append(f"Evidence unavailable: {', '.join(missing)}")
+            with metrics.timed("emissions"):
+                emissions = estimate_emissions(spend, row.get("Emissions Factor", DEFAULT_EMISSIONS_FACTOR))
+            result = {
+                "Supplier": row.get("Supplier"),
+                "Company Number": ev["company_number"] or None,
+                "Spend": spend,
+                "ESG Score": score,
+                "RAG Rating": rag,
+                "Confidence Level": confidence,
+                "Justification": ", ".join(justification),
+                "News Sentiment": sentiment_summary,
+                "Sentiment Score": sentiment_score,
+                "Scope 1 & 2 Emissions (kg CO2e)": emissions,
+                "Category": row.get("Category", "Unknown"),
+                "Region": region if isinstance(region, str) and region else None,
+                "B Corp": info.get("b_corp"),
+                "Modern Slavery Statement": info.get("modern_slavery_statement"),
+                "LLW Accredited": info.get("llw"),
+                "Fair Payment Code": info.get("fair_payment"),
+                "SBTi Committed": info.get("sbti"),
+                "Modern Slavery Statement Year": str(statement["latest_year"]) if statement and statement["latest_year"] else None,
+                "Modern Slavery Coverage": describe_coverage(statement),
+                "Evidence Date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            results.append(result)
+            if missing:
+                # Not checkpointed: a resumed run retries the supplier once its sources are reachable
+                incomplete += 1
+            elif journal is not None:
+                journal.append(key, result)
+        if journal is not None:
+            journal.sync()
+
+    def finish_pending(item):
+        rows_done, evidence_done, future = item
+        analysed, worker_metrics = future.result()
+        metrics.merge_state(worker_metrics)
+        finish(rows_done, evidence_done, analysed)
+
+    try:
+        for rows in _iter_row_batches(df, batch_size):
+            if view is not None and len(view):
+                # Served like journal entries: no enrichment, and not checkpointed again
+                for row in rows:
+                    record = view.lookup(row.get("Company Number"), row.get("Supplier"))
+                    if record is not None and row_key(row) not in completed:
+                        completed[row_key(row)] = result_from_view(row, record)
+            todo = [row for row in rows if row_key(row) not in completed]
+            evidence = collect_batch_evidence(todo, enrichment_lookup, io_pool, include_news=news is None)
+            if executor is None:
+                finish(rows, evidence, analyze_evidence_batch(evidence))
+                continue
+            # Keep collecting the next batch while workers analyse the previous ones,
+            # but bound the number of batches (and fetched pages) held in memory
+            pending.append((rows, evidence, executor.submit(_analyze_in_worker, evidence)))
+            while len(pending) >= max_in_flight:
+                finish_pending(pending.popleft())
+        while pending:
+            finish_pending(pending.popleft())
+    finally:
+        if io_pool is not None:
+            io_pool.shutdown()
+        if executor is not None:
+            executor.shutdown()
+
+    for issue in results.invalid:
+        metrics.count_error("result_columns")
+        print(f"Result row {issue['row']}: {issue['column']} value {issue['value']!r} not stored")
+    return results.to_frame(), incomplete
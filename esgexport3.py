@@ -3,248 +3,26 @@
 import streamlit as st
 st.set_page_config(page_title="ESG Risk Rating Tool", layout="wide")
 import pandas as pd
-import io
-import requests
 import os
-import csv
-from bs4 import BeautifulSoup
-from textblob import TextBlob
-from fpdf import FPDF
-
-
-
-# -----------------------------
-# Function Definitions (MUST BE FIRST)
-# -----------------------------
-
-def assess_esg_risks(df):
-    results = []
-    for _, row in df.iterrows():
-        supplier = row.get("Supplier")
-        spend = row.get("Spend", 0)
-        category = row.get("Category", "Unknown")
-        emissions_factor = row.get("Emissions Factor", 0.05)
-
-        info = get_company_info(supplier)
-        sentiment_score, sentiment_summary = analyze_sentiment(supplier)
-        emissions = estimate_emissions(spend, emissions_factor)
-
-        score = 0
-        confidence = 0
-        justification = []
-
-        if info.get("b_corp"):
-            score -= 1
-            justification.append("Certified B Corp")
-            confidence += 1
-        if info.get("modern_slavery_statement"):
-            score += 1
-            justification.append("Modern Slavery Statement found")
-            confidence += 1
-        if info.get("llw"):
-            score -= 1
-            justification.append("London Living Wage Accredited")
-            confidence += 1
-        if info.get("fair_payment"):
-            score -= 1
-            justification.append("Fair Payment Code Signatory")
-            confidence += 1
-        if info.get("sbti"):
-            score -= 1
-            justification.append("SBTi Commitment or Validation")
-            confidence += 1
-        if sentiment_score < -0.3:
-            score += 2
-            justification.append("Negative ESG news sentiment")
-            confidence += 1
-
-        rag = "Green" if score <= 0 else "Amber" if score == 1 else "Red"
-
-        results.append({
-            "Supplier": supplier,
-            "Spend": spend,
-            "ESG Score": score,
-            "RAG Rating": rag,
-            "Confidence Level": confidence,
-            "Justification": ", ".join(justification),
-            "News Sentiment": sentiment_summary,
-            "Scope 1 & 2 Emissions (kg CO2e)": emissions,
-            "Category": category,
-            "B Corp": info.get("b_corp"),
-            "Modern Slavery Statement": info.get("modern_slavery_statement"),
-            "LLW Accredited": info.get("llw"),
-            "Fair Payment Code": info.get("fair_payment"),
-            "SBTi Committed": info.get("sbti")
-        })
-
-    return pd.DataFrame(results)
-
-
-def get_company_info(supplier_name):
-    # Load pre-downloaded datasets for fast lookup
-    def load_lookup_datasets():
-        datasets = {}
-        try:
-            datasets["sbti"] = pd.read_csv("lookups/sbti.csv")
-            datasets["b_corp"] = pd.read_csv("lookups/bcorp.csv")
-            datasets["llw"] = pd.read_csv("lookups/llw.csv")
-            datasets["fair_payment"] = pd.read_csv("lookups/fair_payment.csv")
-        except Exception as e:
-            print(f"Error loading lookup datasets: {e}")
-        return datasets
-
-    datasets = load_lookup_datasets()
-
-    def get_registered_company_name(supplier_name):
-        api_key = os.getenv("COMPANIES_HOUSE_API_KEY", "demo")  # Replace with real key in deployment
-        url = f"https://api.company-information.service.gov.uk/search/companies?q={supplier_name}"
-        try:
-            response = requests.get(url, auth=(api_key, ""), timeout=5)
-            if response.status_code == 200:
-                items = response.json().get("items", [])
-                if items:
-                    official_name = items[0].get("title")
-                    print(f"🔎 Matched '{supplier_name}' to Companies House: {official_name}")
-                    return official_name
-        except Exception as e:
-            print(f"Companies House lookup error: {e}")
-        return supplier_name
-
-    supplier_name = get_registered_company_name(supplier_name)
-    def check_sbti_local(supplier_name):
-        sbti_file = "lookups/sbti.xlsx"
-        sbti_url = "https://sciencebasedtargets.org/resources/files/SBTi-Targets-List.xlsx"
-
-        if not os.path.exists("lookups"):
-            os.makedirs("lookups")
-
-        try:
-            response = requests.get(sbti_url, timeout=10)
-            with open(sbti_file, "wb") as f:
-                f.write(response.content)
-        except Exception as e:
-            print(f"Failed to download SBTi file: {e}")
-
-        if os.path.exists(sbti_file):
-            try:
-                sbti_df = pd.read_excel(sbti_file)
-                matched = sbti_df[sbti_df["Company"].str.lower().str.contains(supplier_name.strip().lower(), na=False)]
-                if not matched.empty:
-                    print(f"✅ SBTi match found for '{supplier_name}': {matched.iloc[0]['Company']}")
-                    return True
-                else:
-                    print(f"❌ No SBTi match found for '{supplier_name}'")
-            except Exception as e:
-                print(f"Error reading SBTi file: {e}")
-        return False
-
-    headers = {"User-Agent": "Mozilla/5.0"}
-    lookup_file = "enrichment_lookup.csv"
-
-    enrichment_lookup = {}
-    if os.path.exists(lookup_file):
-        with open(lookup_file, mode="r", newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                enrichment_lookup[row["Supplier"]] = {
-                    "b_corp": row["b_corp"].lower() == "true",
-                    "modern_slavery_statement": row["modern_slavery_statement"].lower() == "true",
-                    "llw": row["llw"].lower() == "true",
-                    "fair_payment": row["fair_payment"].lower() == "true",
-                    "sbti": row["sbti"].lower() == "true"
-                }
-
-    result = enrichment_lookup.get(supplier_name.strip())
-    supplier_clean = supplier_name.strip().lower()
-    sbti_match = any(datasets.get("sbti", pd.DataFrame()).get("Company", pd.Series()).str.lower().str.contains(supplier_clean, na=False))
-    bcorp_match = any(datasets.get("b_corp", pd.DataFrame()).get("Company", pd.Series()).str.lower().str.contains(supplier_clean, na=False))
-    llw_match = any(datasets.get("llw", pd.DataFrame()).get("Employer", pd.Series()).str.lower().str.contains(supplier_clean, na=False))
-    fair_match = any(datasets.get("fair_payment", pd.DataFrame()).get("Name", pd.Series()).str.lower().str.contains(supplier_clean, na=False))
-    if result is None:
-        result = {
-            "b_corp": bcorp_match,
-            "modern_slavery_statement": False,
-            "llw": llw_match,
-            "fair_payment": fair_match,
-            "sbti": sbti_match
-        }
-
-        try:
-            search_url = lambda query: f"https://www.google.com/search?q={query}"
-            queries = {
-                "b_corp": f"{supplier_name} site:bcorporation.uk",
-                "modern_slavery_statement": f"{supplier_name} Modern Slavery Statement site:.uk",
-                "llw": f"{supplier_name} site:livingwage.org.uk",
-                "fair_payment": f"{supplier_name} Prompt Payment Code site:.uk",
-                "sbti": f"{supplier_name} site:sciencebasedtargets.org"
-            }
-            for key, query in queries.items():
-                url = search_url(query)
-                response = requests.get(url, headers=headers, timeout=5)
-                if key == "b_corp" and "bcorporation" in response.text.lower():
-                    result["b_corp"] = True
-                elif key == "modern_slavery_statement" and "modern slavery" in response.text.lower():
-                    result["modern_slavery_statement"] = True
-                elif key == "llw" and "accredited" in response.text.lower():
-                    result["llw"] = True
-                elif key == "fair_payment" and "signatory" in response.text.lower():
-                    result["fair_payment"] = True
-        except Exception as e:
-            print(f"Live scrape error for {supplier_name}: {e}")
-
-        with open(lookup_file, mode="a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=["Supplier", "b_corp", "modern_slavery_statement", "llw", "fair_payment", "sbti"])
-            if os.stat(lookup_file).st_size == 0:
-                writer.writeheader()
-            writer.writerow({"Supplier": supplier_name.strip(), **{k: str(v) for k, v in result.items()}})
-
-    return result
-
-
-def analyze_sentiment(supplier_name):
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        query = f"{supplier_name} ESG news"
-        url = f"https://www.google.com/search?q={query}"
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.text, "html.parser")
-        headlines = [h.get_text() for h in soup.find_all("h3") if supplier_name.lower() in h.get_text().lower()][:3]
-        combined = " ".join(headlines)
-        sentiment = TextBlob(combined).sentiment.polarity if combined else 0
-        return sentiment, combined or "No relevant news found."
-    except Exception as e:
-        return 0, f"Sentiment error: {e}"
-
-
-def estimate_emissions(spend, emissions_factor):
-    try:
-        return round(float(spend) * emissions_factor, 2)
-    except:
-        return 0.0
-
-
-def export_to_excel(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='ESG Results')
-    return output.getvalue()
-
-
-def export_to_pdf(df):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    pdf.cell(200, 10, txt="ESG Risk Assessment Report", ln=True, align='C')
-    pdf.ln(10)
-    for _, row in df.iterrows():
-        pdf.set_font("Arial", size=10)
-        for col in df.columns:
-            pdf.multi_cell(0, 10, txt=f"{col}: {row[col]}")
-        pdf.ln(5)
-    pdf_output = io.BytesIO()
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
-    pdf_output.write(pdf_bytes)
-    return pdf_output.getvalue()
+import tempfile
+from contextlib import nullcontext
+from esg_pipeline import (EMISSIONS_CATEGORIES, EVIDENCE_LABELS, NEGATIVE_SENTIMENT, NEWS_SOURCES, RAG_THRESHOLDS,
+                          SCORING_WEIGHTS, assess_esg_risks, run_options)
+from request_scheduler import INTERACTIVE, scheduled_get, scheduler_stats
+from run_journal import RUNS_DIR, RunJournal, frame_run_id
+import uuid
+import metrics
+from profiling import profile_run
+from exporters import export_to_excel, export_to_pdf
+from ingest import format_issues, read_suppliers
+import evidence_store
+import modern_slavery
+import news_feeds
+from portfolio import build_cube
+from result_browser import PAGE_SIZES, ResultBrowser
+from risk_view import get_risk_view
+from what_if import EvidenceMatrix, rating_changes
+from emissions_uncertainty import DEFAULT_DRAWS, add_emissions_bands
 
 
 # -----------------------------
@@ -269,6 +47,32 @@ with st.expander("🔄 Refresh ESG Lookup Datasets"):
         download_and_save_csv("Living Wage", "https://raw.githubusercontent.com/fake-source/llw.csv", "llw.csv")
     if st.button("🔄 Refresh Fair Payment Dataset"):
         download_and_save_csv("Fair Payment", "https://raw.githubusercontent.com/fake-source/fair_payment.csv", "fair_payment.csv")
+    registry_exports = st.file_uploader(
+        "Modern Slavery Statement Registry exports (CSV, one per year)", type=["csv"], accept_multiple_files=True,
+        help="Download from the UK Modern Slavery Statement Registry; replaces the web search for statements",
+    )
+    if registry_exports and st.button("🔄 Rebuild Modern Slavery Index"):
+        try:
+            statement_index = modern_slavery.refresh_index(registry_exports)
+            st.success(f"Modern slavery index rebuilt: {len(statement_index)} organisations.")
+        except Exception as e:
+            st.error(f"Failed to rebuild modern slavery index: {e}")
+    news_dumps = st.file_uploader(
+        "News feeds (RSS/Atom XML or JSON dumps)", type=["xml", "rss", "json"], accept_multiple_files=True,
+        help="Headlines are added to the local store and matched against every supplier in one pass",
+    )
+    if news_dumps and st.button("🔄 Ingest News Feeds"):
+        try:
+            with tempfile.TemporaryDirectory() as folder:
+                paths = []
+                for dump in news_dumps:
+                    paths.append(os.path.join(folder, dump.name))
+                    with open(paths[-1], "wb") as f:
+                        f.write(dump.getbuffer())
+                added = news_feeds.ingest_feeds(paths)
+            st.success(f"Added {added} new headlines to the news store.")
+        except Exception as e:
+            st.error(f"Failed to ingest news feeds: {e}")
 
 
 
@@ -280,23 +84,12 @@ with st.expander("🔄 Refresh ESG Lookup Datasets"):
 st.title("🌍 ESG Risk Rating Tool (Live Data)")
 st.markdown("Enter supplier data manually or upload a file to generate live ESG risk ratings, sentiment analysis, and mitigation actions.")
 
-emissions_categories = {
-    "Professional Services": 0.045,
-    "Construction": 0.134,
-    "IT Equipment": 0.156,
-    "Transport Services": 0.123,
-    "Facilities Management": 0.111,
-    "Healthcare Products": 0.149,
-    "Utilities": 0.210,
-    "Food and Catering": 0.232,
-    "Office Equipment": 0.095,
-    "Cleaning Services": 0.102,
-    "Printing and Paper": 0.141
-}
+emissions_categories = EMISSIONS_CATEGORIES
 
 entry_mode = st.radio("Choose data entry method:", ("Manual Entry", "Upload CSV/Excel"))
 
 supplier_data = []
+upload_df = None
 
 if entry_mode == "Manual Entry":
     supplier_count = st.number_input("How many suppliers would you like to assess?", min_value=1, max_value=20, step=1)
@@ -315,7 +108,7 @@ if entry_mode == "Manual Entry":
                     from rapidfuzz import fuzz
                     api_key = os.getenv("COMPANIES_HOUSE_API_KEY", "demo")
                     url = f"https://api.company-information.service.gov.uk/search/companies?q={search_term}&items_per_page=20"
-                    response = requests.get(url, auth=(api_key, ""), timeout=5)
+                    response = scheduled_get("companies_house", url, priority=INTERACTIVE, auth=(api_key, ""), timeout=5)
                     items = response.json().get("items", [])
                     raw_matches = [
                         {
@@ -355,33 +148,222 @@ elif entry_mode == "Upload CSV/Excel":
     uploaded_file = st.file_uploader("Upload Supplier List (CSV or Excel)", type=["csv", "xlsx"])
     if uploaded_file:
         try:
-            if uploaded_file.name.endswith(".csv"):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            upload_df, upload_issues = read_suppliers(uploaded_file)
 
             st.subheader("📋 Uploaded Supplier Preview")
-            st.dataframe(df.head())
-
-            if "Supplier" in df.columns and "Spend" in df.columns and "Category" in df.columns:
-                supplier_data = df.to_dict(orient="records")
-            else:
-                st.warning("Uploaded file must contain 'Supplier', 'Spend', and 'Category' columns.")
+            st.caption(f"{len(upload_df)} suppliers loaded")
+            st.dataframe(upload_df.head())
+            if upload_issues:
+                with st.expander(f"⚠️ {len(upload_issues)} row(s) skipped or corrected"):
+                    st.text(format_issues(upload_issues))
+        except ValueError as e:
+            st.warning(str(e))
         except Exception as e:
             st.error(f"Error reading file: {e}")
 
-if supplier_data and st.button("Run ESG Risk Assessment"):
+supplier_rows = len(upload_df) if upload_df is not None else len(supplier_data)
+use_all_cores = st.checkbox("Use all CPU cores for parsing and sentiment (large files)", value=supplier_rows > 500)
+profile_this_run = st.checkbox("Profile this run (CPU + memory)", help="Runs from scratch, inline, and saves a flamegraph-ready profile and allocation report")
+time_budget = st.number_input(
+    "Time limit in seconds (0 = no limit)", min_value=0, value=0, step=5,
+    help="Stop fetching live evidence when the limit is reached; suppliers still missing evidence get a lower confidence",
+)
+evidence = st.radio(
+    "Evidence archive", evidence_store.MODES, horizontal=True,
+    help="record: keep every fetched page for audit and replay; replay: re-score from the archive without network access",
+)
+
+news_source = st.radio(
+    "News sentiment from", NEWS_SOURCES, horizontal=True, index=0,
+    help="live: one news search per supplier; feeds: the ingested headline store, scanned once for all suppliers",
+)
+
+known_suppliers = len(get_risk_view())
+use_view = st.checkbox(
+    f"Serve known suppliers from the precomputed risk view ({known_suppliers} suppliers)", value=known_suppliers > 0,
+    help="Suppliers refreshed by the scheduled batch job are rated from the view; only the rest are enriched live",
+)
+
+emissions_draws = st.number_input(
+    "Emissions uncertainty draws (0 = point estimates only)", min_value=0, max_value=100_000, value=0, step=1000,
+    help=f"Monte Carlo over category factors and scope splits, adding P5/P50/P95 emissions (e.g. {DEFAULT_DRAWS})",
+)
+
+reuse_run = st.checkbox(
+    "Reuse the results of an earlier identical run", value=False,
+    help="Return the finished assessment of the same suppliers with the same settings and datasets instead of "
+         "assessing them again. An interrupted assessment always resumes where it stopped.",
+)
+
+if supplier_rows and st.button("Run ESG Risk Assessment"):
     with st.spinner("Assessing ESG risks using live data sources..."):
-        input_df = pd.DataFrame(supplier_data)
-        input_df["Emissions Factor"] = input_df["Category"].map(emissions_categories)
-        result_df = assess_esg_risks(input_df)
+        if upload_df is not None:
+            input_df = upload_df
+        else:
+            input_df = pd.DataFrame(supplier_data)
+            input_df["Emissions Factor"] = input_df["Category"].map(emissions_categories)
+        # Same input, settings and datasets -> same run id, so a rerun or restart mid-assessment
+        # picks up where it stopped; reuse_run only decides whether a finished run is returned
+        run_id = frame_run_id(input_df, run_options(
+            news_source=news_source, use_view=use_view, time_budget=time_budget or None, evidence=evidence,
+            dedupe=True,
+        ))
+        # A profile must cover the whole run, so it neither resumes a journal nor uses worker processes;
+        # a replay re-scores from the archive, so it does not resume either
+        journal = None if profile_this_run or evidence == "replay" else RunJournal(run_id)
+        if journal is not None and not reuse_run:
+            journal.discard_final()
+        profile_dir = os.path.join(RUNS_DIR, f"{run_id}-{uuid.uuid4().hex[:8]}_profile")
+        with profile_run(profile_dir) if profile_this_run else nullcontext({}) as profile_report, \
+                evidence_store.evidence_mode(evidence):
+            result_df = assess_esg_risks(
+                input_df,
+                cpu_backend="process" if use_all_cores and not profile_this_run else None,
+                journal=journal,
+                time_budget=time_budget or None,
+                news_source=news_source,
+                use_view=use_view,
+            )
+            emissions_bands = None
+            if emissions_draws:
+                with metrics.timed("emissions_bands"):
+                    result_df, emissions_bands = add_emissions_bands(result_df, draws=int(emissions_draws))
+            # Roll-ups are computed once here and kept with the result, so reruns only redraw them
+            cube = build_cube(result_df)
+            cube["emissions_bands"] = emissions_bands
+            excel_data = export_to_excel(result_df, cube)
+            pdf_data = export_to_pdf(result_df, cube)
+        st.session_state.assessment = {
+            "result": result_df,
+            "cube": cube,
+            "browser": ResultBrowser(result_df),
+            "evidence": EvidenceMatrix(result_df),
+            "excel": excel_data,
+            "pdf": pdf_data,
+            "profile_dir": profile_dir,
+            "profile": profile_report,
+        }
         st.success("Assessment Complete!")
 
-        st.subheader("✅ ESG Risk Results")
-        st.dataframe(result_df)
-
-        excel_data = export_to_excel(result_df)
-        pdf_data = export_to_pdf(result_df)
-
-        st.download_button("📥 Download as Excel", data=excel_data, file_name="esg_risk_assessment.xlsx")
-        st.download_button("📄 Download PDF Report", data=pdf_data, file_name="esg_risk_assessment.pdf")
+if "assessment" in st.session_state:
+    assessment = st.session_state.assessment
+    result_df, cube = assessment["result"], assessment["cube"]
+    if "Resolved Entity" in result_df.columns:
+        st.caption(f"{result_df['Resolved Entity'].nunique()} distinct suppliers enriched for {len(result_df)} rows")
+
+    st.subheader("✅ ESG Risk Results")
+    # Only the current page is sent to the browser; sorting and filtering use the prebuilt indexes
+    browser = assessment["browser"]
+    col1, col2, col3, col4 = st.columns(4)
+    sort_by = col1.selectbox("Sort by", browser.sort_columns(), key="results_sort")
+    descending = col1.checkbox("Descending", value=True, key="results_desc")
+    rag_filter = col2.multiselect("RAG Rating", browser.filter_values("RAG Rating"), key="results_rag")
+    category_filter = col2.multiselect("Category", browser.filter_values("Category"), key="results_category")
+    ranges = {}
+    for column, col in (("ESG Score", col3), ("Spend", col4)):
+        low, high = browser.value_range(column)
+        if low < high:
+            ranges[column] = col.slider(column, low, high, (low, high), key=f"results_range_{column}")
+    filters = {"RAG Rating": rag_filter, "Category": category_filter}
+    matching = len(browser.view(sort_by, descending, filters, ranges))
+    page_size = col3.selectbox("Rows per page", PAGE_SIZES, index=1, key="results_page_size")
+    page_count = max(1, -(-matching // page_size))
+    page = col4.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, key="results_page")
+    page_df, matching = browser.page(sort_by, descending, filters, ranges, page - 1, page_size)
+    st.caption(f"{matching} of {len(result_df)} rows match")
+    st.dataframe(page_df, use_container_width=True)
+
+    st.subheader("📊 Portfolio Overview")
+    totals = cube["totals"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Suppliers", totals["Suppliers"])
+    col2.metric("Spend (£)", f"{totals['Spend']:,.0f}")
+    col3.metric("Emissions (kg CO2e)", f"{totals['Emissions (kg CO2e)']:,.0f}")
+    col4.metric("Spend Rated Red", f"{totals['Red Spend Share']:.1%}")
+    if cube.get("emissions_bands") is not None:
+        st.caption("Portfolio emissions range (Monte Carlo)")
+        st.dataframe(cube["emissions_bands"])
+    by_category, by_region, by_rag, top_emitters = st.tabs(["By Category", "By Region", "By RAG", "Top Emitters"])
+    with by_category:
+        st.bar_chart(cube["by_category"].set_index("Category")["Emissions (kg CO2e)"])
+        st.dataframe(cube["by_category"])
+    with by_region:
+        st.dataframe(cube["by_region"])
+    with by_rag:
+        st.bar_chart(cube["by_rag"].set_index("RAG Rating")["Spend Share"])
+        st.dataframe(cube["by_rag"])
+    with top_emitters:
+        st.dataframe(cube["top_emitters"])
+
+    with st.expander("⚖️ What-if Scoring"):
+        # Re-scores the whole portfolio from the evidence already collected; no requests are made
+        mismatched = assessment["evidence"].mismatches(result_df)
+        if len(mismatched):
+            st.warning(f"{len(mismatched)} rows do not reproduce their stored rating with the default settings; "
+                       "what-if results for them may be off")
+        st.caption("Score change per finding (positive is riskier) and the RAG cut-offs")
+        weight_columns = st.columns(len(SCORING_WEIGHTS))
+        weights = {
+            key: col.slider(EVIDENCE_LABELS[key], -3, 3, default, key=f"what_if_{key}")
+            for col, (key, default) in zip(weight_columns, SCORING_WEIGHTS.items())
+        }
+        col1, col2, col3 = st.columns(3)
+        negative_sentiment = col1.slider("Negative news below polarity", -1.0, 0.0, NEGATIVE_SENTIMENT, 0.05,
+                                         key="what_if_sentiment")
+        green_max = col2.slider("Green up to score", -5, 5, RAG_THRESHOLDS[0], key="what_if_green")
+        amber_max = col3.slider("Amber up to score", green_max, 6, max(RAG_THRESHOLDS[1], green_max), key="what_if_amber")
+        rescored = assessment["evidence"].rescore(result_df, weights, negative_sentiment, (green_max, amber_max))
+        what_if_totals = build_cube(rescored)["totals"]
+        col1, col2 = st.columns(2)
+        col1.metric("Spend Rated Red", f"{what_if_totals['Red Spend Share']:.1%}",
+                    f"{what_if_totals['Red Spend Share'] - totals['Red Spend Share']:+.1%}", delta_color="inverse")
+        col2.metric("Spend-Weighted ESG Score", what_if_totals["Spend-Weighted ESG Score"],
+                    round(what_if_totals["Spend-Weighted ESG Score"] - totals["Spend-Weighted ESG Score"], 3),
+                    delta_color="inverse")
+        st.dataframe(rating_changes(result_df, rescored))
+        changed = rescored[rescored["RAG Rating"].astype(object).to_numpy() != result_df["RAG Rating"].astype(object).to_numpy()]
+        st.caption(f"{len(changed)} rows change rating")
+        st.dataframe(changed.head(PAGE_SIZES[1]), use_container_width=True)
+
+    st.download_button("📥 Download as Excel", data=assessment["excel"], file_name="esg_risk_assessment.xlsx")
+    st.download_button("📄 Download PDF Report", data=assessment["pdf"], file_name="esg_risk_assessment.pdf")
+
+    profile_report = assessment["profile"]
+    if profile_report.get("files"):
+        st.info(f"Profile saved to {assessment['profile_dir']} (peak traced memory {profile_report['peak_bytes'] / 1024 / 1024:.1f} MiB)")
+        for path in profile_report["files"]:
+            with open(path, "rb") as f:
+                st.download_button(f"Download {os.path.basename(path)}", f.read(), file_name=os.path.basename(path))
+
+with st.expander("⏱️ Performance"):
+    stage_rows = metrics.stage_summary()
+    if stage_rows:
+        st.markdown("**Stage latency**")
+        st.dataframe(pd.DataFrame(stage_rows))
+        cache_rows = metrics.cache_summary()
+        if cache_rows:
+            st.markdown("**Caches**")
+            st.dataframe(pd.DataFrame(cache_rows))
+        col1, col2 = st.columns(2)
+        col1.download_button("Metrics (Prometheus)", metrics.to_prometheus(), file_name="esg_metrics.prom")
+        col2.download_button("Metrics (JSON)", metrics.to_json(), file_name="esg_metrics.json")
+    else:
+        st.caption("Run an assessment to see timings.")
+
+with st.expander("🗄️ Evidence Archive"):
+    archive = evidence_store.store_stats()
+    if archive["requests"]:
+        st.caption(
+            f"{archive['requests']} recorded requests, {archive['blobs']} distinct bodies, "
+            f"{archive['raw_bytes'] / 1024 / 1024:.1f} MiB stored in {archive['stored_bytes'] / 1024 / 1024:.1f} MiB"
+        )
+        st.dataframe(pd.DataFrame(evidence_store.records(limit=200)))
+    else:
+        st.caption("Nothing recorded yet. Choose 'record' before running an assessment.")
+
+with st.expander("📡 Data Source Queues"):
+    queue_stats = scheduler_stats()
+    if queue_stats:
+        st.dataframe(pd.DataFrame(queue_stats))
+    else:
+        st.caption("No outbound requests yet.")
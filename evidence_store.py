@@ -0,0 +1,155 @@
+# Record/replay archive for outbound HTTP evidence (search pages, registry lookups, downloads)
+#
+#   with evidence_mode("record"): ...  every response fetched through scheduled_get is archived
+#   with evidence_mode("replay"): ...  the same requests are answered from the archive; nothing
+#                                      touches the network and a request that was never recorded
+#                                      raises EvidenceNotRecorded
+#
+# The mode is a context variable (default: EVIDENCE_MODE or "off"), so one Streamlit session
+# replaying does not affect another, and it follows work handed to the engine's thread pools.
+#
+# Bodies are zlib-compressed and stored once per content hash, so identical pages fetched for
+# different requests cost one blob. The request index keeps URL, status and fetch time, which
+# doubles as an audit trail of the evidence behind a rating (see records()).
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import metrics
+
+STORE_PATH = os.getenv("EVIDENCE_STORE_PATH", ".cache/evidence.sqlite")
+MODES = ("off", "record", "replay")
+# Response headers worth keeping for replay; the rest (cookies, dates, tracing) are dropped
+KEPT_HEADERS = ("Content-Type", "Content-Encoding", "Content-Language")
+
+_mode = contextvars.ContextVar("evidence_mode", default=os.getenv("EVIDENCE_MODE", "off"))
+_lock = threading.Lock()
+
+
+class EvidenceNotRecorded(LookupError):
+    pass
+
+
+@contextmanager
+def evidence_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"Unknown evidence mode '{mode}', expected one of {', '.join(MODES)}")
+    token = _mode.set(mode)
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+def get_mode():
+    return _mode.get()
+
+
+def request_key(url, params=None):
+    raw = json.dumps({"method": "GET", "url": url, "params": sorted((params or {}).items())}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _connect(path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, body BLOB, size INTEGER)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS requests ("
+        "key TEXT PRIMARY KEY, source TEXT, url TEXT, status INTEGER, headers TEXT, "
+        "encoding TEXT, hash TEXT, fetched REAL)"
+    )
+    return conn
+
+
+def record(source, url, params, response, path=STORE_PATH):
+    content = response.content or b""
+    content_hash = hashlib.sha256(content).hexdigest()
+    headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+    with _lock:
+        conn = _connect(path)
+        try:
+            conn.execute("INSERT OR IGNORE INTO blobs (hash, body, size) VALUES (?, ?, ?)",
+                         (content_hash, zlib.compress(content, 6), len(content)))
+            conn.execute(
+                "INSERT OR REPLACE INTO requests (key, source, url, status, headers, encoding, hash, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_key(url, params), source, url, response.status_code, json.dumps(headers),
+                 response.encoding, content_hash, time.time()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def replay(url, params=None, path=STORE_PATH):
+    with _lock:
+        conn = _connect(path)
+        try:
+            row = conn.execute(
+                "SELECT r.status, r.headers, r.encoding, b.body FROM requests r JOIN blobs b ON b.hash = r.hash "
+                "WHERE r.key = ?",
+                (request_key(url, params),),
+            ).fetchone()
+        finally:
+            conn.close()
+    metrics.record_cache("evidence", row is not None)
+    if row is None:
+        raise EvidenceNotRecorded(f"No recorded response for {url}")
+    status, headers, encoding, body = row
+    response = requests.models.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(json.loads(headers))
+    response.encoding = encoding
+    response.url = url
+    response._content = zlib.decompress(body)
+    return response
+
+
+def records(source=None, limit=None, path=STORE_PATH):
+    # Archived requests, newest first: what was fetched, when, and which body it returned
+    with _lock:
+        conn = _connect(path)
+        try:
+            query = ("SELECT r.source, r.url, r.status, r.hash, b.size, r.fetched FROM requests r "
+                     "JOIN blobs b ON b.hash = r.hash")
+            args = ()
+            if source is not None:
+                query += " WHERE r.source = ?"
+                args = (source,)
+            query += " ORDER BY r.fetched DESC"
+            if limit is not None:
+                query += f" LIMIT {int(limit)}"
+            rows = conn.execute(query, args).fetchall()
+        finally:
+            conn.close()
+    return [
+        {"Source": source, "URL": url, "Status": status, "Content Hash": content_hash,
+         "Bytes": size, "Fetched": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(fetched))}
+        for source, url, status, content_hash, size, fetched in rows
+    ]
+
+
+def store_stats(path=STORE_PATH):
+    with _lock:
+        conn = _connect(path)
+        try:
+            requests_count = conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0]
+            blobs, raw_bytes, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM blobs"
+            ).fetchone()
+        finally:
+            conn.close()
+    return {"requests": requests_count, "blobs": blobs, "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
@@ -0,0 +1,93 @@
+# --- exporters.py ---
+
+import io
+
+import pandas as pd
+from fpdf import FPDF
+
+import metrics
+from portfolio import cube_to_frames
+
+
+def export_to_excel(df, cube=None):
+    with metrics.timed("excel_export"):
+        return _export_to_excel(df, cube)
+
+
+def _export_to_excel(df, cube=None):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name='ESG Results')
+        if cube is not None:
+            for sheet_name, frame in cube_to_frames(cube).items():
+                frame.to_excel(writer, index=False, sheet_name=sheet_name)
+    return output.getvalue()
+
+
+def export_to_pdf(df, cube=None):
+    with metrics.timed("pdf_export"):
+        return _export_to_pdf(df, cube)
+
+
+def _pdf_text(value):
+    return str(value).encode('latin1', 'replace').decode('latin1')
+
+
+def _write_summary(pdf, cube):
+    totals = cube["totals"]
+    pdf.set_font("Arial", 'B', size=11)
+    pdf.cell(0, 8, txt="Portfolio Summary", ln=True)
+    pdf.set_font("Arial", size=10)
+    pdf.multi_cell(0, 6, txt=_pdf_text(
+        f"{totals['Suppliers']} suppliers ({totals['Rows']} rows), spend {totals['Spend']:,.2f}, "
+        f"emissions {totals['Emissions (kg CO2e)']:,.2f} kg CO2e ({totals['Emissions per £']} kg per GBP), "
+        f"{totals['Red Spend Share']:.1%} of spend rated Red"
+    ))
+    if cube.get("emissions_bands") is not None:
+        for _, row in cube["emissions_bands"].iterrows():
+            pdf.cell(0, 6, txt=_pdf_text(
+                f"{row['Emissions']}: P5 {row['P5 (kg CO2e)']:,.0f}, P50 {row['P50 (kg CO2e)']:,.0f}, "
+                f"P95 {row['P95 (kg CO2e)']:,.0f} kg CO2e"
+            ), ln=True)
+    pdf.ln(2)
+    for _, row in cube["by_rag"].iterrows():
+        pdf.cell(0, 6, txt=_pdf_text(f"{row['RAG Rating']}: {row['Suppliers']} suppliers, {row['Spend Share']:.1%} of spend"), ln=True)
+    pdf.ln(2)
+    pdf.set_font("Arial", 'B', size=10)
+    pdf.cell(0, 6, txt="By category", ln=True)
+    pdf.set_font("Arial", size=10)
+    for _, row in cube["by_category"].iterrows():
+        pdf.multi_cell(0, 6, txt=_pdf_text(
+            f"{row['Category']}: spend {row['Spend']:,.2f} ({row['Spend Share']:.1%}), "
+            f"{row['Emissions (kg CO2e)']:,.2f} kg CO2e, Red {row['Red Spend Share']:.1%}"
+        ))
+    pdf.ln(2)
+    pdf.set_font("Arial", 'B', size=10)
+    pdf.cell(0, 6, txt="Top emitters", ln=True)
+    pdf.set_font("Arial", size=10)
+    for _, row in cube["top_emitters"].iterrows():
+        # The number tells apart two companies that share a name
+        number = f" ({row['Company Number']})" if isinstance(row.get("Company Number"), str) else ""
+        pdf.multi_cell(0, 6, txt=_pdf_text(
+            f"{row['Supplier']}{number}: {row['Emissions (kg CO2e)']:,.2f} kg CO2e ({row['Share of Emissions']:.1%})"
+        ))
+    pdf.add_page()
+
+
+def _export_to_pdf(df, cube=None):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt="ESG Risk Assessment Report", ln=True, align='C')
+    pdf.ln(10)
+    if cube is not None:
+        _write_summary(pdf, cube)
+    for _, row in df.iterrows():
+        pdf.set_font("Arial", size=10)
+        for col in df.columns:
+            pdf.multi_cell(0, 10, txt=_pdf_text(f"{col}: {row[col]}"))
+        pdf.ln(5)
+    pdf_output = io.BytesIO()
+    pdf_bytes = pdf.output(dest='S').encode('latin1')
+    pdf_output.write(pdf_bytes)
+    return pdf_output.getvalue()
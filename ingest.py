@@ -0,0 +1,242 @@
+# Supplier file ingestion: column-pruned, typed, chunkable, tolerant of malformed rows
+#
+# Only the columns the engine uses are kept, with explicit dtypes instead of object inference.
+# CSV goes through the pyarrow engine when it is installed (the C engine when reading in chunks),
+# XLSX through openpyxl's streaming read-only mode. Bad rows are reported, not fatal:
+#
+#   df, issues = read_suppliers(uploaded_file)
+#   for chunk, issues in iter_supplier_chunks("suppliers.csv", chunksize=50_000): ...
+#
+# issues is a list of {"row": data row number or None, "reason": text}. A data row number counts
+# every line or sheet row after the header, including skipped and blank ones, so it points at the
+# row in the source file: readers index each frame by source position and normalize_chunk reports
+# from that index.
+
+import io
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from esg_pipeline import DEFAULT_EMISSIONS_FACTOR, EMISSIONS_CATEGORIES
+
+REQUIRED_COLUMNS = ["Supplier", "Spend", "Category"]
+OPTIONAL_COLUMNS = ["Company Number", "Emissions Factor", "Region"]
+NUMERIC_COLUMNS = ["Spend", "Emissions Factor"]
+
+try:
+    import pyarrow  # noqa: F401
+    FAST_CSV_ENGINE = "pyarrow"
+except ImportError:
+    FAST_CSV_ENGINE = "c"
+
+_MONEY_CHARS = re.compile(r"[£$€,\s]")
+
+
+def _source_name(source):
+    return source if isinstance(source, str) else getattr(source, "name", "")
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _canonical_columns(header):
+    # Header cell -> canonical column name, matched case- and whitespace-insensitively
+    wanted = {name.lower(): name for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+    mapping = {}
+    for column in header:
+        key = str(column).strip().lower()
+        if key in wanted and wanted[key] not in mapping.values():
+            mapping[column] = wanted[key]
+    return mapping
+
+
+def _check_columns(mapping, name):
+    missing = [column for column in REQUIRED_COLUMNS if column not in mapping.values()]
+    if missing:
+        raise ValueError(f"{name or 'Upload'} is missing required column(s): {', '.join(missing)}")
+
+
+def _warnings_to_issues(caught):
+    issues = []
+    for warning in caught:
+        for line in str(warning.message).strip().splitlines():
+            match = re.search(r"line (\d+)", line)
+            # Parser line numbers count the header; report data row numbers like everything else
+            issues.append({"row": int(match.group(1)) - 1 if match else None, "reason": line.strip()})
+    return issues
+
+
+def _count_data_lines(source):
+    # Physical lines after the header, counted in blocks without parsing
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        lines, last = 0, None
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            lines += block.count(b"\n" if isinstance(block, bytes) else "\n")
+            last = block[-1:]
+    finally:
+        if f is not source:
+            f.close()
+        _rewind(source)
+    if last is None:
+        return 0
+    return lines + (last not in (b"\n", "\n")) - 1
+
+
+def _source_positions(count, first, skipped):
+    # Source positions (0-based data rows) of `count` parsed rows starting at parsed row `first`,
+    # given the sorted positions of lines the parser dropped. Each dropped line shifts every
+    # later row down by one.
+    parsed = np.arange(first, first + count)
+    shifts = np.asarray(skipped, dtype=np.int64) - np.arange(len(skipped))
+    return parsed + np.searchsorted(shifts, parsed, side="right")
+
+
+def normalize_chunk(df):
+    # Typed, validated frame; returns (df, issues). Rows without a supplier are dropped,
+    # unparseable spend is reported and treated as 0.
+    issues = []
+    df = df.copy()
+    for column in OPTIONAL_COLUMNS:
+        if column not in df.columns:
+            df[column] = pd.NA
+
+    df["Supplier"] = df["Supplier"].astype("string").str.strip()
+    missing_supplier = df["Supplier"].fillna("").eq("").to_numpy(dtype=bool)
+    for index in df.index[missing_supplier]:
+        issues.append({"row": int(index) + 1, "reason": "Missing supplier name"})
+
+    for column in NUMERIC_COLUMNS:
+        raw = df[column].astype("string").str.replace(_MONEY_CHARS, "", regex=True)
+        parsed = pd.to_numeric(raw, errors="coerce")
+        bad = (parsed.isna() & raw.fillna("").ne("")).to_numpy(dtype=bool) & ~missing_supplier
+        for index in df.index[bad]:
+            issues.append({"row": int(index) + 1, "reason": f"Unparseable {column}: {df.at[index, column]!r}"})
+        df[column] = parsed.astype("float64")
+
+    df["Spend"] = df["Spend"].fillna(0.0)
+    df["Category"] = df["Category"].astype("string").str.strip().fillna("Unknown")
+    df["Emissions Factor"] = df["Emissions Factor"].fillna(
+        df["Category"].map(EMISSIONS_CATEGORIES).astype("float64")
+    ).fillna(DEFAULT_EMISSIONS_FACTOR)
+    df["Company Number"] = df["Company Number"].astype("string").str.strip().str.upper()
+    df["Region"] = df["Region"].astype("string").str.strip()
+
+    df = df.loc[~missing_supplier, REQUIRED_COLUMNS + OPTIONAL_COLUMNS]
+    df["Supplier"] = df["Supplier"].astype(object)
+    df["Category"] = df["Category"].astype("category")
+    return df, issues
+
+
+def _iter_csv(source, chunksize):
+    header = pd.read_csv(source, nrows=0).columns
+    _rewind(source)
+    mapping = _canonical_columns(header)
+    _check_columns(mapping, _source_name(source))
+
+    if chunksize is None and FAST_CSV_ENGINE == "pyarrow":
+        # pyarrow drops bad and blank lines without saying where they were, so its frame is only
+        # used when every line after the header became a row; otherwise the C engine re-reads it
+        data_lines = _count_data_lines(source)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            df = pd.read_csv(source, usecols=list(mapping), dtype="string", engine="pyarrow", on_bad_lines="warn")
+        if not caught and len(df) == data_lines:
+            yield df.rename(columns=mapping), []
+            return
+        _rewind(source)
+
+    # The C engine only flags over-long lines when it parses every column, so prune after parsing;
+    # chunking keeps that bounded. Blank lines are read as empty rows, so only the over-long lines
+    # it reports are missing from its row count; fully empty rows are dropped once positioned.
+    reader = pd.read_csv(source, dtype="string", engine="c", on_bad_lines="warn", chunksize=chunksize or 100_000,
+                         skip_blank_lines=False)
+    parsed, skipped = 0, []
+    while True:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                break
+        issues = _warnings_to_issues(caught)
+        skipped = sorted(skipped + [issue["row"] - 1 for issue in issues if issue["row"] is not None])
+        chunk = chunk[list(mapping)].rename(columns=mapping)
+        chunk.index = _source_positions(len(chunk), parsed, skipped)
+        parsed += len(chunk)
+        yield chunk[chunk.notna().any(axis=1)], issues
+
+
+def _iter_xlsx(source, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError(f"{_source_name(source) or 'Upload'} is empty")
+        mapping = _canonical_columns([column for column in header if column is not None])
+        _check_columns(mapping, _source_name(source))
+        positions = [(i, mapping[column]) for i, column in enumerate(header) if column in mapping]
+
+        yielded = False
+        buffer, index = [], []
+        # Blank rows are skipped but still counted, so the index is the row's place in the sheet
+        for position, values in enumerate(rows):
+            if values is None or all(value is None for value in values):
+                continue
+            buffer.append([values[i] if i < len(values) else None for i, _ in positions])
+            index.append(position)
+            if chunksize and len(buffer) >= chunksize:
+                yield _frame(buffer, positions, index), []
+                yielded = True
+                buffer, index = [], []
+        if buffer or not yielded:
+            yield _frame(buffer, positions, index), []
+    finally:
+        workbook.close()
+
+
+def _frame(buffer, positions, index):
+    return pd.DataFrame(buffer, columns=[name for _, name in positions], index=pd.Index(index, dtype="int64"),
+                        dtype=object)
+
+
+def iter_supplier_chunks(source, chunksize=None):
+    # source: path or file-like (e.g. a Streamlit upload). Yields (df, issues) per chunk.
+    name = _source_name(source).lower()
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    reader = _iter_xlsx if name.endswith((".xlsx", ".xlsm")) else _iter_csv
+    for raw, issues in reader(source, chunksize):
+        df, value_issues = normalize_chunk(raw)
+        yield df, issues + value_issues
+
+
+def read_suppliers(source):
+    frames, issues = [], []
+    for df, chunk_issues in iter_supplier_chunks(source):
+        frames.append(df)
+        issues.extend(chunk_issues)
+    if len(frames) > 1:
+        df = pd.concat(frames)
+        df["Category"] = df["Category"].astype("category")
+    else:
+        df = frames[0]
+    return df, issues
+
+
+def format_issues(issues, limit=20):
+    lines = [f"Row {issue['row']}: {issue['reason']}" if issue["row"] is not None else issue["reason"]
+             for issue in issues[:limit]]
+    if len(issues) > limit:
+        lines.append(f"... and {len(issues) - limit} more")
+    return "\n".join(lines)
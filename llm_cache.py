@@ -0,0 +1,144 @@
+# LLM response cache (disk-backed, keyed by model + normalized prompt + temperature)
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import metrics
+
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+# Process-wide counters, survive Streamlit reruns because the module stays imported
+cache_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+_lock = threading.Lock()
+
+
+def normalize_prompt(messages):
+    # Whitespace/indentation differences must not produce a different key
+    parts = []
+    for message in messages:
+        lines = [re.sub(r"\s+", " ", line).strip() for line in str(message.get("content", "")).splitlines()]
+        parts.append(f"{message.get('role', 'user')}:" + "\n".join(line for line in lines if line))
+    return "\n\n".join(parts)
+
+
+def cache_key(model, messages, temperature):
+    prompt_hash = hashlib.sha256(normalize_prompt(messages).encode("utf-8")).hexdigest()
+    raw = json.dumps({"model": model, "prompt": prompt_hash, "temperature": round(float(temperature), 3)}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _connect(path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses ("
+        "key TEXT PRIMARY KEY, model TEXT, response TEXT, "
+        "created REAL, accessed REAL, size INTEGER)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+    return conn
+
+
+def get_cached(key, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS):
+    now = time.time()
+    with _lock:
+        conn = _connect(path)
+        try:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                cache_stats["misses"] += 1
+                metrics.record_cache("llm", False)
+                return None
+            response, created = row
+            if ttl is not None and now - created > ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                cache_stats["expired"] += 1
+                cache_stats["misses"] += 1
+                metrics.record_cache("llm", False)
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            cache_stats["hits"] += 1
+            metrics.record_cache("llm", True)
+            return response
+        finally:
+            conn.close()
+
+
+def put_cached(key, model, response, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    with _lock:
+        conn = _connect(path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now, size),
+            )
+            _evict(conn, max_bytes)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def _evict(conn, max_bytes):
+    # Least-recently-used entries go first once the store exceeds its size budget
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total <= max_bytes:
+        return
+    for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        cache_stats["evictions"] += 1
+        total -= size
+        if total <= max_bytes:
+            break
+
+
+def cached_completion(create_fn, model, messages, temperature, path=CACHE_PATH):
+    # create_fn(model=..., messages=..., temperature=...) must return the response text.
+    # Failures are not cached, so a transient API error is retried next time.
+    key = cache_key(model, messages, temperature)
+    cached = get_cached(key, path=path)
+    if cached is not None:
+        return cached
+    response = create_fn(model=model, messages=messages, temperature=temperature)
+    put_cached(key, model, response, path=path)
+    return response
+
+
+def cached_stream(stream_fn, model, messages, temperature, path=CACHE_PATH):
+    # stream_fn(model=..., messages=..., temperature=...) must yield text deltas.
+    # A hit replays the stored text as a single chunk; a miss is stored only once fully consumed.
+    key = cache_key(model, messages, temperature)
+    cached = get_cached(key, path=path)
+    if cached is not None:
+        yield cached
+        return
+    chunks = []
+    for delta in stream_fn(model=model, messages=messages, temperature=temperature):
+        chunks.append(delta)
+        yield delta
+    put_cached(key, model, "".join(chunks), path=path)
+
+
+def clear_cache(path=CACHE_PATH):
+    with _lock:
+        conn = _connect(path)
+        try:
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+        finally:
+            conn.close()
+    for name in cache_stats:
+        cache_stats[name] = 0
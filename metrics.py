@@ -0,0 +1,191 @@
+# Hot-path instrumentation: stage latency histograms, request/error counters, cache hit rates
+#
+#   with timed("sentiment"):
+#       ...
+#
+# Exported as Prometheus text (to_prometheus) or JSON (to_json). Process-pool workers keep their
+# own registry; the engine ships it back with each batch and merges it with merge_state().
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, Prometheus-style cumulative buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_lock = threading.Lock()
+_histograms = {}
+_requests = {}
+_errors = {}
+_cache = {}
+
+
+def _new_histogram():
+    return {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+
+
+def observe(stage, seconds):
+    with _lock:
+        histogram = _histograms.setdefault(stage, _new_histogram())
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+                break
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        count_error(stage)
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def count_request(source):
+    with _lock:
+        _requests[source] = _requests.get(source, 0) + 1
+
+
+def count_error(stage):
+    with _lock:
+        _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def record_cache(name, hit):
+    with _lock:
+        counts = _cache.setdefault(name, {"hit": 0, "miss": 0})
+        counts["hit" if hit else "miss"] += 1
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _requests.clear()
+        _errors.clear()
+        _cache.clear()
+
+
+def export_state(reset_after=False):
+    with _lock:
+        state = {
+            "histograms": {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]} for k, v in _histograms.items()},
+            "requests": dict(_requests),
+            "errors": dict(_errors),
+            "cache": {k: dict(v) for k, v in _cache.items()},
+        }
+        if reset_after:
+            _histograms.clear()
+            _requests.clear()
+            _errors.clear()
+            _cache.clear()
+    return state
+
+
+def merge_state(state):
+    with _lock:
+        for stage, other in state["histograms"].items():
+            histogram = _histograms.setdefault(stage, _new_histogram())
+            histogram["buckets"] = [a + b for a, b in zip(histogram["buckets"], other["buckets"])]
+            histogram["sum"] += other["sum"]
+            histogram["count"] += other["count"]
+        for name, value in state["requests"].items():
+            _requests[name] = _requests.get(name, 0) + value
+        for name, value in state["errors"].items():
+            _errors[name] = _errors.get(name, 0) + value
+        for name, counts in state["cache"].items():
+            mine = _cache.setdefault(name, {"hit": 0, "miss": 0})
+            mine["hit"] += counts["hit"]
+            mine["miss"] += counts["miss"]
+
+
+def _quantile(histogram, q):
+    # Upper bound of the bucket holding the q-th observation (the last finite bound for +Inf)
+    if not histogram["count"]:
+        return 0.0
+    target = q * histogram["count"]
+    running = 0
+    for bound, count in zip(BUCKETS, histogram["buckets"]):
+        running += count
+        if running >= target:
+            return bound if bound != float("inf") else BUCKETS[-2]
+    return BUCKETS[-2]
+
+
+def stage_summary():
+    state = export_state()
+    rows = []
+    for stage, histogram in sorted(state["histograms"].items()):
+        rows.append({
+            "Stage": stage,
+            "Count": histogram["count"],
+            "Total (s)": round(histogram["sum"], 3),
+            "Mean (ms)": round(1000 * histogram["sum"] / histogram["count"], 1) if histogram["count"] else 0.0,
+            "p50 ≤ (ms)": round(1000 * _quantile(histogram, 0.5), 1),
+            "p95 ≤ (ms)": round(1000 * _quantile(histogram, 0.95), 1),
+            "Errors": state["errors"].get(stage, 0),
+        })
+    return rows
+
+
+def cache_summary():
+    rows = []
+    for name, counts in sorted(export_state()["cache"].items()):
+        total = counts["hit"] + counts["miss"]
+        rows.append({
+            "Cache": name,
+            "Hits": counts["hit"],
+            "Misses": counts["miss"],
+            "Hit Rate": round(counts["hit"] / total, 3) if total else 0.0,
+        })
+    return rows
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(prefix="esg"):
+    state = export_state()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Latency of instrumented assessment stages.",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for stage, histogram in sorted(state["histograms"].items()):
+        running = 0
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            running += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{_label(stage)}",le="{le}"}} {running}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{_label(stage)}"}} {histogram["sum"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{_label(stage)}"}} {histogram["count"]}')
+
+    lines += [f"# HELP {prefix}_requests_total Outbound requests by data source.", f"# TYPE {prefix}_requests_total counter"]
+    for source, value in sorted(state["requests"].items()):
+        lines.append(f'{prefix}_requests_total{{source="{_label(source)}"}} {value}')
+
+    lines += [f"# HELP {prefix}_errors_total Errors by stage.", f"# TYPE {prefix}_errors_total counter"]
+    for stage, value in sorted(state["errors"].items()):
+        lines.append(f'{prefix}_errors_total{{stage="{_label(stage)}"}} {value}')
+
+    lines += [f"# HELP {prefix}_cache_lookups_total Cache lookups by cache and result.", f"# TYPE {prefix}_cache_lookups_total counter"]
+    for name, counts in sorted(state["cache"].items()):
+        for result in ("hit", "miss"):
+            lines.append(f'{prefix}_cache_lookups_total{{cache="{_label(name)}",result="{result}"}} {counts[result]}')
+    return "\n".join(lines) + "\n"
+
+
+def to_json():
+    state = export_state()
+    return json.dumps({
+        "stages": stage_summary(),
+        "requests": state["requests"],
+        "errors": state["errors"],
+        "caches": cache_summary(),
+    }, indent=2)
@@ -0,0 +1,158 @@
+# Local index of the UK Modern Slavery Statement Registry
+#
+# Replaces the Google "Modern Slavery Statement" search: the registry's CSV exports are ingested
+# in bulk into one parquet file, then loaded into two dicts (company number, normalised name) so
+# each supplier check is a constant-time lookup:
+#
+#   python modern_slavery.py statements_2023.csv statements_2024.csv   # refresh the index
+#   index = get_statement_index()
+#   index.lookup("01234567", "Acme Ltd")  -> {"latest_year": 2024, "years": "2022,2023,2024", ...} or None
+#
+# Export headers differ between years, so columns are matched through COLUMN_ALIASES.
+
+import os
+import re
+import sys
+
+import pandas as pd
+
+from entity_resolution import normalize_company_number, normalize_name
+
+LOOKUP_DIR = "lookups"
+INDEX_FILE = "modern_slavery_index.parquet"
+
+# field -> accepted export headers, compared lower-cased with spaces and punctuation removed
+COLUMN_ALIASES = {
+    "organisation": ["organisationname", "organisation", "companyname", "name"],
+    "company_number": ["companynumber", "companieshousenumber", "registrationnumber"],
+    "year": ["statementyear", "year", "reportingyear"],
+    "period_start": ["statementstartdate", "periodstart", "startdate"],
+    "period_end": ["statementenddate", "periodend", "enddate"],
+    "group": ["groupsubmission", "isgroupsubmission", "groupstatement"],
+    "statement_url": ["statementurl", "url", "link"],
+}
+INDEX_COLUMNS = ["company_number", "name_key", "organisation", "latest_year", "years", "period_start",
+                 "period_end", "group_statement", "statement_url"]
+
+_index = None
+_index_mtime = None
+
+
+def _header_key(header):
+    return re.sub(r"[^a-z0-9]", "", str(header).lower())
+
+
+def read_registry_export(source):
+    # One registry CSV export -> frame with the COLUMN_ALIASES fields that it has
+    header = pd.read_csv(source, nrows=0, encoding_errors="replace").columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for column in header:
+            if _header_key(column) in aliases and field not in mapping.values():
+                mapping[column] = field
+    if "organisation" not in mapping.values():
+        raise ValueError(f"{getattr(source, 'name', source)} has no organisation name column")
+    df = pd.read_csv(source, usecols=list(mapping), dtype="string", encoding_errors="replace").rename(columns=mapping)
+    for field in COLUMN_ALIASES:
+        if field not in df.columns:
+            df[field] = pd.Series(pd.NA, index=df.index, dtype="string")
+    return df
+
+
+def build_index(frames):
+    # Latest statement per organisation, with every year it has published
+    df = pd.concat(frames, ignore_index=True)
+    df["company_number"] = df["company_number"].map(normalize_company_number)
+    df["name_key"] = df["organisation"].map(normalize_name)
+    df = df[df["name_key"] != ""]
+    df["year"] = pd.to_numeric(df["year"], errors="coerce")
+    if df["year"].isna().any():
+        # Older exports have no year column; fall back to the year the statement period ends
+        df["year"] = df["year"].fillna(pd.to_datetime(df["period_end"], errors="coerce", dayfirst=True).dt.year)
+    df["year"] = df["year"].fillna(0).astype("int32")
+    df["group_statement"] = df["group"].fillna("").str.strip().str.lower().isin(["true", "yes", "y", "1"])
+
+    # Organisations are identified by number where they have one, by name otherwise
+    df["entity"] = df["company_number"].where(df["company_number"] != "", "name:" + df["name_key"])
+    years = (df[df["year"] > 0].groupby("entity")["year"]
+             .agg(lambda values: ",".join(str(year) for year in sorted(set(values)))))
+    latest = df.sort_values("year", kind="stable").drop_duplicates("entity", keep="last").set_index("entity")
+    latest["years"] = years.reindex(latest.index).fillna("")
+    latest = latest.rename(columns={"year": "latest_year"}).reset_index(drop=True)
+    return latest[INDEX_COLUMNS]
+
+
+def refresh_index(sources, lookup_dir=LOOKUP_DIR):
+    global _index
+    index_df = build_index([read_registry_export(source) for source in sources])
+    os.makedirs(lookup_dir, exist_ok=True)
+    path = os.path.join(lookup_dir, INDEX_FILE)
+    index_df.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    _index = None
+    return index_df
+
+
+class StatementIndex:
+    def __init__(self, index_df):
+        records = index_df.to_dict(orient="records")
+        # build_index keeps one row per organisation
+        self.count = len(records)
+        self.by_number = {record["company_number"]: record for record in records if record["company_number"]}
+        self.by_name = {}
+        for record in records:
+            # Keep the most recent statement when several organisations normalise to the same name
+            current = self.by_name.get(record["name_key"])
+            if current is None or record["latest_year"] > current["latest_year"]:
+                self.by_name[record["name_key"]] = record
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, company_number=None, *names):
+        # A name match never credits a numbered supplier with another registered company's statement
+        number = normalize_company_number(company_number)
+        if number and number in self.by_number:
+            return self.by_number[number]
+        for name in names:
+            record = self.by_name.get(normalize_name(name))
+            if record is not None and not (number and record["company_number"]):
+                return record
+        return None
+
+
+def load_index(lookup_dir=LOOKUP_DIR):
+    path = os.path.join(lookup_dir, INDEX_FILE)
+    try:
+        return StatementIndex(pd.read_parquet(path))
+    except Exception as e:
+        print(f"Modern slavery registry index not loaded ({path}): {e}")
+        return StatementIndex(pd.DataFrame(columns=INDEX_COLUMNS))
+
+
+def get_statement_index(lookup_dir=LOOKUP_DIR):
+    # Reloaded whenever the index is rebuilt, from the app or by a scheduled `python modern_slavery.py`
+    global _index, _index_mtime
+    path = os.path.join(lookup_dir, INDEX_FILE)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if _index is None or mtime != _index_mtime:
+        _index = load_index(lookup_dir)
+        _index_mtime = mtime
+    return _index
+
+
+def describe_coverage(record):
+    if record is None:
+        return "No statement on registry"
+    scope = "Group statement" if record["group_statement"] else "Single organisation"
+    years = record["years"] or "year unknown"
+    return f"{scope}, {years}"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python modern_slavery.py REGISTRY_EXPORT.csv [...]")
+    built = refresh_index(sys.argv[1:])
+    print(f"Indexed {len(built)} organisations into {os.path.join(LOOKUP_DIR, INDEX_FILE)}")
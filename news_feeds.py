@@ -0,0 +1,218 @@
+# Bulk news ingestion and one-pass supplier matching
+#
+# Instead of one Google news query per supplier, headline feeds (RSS/Atom XML or JSON dumps) are
+# ingested into a local headline store, and every supplier name is matched against every headline
+# in a single scan with an Aho-Corasick automaton:
+#
+#   python news_feeds.py feeds/*.xml dumps/*.json          # ingest into the headline store
+#   sentiment = portfolio_sentiment(["Acme Ltd", "Beta Plc"])
+#   sentiment["acme"] -> (polarity, "headline one headline two ...")
+#
+# Names and headlines are compared in normalize_name() form, padded with spaces so patterns only
+# match whole words. Each headline's polarity is scored once, at ingestion.
+
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+from textblob import TextBlob
+
+import metrics
+from entity_resolution import normalize_name
+
+try:
+    import ahocorasick  # pyahocorasick, optional C implementation
+except ImportError:
+    ahocorasick = None
+
+LOOKUP_DIR = "lookups"
+HEADLINE_STORE = "news_headlines.parquet"
+HEADLINE_COLUMNS = ["headline", "link", "published", "feed", "polarity"]
+# Names shorter than this (after normalisation) match too many unrelated headlines
+MIN_PATTERN_LENGTH = 4
+HEADLINES_PER_SUPPLIER = 3
+
+
+# -----------------------------
+# Feed parsing
+# -----------------------------
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_xml_feed(path):
+    # RSS <item> and Atom <entry> elements
+    items = []
+    for element in ET.parse(path).getroot().iter():
+        if _local_name(element.tag) not in ("item", "entry"):
+            continue
+        fields = {_local_name(child.tag): child for child in element}
+        title = fields.get("title")
+        link = fields.get("link")
+        published = fields.get("pubDate", fields.get("published", fields.get("updated")))
+        items.append({
+            "headline": (title.text or "").strip() if title is not None else "",
+            "link": (link.text or link.get("href", "")).strip() if link is not None else "",
+            "published": (published.text or "").strip() if published is not None else "",
+        })
+    return items
+
+
+def parse_json_feed(path):
+    # A list of articles, or an object holding one under "articles" / "items" (news API dumps)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("articles", data.get("items", []))
+    return [
+        {
+            "headline": str(article.get("title") or article.get("headline") or "").strip(),
+            "link": str(article.get("url") or article.get("link") or "").strip(),
+            "published": str(article.get("publishedAt") or article.get("published") or article.get("date") or ""),
+        }
+        for article in data
+        if isinstance(article, dict)
+    ]
+
+
+def read_feed(path):
+    items = parse_json_feed(path) if path.lower().endswith(".json") else parse_xml_feed(path)
+    df = pd.DataFrame(items, columns=["headline", "link", "published"])
+    df["feed"] = os.path.basename(path)
+    return df[df["headline"] != ""]
+
+
+def ingest_feeds(paths, lookup_dir=LOOKUP_DIR):
+    # Adds new headlines to the store, scoring each new one once; returns the number added
+    store_path = os.path.join(lookup_dir, HEADLINE_STORE)
+    existing = load_headlines(lookup_dir)
+    incoming = pd.concat([read_feed(path) for path in paths], ignore_index=True)
+    incoming = incoming.drop_duplicates(["headline", "link"])
+    known = set(zip(existing["headline"], existing["link"]))
+    fresh = incoming[[(h, l) not in known for h, l in zip(incoming["headline"], incoming["link"])]].copy()
+    with metrics.timed("news_scoring"):
+        fresh["polarity"] = [TextBlob(headline).sentiment.polarity for headline in fresh["headline"]]
+    combined = pd.concat([existing, fresh[HEADLINE_COLUMNS]], ignore_index=True) if len(existing) else fresh[HEADLINE_COLUMNS]
+    os.makedirs(lookup_dir, exist_ok=True)
+    combined.to_parquet(store_path + ".tmp", index=False)
+    os.replace(store_path + ".tmp", store_path)
+    return len(fresh)
+
+
+def load_headlines(lookup_dir=LOOKUP_DIR):
+    path = os.path.join(lookup_dir, HEADLINE_STORE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=HEADLINE_COLUMNS)
+    return pd.read_parquet(path)
+
+
+def has_headlines(lookup_dir=LOOKUP_DIR):
+    return os.path.exists(os.path.join(lookup_dir, HEADLINE_STORE))
+
+
+# -----------------------------
+# Multi-pattern matching
+# -----------------------------
+
+class NameMatcher:
+    # Aho-Corasick automaton over normalised supplier names: one pass over a text reports every
+    # name it contains. Uses pyahocorasick when installed, otherwise a pure-Python automaton.
+
+    def __init__(self, names):
+        self.patterns = sorted({key for key in map(normalize_name, names) if len(key) >= MIN_PATTERN_LENGTH})
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for key in self.patterns:
+                self._automaton.add_word(f" {key} ", key)
+            if self.patterns:
+                self._automaton.make_automaton()
+            return
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for key in self.patterns:
+            self._add(f" {key} ", key)
+        self._build()
+
+    def _add(self, word, key):
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(key)
+
+    def _build(self):
+        # Breadth-first failure links; each state's output includes its failure state's output
+        # (the root's children keep failure link 0)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text):
+        # Distinct normalised names occurring in text
+        padded = f" {normalize_name(text)} "
+        if not self.patterns:
+            return set()
+        if ahocorasick is not None:
+            return {key for _, key in self._automaton.iter(padded)}
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in padded:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+def match_headlines(names, headlines):
+    # One scan of all headlines for all names -> frame of (name_key, headline row) matches
+    matcher = NameMatcher(names)
+    rows = []
+    with metrics.timed("news_match"):
+        for position, headline in enumerate(headlines["headline"]):
+            for key in matcher.find(headline):
+                rows.append((key, position))
+    matches = pd.DataFrame(rows, columns=["name_key", "position"])
+    return matches.join(headlines.reset_index(drop=True), on="position").drop(columns="position")
+
+
+def portfolio_sentiment(names, headlines=None, per_supplier=HEADLINES_PER_SUPPLIER):
+    # name_key -> (polarity, summary) for every name with matching headlines, newest first.
+    # Polarity is the mean of the stored per-headline scores.
+    headlines = load_headlines() if headlines is None else headlines
+    matches = match_headlines(names, headlines)
+    if matches.empty:
+        return {}
+    matches["published_at"] = pd.to_datetime(matches["published"], errors="coerce", utc=True, format="mixed")
+    matches = matches.sort_values("published_at", ascending=False, na_position="last", kind="stable")
+    top = matches.groupby("name_key", sort=False).head(per_supplier)
+    sentiment = {}
+    for key, group in top.groupby("name_key", sort=False):
+        sentiment[key] = (float(group["polarity"].mean()), " ".join(group["headline"]))
+    return sentiment
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python news_feeds.py FEED.xml|DUMP.json [...]")
+    added = ingest_feeds(sys.argv[1:])
+    print(f"Added {added} headlines to {os.path.join(LOOKUP_DIR, HEADLINE_STORE)}")
@@ -0,0 +1,142 @@
+# Portfolio roll-ups over an assessment result
+#
+# build_cube() runs every grouped aggregation once, vectorised, and returns plain frames that the
+# dashboard and the PDF summary read directly instead of regrouping the result on each rerun:
+#
+#   cube = build_cube(result_df)
+#   cube["by_category"], cube["by_region"], cube["by_rag"], cube["top_emitters"], cube["totals"]
+#
+# An uncertainty run adds cube["emissions_bands"] (see emissions_uncertainty).
+
+import numpy as np
+import pandas as pd
+
+from entity_resolution import normalize_company_number
+
+RAG_ORDER = ["Green", "Amber", "Red"]
+EMISSIONS_COLUMN = "Scope 1 & 2 Emissions (kg CO2e)"
+TOP_EMITTERS = 10
+
+
+def entity_keys(result_df):
+    # One key per distinct supplier: the company number where there is one, so two companies that
+    # share a name stay apart, and the resolved entity name otherwise
+    names = (result_df["Resolved Entity"] if "Resolved Entity" in result_df.columns
+             else result_df["Supplier"]).astype(object).fillna("")
+    if "Company Number" not in result_df.columns:
+        return names.rename("Entity Key")
+    numbers = result_df["Company Number"].map(normalize_company_number).astype(object)
+    return ("#" + numbers).where(numbers != "", names).rename("Entity Key")
+
+
+def _prepare(result_df):
+    # Only the columns the roll-ups need, with grouping keys filled so no row drops out of a group
+    df = pd.DataFrame({
+        "Supplier": result_df["Supplier"].astype(object),
+        "Entity": (result_df["Resolved Entity"] if "Resolved Entity" in result_df.columns
+                   else result_df["Supplier"]).astype(object),
+        "Entity Key": entity_keys(result_df),
+        "Company Number": (result_df["Company Number"].map(normalize_company_number).astype(object)
+                           if "Company Number" in result_df.columns else ""),
+        "Category": result_df["Category"].astype(object).fillna("Unknown"),
+        "Region": (result_df["Region"].astype(object).fillna("Unknown") if "Region" in result_df.columns
+                   else "Unknown"),
+        "RAG": pd.Categorical(result_df["RAG Rating"].astype(object), categories=RAG_ORDER),
+        "Spend": pd.to_numeric(result_df["Spend"], errors="coerce").fillna(0.0).astype("float64"),
+        "Emissions": pd.to_numeric(result_df[EMISSIONS_COLUMN], errors="coerce").fillna(0.0).astype("float64"),
+        "Score": pd.to_numeric(result_df["ESG Score"], errors="coerce").fillna(0).astype("float64"),
+    })
+    df["Weighted Score"] = df["Score"] * df["Spend"]
+    return df
+
+
+def _ratio(numerator, denominator):
+    return (numerator / denominator.replace(0, np.nan)).fillna(0.0)
+
+
+def _rollup(df, key, total_spend):
+    grouped = df.groupby(key, sort=False, observed=True).agg(
+        Suppliers=("Entity Key", "nunique"),
+        Rows=("Supplier", "size"),
+        Spend=("Spend", "sum"),
+        Emissions=("Emissions", "sum"),
+        WeightedScore=("Weighted Score", "sum"),
+    )
+    rag_spend = df.pivot_table(index=key, columns="RAG", values="Spend", aggfunc="sum",
+                               fill_value=0.0, observed=False).reindex(columns=RAG_ORDER, fill_value=0.0)
+    rag_spend = rag_spend.reindex(grouped.index, fill_value=0.0)
+
+    rollup = pd.DataFrame({
+        "Suppliers": grouped["Suppliers"],
+        "Rows": grouped["Rows"],
+        "Spend": grouped["Spend"].round(2),
+        "Spend Share": _ratio(grouped["Spend"], pd.Series(total_spend, index=grouped.index)).round(4),
+        "Emissions (kg CO2e)": grouped["Emissions"].round(2),
+        "Emissions per £": _ratio(grouped["Emissions"], grouped["Spend"]).round(4),
+        "Spend-Weighted ESG Score": _ratio(grouped["WeightedScore"], grouped["Spend"]).round(3),
+    })
+    for rag in RAG_ORDER:
+        rollup[f"{rag} Spend Share"] = _ratio(rag_spend[rag], grouped["Spend"]).round(4)
+    rollup.index.name = key
+    return rollup.sort_values("Spend", ascending=False).reset_index()
+
+
+def build_cube(result_df, top_n=TOP_EMITTERS):
+    df = _prepare(result_df)
+    total_spend = df["Spend"].sum()
+    total_emissions = df["Emissions"].sum()
+
+    by_rag = df.groupby("RAG", observed=False).agg(
+        Suppliers=("Entity Key", "nunique"), Rows=("Supplier", "size"),
+        Spend=("Spend", "sum"), Emissions=("Emissions", "sum"),
+    )
+    by_rag["Spend Share"] = _ratio(by_rag["Spend"], pd.Series(total_spend, index=by_rag.index)).round(4)
+    by_rag = by_rag.rename(columns={"Emissions": "Emissions (kg CO2e)"}).reset_index().rename(columns={"RAG": "RAG Rating"})
+    by_rag["RAG Rating"] = by_rag["RAG Rating"].astype(object)
+
+    top = df.groupby("Entity Key", sort=False).agg(
+        Supplier=("Entity", "first"), Number=("Company Number", "first"), Spend=("Spend", "sum"),
+        Emissions=("Emissions", "sum"), Category=("Category", "first"), RAG=("RAG", "first"),
+    )
+    top = top.nlargest(top_n, "Emissions")
+    top_emitters = pd.DataFrame({
+        "Supplier": top["Supplier"].to_numpy(),
+        "Company Number": top["Number"].where(top["Number"] != "").to_numpy(),
+        "Category": top["Category"].to_numpy(),
+        "RAG Rating": top["RAG"].astype(object).to_numpy(),
+        "Spend": top["Spend"].round(2).to_numpy(),
+        "Emissions (kg CO2e)": top["Emissions"].round(2).to_numpy(),
+        "Share of Emissions": (top["Emissions"] / total_emissions if total_emissions else top["Emissions"] * 0).round(4).to_numpy(),
+    })
+
+    totals = {
+        "Rows": int(len(df)),
+        "Suppliers": int(df["Entity Key"].nunique()),
+        "Spend": round(float(total_spend), 2),
+        "Emissions (kg CO2e)": round(float(total_emissions), 2),
+        "Emissions per £": round(float(total_emissions / total_spend), 4) if total_spend else 0.0,
+        "Spend-Weighted ESG Score": round(float(df["Weighted Score"].sum() / total_spend), 3) if total_spend else 0.0,
+        "Red Spend Share": round(float(df.loc[df["RAG"] == "Red", "Spend"].sum() / total_spend), 4) if total_spend else 0.0,
+    }
+
+    return {
+        "totals": totals,
+        "by_category": _rollup(df, "Category", total_spend),
+        "by_region": _rollup(df, "Region", total_spend),
+        "by_rag": by_rag,
+        "top_emitters": top_emitters,
+    }
+
+
+def cube_to_frames(cube):
+    # Sheet name -> frame, e.g. for an Excel summary workbook
+    frames = {"Totals": pd.DataFrame([cube["totals"]])}
+    frames.update({
+        "By Category": cube["by_category"],
+        "By Region": cube["by_region"],
+        "By RAG": cube["by_rag"],
+        "Top Emitters": cube["top_emitters"],
+    })
+    if cube.get("emissions_bands") is not None:
+        frames["Emissions Bands"] = cube["emissions_bands"]
+    return frames
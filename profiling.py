@@ -0,0 +1,122 @@
+# Opt-in CPU and memory profiling for a single assessment run
+#
+#   with profile_run("out/", "assessment") as report:
+#       result_df = assess_esg_risks(df)
+#       export_to_pdf(result_df)
+#   report["files"] -> written paths
+#
+# Writes, next to the results:
+#   <name>.prof        cProfile stats of the calling thread (snakeviz, flameprof, gprof2dot)
+#   <name>.folded      sampled stacks from every thread, one "frame;frame;frame count" line per
+#                      stack - the collapsed format read by flamegraph.pl and speedscope
+#   <name>_cpu.txt     top functions by cumulative time
+#   <name>_alloc.txt   tracemalloc: peak traced memory and the top allocation sites of the run
+# Work done inside process-pool workers is not captured; profile with the inline CPU backend.
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+SAMPLE_INTERVAL = 0.005
+TOP_N = 40
+TRACEMALLOC_FRAMES = 10
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True, name="stack-sampler")
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _write_cpu_report(profiler, path, top_n):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(top_n)
+    stats.sort_stats("tottime").print_stats(top_n)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(stream.getvalue())
+
+
+def _write_alloc_report(start_snapshot, end_snapshot, peak, elapsed, path, top_n):
+    lines = [
+        f"Wall time: {elapsed:.2f}s",
+        f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+        "",
+        f"Top {top_n} allocation sites by net growth during the run:",
+    ]
+    for stat in end_snapshot.compare_to(start_snapshot, "lineno")[:top_n]:
+        lines.append(str(stat))
+    lines += ["", f"Top {top_n} allocation sites still held at the end of the run (with traceback):"]
+    for stat in end_snapshot.statistics("traceback")[:top_n]:
+        lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines.extend(f"    {line}" for line in stat.traceback.format())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@contextmanager
+def profile_run(output_dir, name="assessment", top_n=TOP_N, sample_interval=SAMPLE_INTERVAL):
+    os.makedirs(output_dir or ".", exist_ok=True)
+    base = os.path.join(output_dir, name)
+    report = {"files": []}
+
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    start_snapshot = tracemalloc.take_snapshot()
+    sampler = StackSampler(sample_interval)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+
+    sampler.start()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - start
+        end_snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+
+        profiler.dump_stats(base + ".prof")
+        sampler.write_folded(base + ".folded")
+        _write_cpu_report(profiler, base + "_cpu.txt", top_n)
+        _write_alloc_report(start_snapshot, end_snapshot, peak, elapsed, base + "_alloc.txt", top_n)
+        report["files"] = [base + ".prof", base + ".folded", base + "_cpu.txt", base + "_alloc.txt"]
+        report["elapsed"] = elapsed
+        report["peak_bytes"] = peak
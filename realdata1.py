@@ -1,13 +1,15 @@
 # ESG Risk Tool (real-time, OpenAI-powered)
 
 import streamlit as st
-import pandas as pd
 import openai
-import requests
 from bs4 import BeautifulSoup
 import urllib.parse
 import io
 from fpdf import FPDF
+from llm_cache import cached_completion, cache_stats
+from result_columns import ResultColumns
+from request_scheduler import INTERACTIVE, acquire, scheduled_get
+import metrics
 
 # Set up Streamlit page
 st.set_page_config(page_title="ESG Risk Assessment Tool", layout="wide")
@@ -46,13 +48,45 @@ def search_google_summary(query):
     try:
         headers = {"User-Agent": "Mozilla/5.0"}
         url = f"https://www.google.com/search?q={urllib.parse.quote_plus(query)}"
-        response = requests.get(url, headers=headers)
+        response = scheduled_get("google", url, priority=INTERACTIVE, headers=headers)
         soup = BeautifulSoup(response.text, "html.parser")
         results = soup.find_all("div", class_="BNeawe s3v9rd AP7Wnd")
         return results[0].get_text() if results else "No significant findings."
     except:
         return "Search failed."
 
+RESULT_SCHEMA = {
+    "Supplier": "str",
+    "Spend": "float64",
+    "Estimated CO2e (kg)": "float64",
+    "Scope 1": "float64",
+    "Scope 2": "float64",
+    "Media Sentiment": "str",
+    "LLW": "category",
+    "B-Corp": "category",
+    "Sedex": "category",
+    "Modern Slavery Statement": "category",
+    "Factory Conditions": "category",
+    "Fair Payment Code": "category",
+    "Ownership": "category",
+    "Diversity Status": "category",
+    "Board Diversity": "category",
+    "Country": "category",
+    "Region": "category",
+    "ESG Commentary": "str",
+    "Confidence Score": "int8",
+    "Confidence Justification": "category",
+    "Overall ESG RAG": "category",
+    "Recommended Actions": "category",
+}
+
+# Util: OpenAI call, queued behind the shared OpenAI rate budget
+def create_completion(**kwargs):
+    acquire("openai", INTERACTIVE)
+    metrics.count_request("openai")
+    with metrics.timed("openai"):
+        return openai.ChatCompletion.create(**kwargs).choices[0].message.content.strip()
+
 # Util: Supplier ESG Analysis
 def analyze_supplier(supplier, spend):
     emissions_factor = 0.018  # kg CO2e per GBP
@@ -72,12 +106,12 @@ Research the ESG risk profile of {supplier}. Provide:
 - Confidence level (0-100) and justification
     """
     try:
-        response = openai.ChatCompletion.create(
+        summary = cached_completion(
+            create_completion,
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
         )
-        summary = response.choices[0].message.content.strip()
     except Exception as e:
         summary = f"OpenAI error: {e}"
 
@@ -114,9 +148,12 @@ def highlight_rag(row):
     return [color]*len(row)
 
 if submitted and data:
-    results = [analyze_supplier(d["Supplier Name"], d["Spend"]) for d in data]
-    df = pd.DataFrame(results)
+    results = ResultColumns(RESULT_SCHEMA)
+    for d in data:
+        results.append(analyze_supplier(d["Supplier Name"], d["Spend"]))
+    df = results.to_frame()
     st.success("Report Ready")
+    st.caption(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
     st.dataframe(df.style.apply(highlight_rag, axis=1))
 
     # Download Options
@@ -137,7 +174,7 @@ if submitted and data:
 
         pdf = PDF()
         pdf.add_page()
-        for r in results:
+        for _, r in df.iterrows():
             pdf.supplier_block(r)
 
         buf = io.BytesIO()
@@ -0,0 +1,11 @@
+-- Schema for The Ready Soul reflections (Supabase or a plain Postgres behind PostgREST)
+
+create table if not exists reflections (
+    id bigserial primary key,
+    user_id uuid not null,
+    date date not null,
+    reflection text
+);
+
+-- One entry per user per day; required for upsert on (user_id, date)
+create unique index if not exists reflections_user_id_date_idx on reflections (user_id, date);
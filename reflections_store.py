@@ -0,0 +1,92 @@
+# Reflection storage for The Ready Soul
+#
+# Every function takes the client explicitly, so the same code runs against the hosted
+# Supabase project or a local PostgREST/Postgres stand-in (see make_postgrest_client).
+# Upserts rely on the unique (user_id, date) index in reflections_schema.sql.
+
+from datetime import date as Date, datetime
+
+TABLE = "reflections"
+CONFLICT_COLUMNS = "user_id,date"
+BATCH_SIZE = 500
+DATE_PAGE_SIZE = 50
+# Accepted import date formats, tried in order: ISO, then UK day-first
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+
+
+def parse_reflection_date(value):
+    # ISO date string for a date, datetime or string in DATE_FORMATS; ValueError otherwise
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, Date):
+        return value.isoformat()
+    text = str(value).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date {value!r} (expected YYYY-MM-DD or DD/MM/YYYY)")
+
+
+def make_postgrest_client(url, key=None):
+    # e.g. make_postgrest_client("http://localhost:3000") for a local PostgREST in front of Postgres
+    from postgrest import SyncPostgrestClient
+
+    headers = {"Accept": "application/json", "Content-Type": "application/json"}
+    if key:
+        headers.update({"apikey": key, "Authorization": f"Bearer {key}"})
+    return SyncPostgrestClient(url, headers=headers)
+
+
+def save_reflection(client, user_id, date, entry):
+    # One round trip: insert, or overwrite the text if the user already has an entry for that date
+    row = {"user_id": user_id, "date": date, "reflection": entry}
+    return client.table(TABLE).upsert(row, on_conflict=CONFLICT_COLUMNS).execute()
+
+
+def save_reflections_batch(client, user_id, entries, chunk_size=BATCH_SIZE):
+    # entries: iterable of (date, reflection) pairs or {"date": ..., "reflection": ...} dicts.
+    # Postgres rejects an upsert that touches the same key twice, so the last entry per date wins.
+    # Dates are normalised first: "2024-1-5", "05/01/2024" and "2024-01-05" are the same date.
+    # Returns (rows written, [(entry number, error)] for entries skipped as unreadable).
+    rows, rejected = {}, []
+    for number, entry in enumerate(entries, start=1):
+        try:
+            date, text = (entry["date"], entry["reflection"]) if isinstance(entry, dict) else entry
+            date = parse_reflection_date(date)
+            if text is None:
+                # A short CSV row: writing it would blank an existing reflection
+                raise KeyError("reflection")
+        except KeyError as e:
+            rejected.append((number, f"missing {e}"))
+            continue
+        except (TypeError, ValueError) as e:
+            rejected.append((number, str(e)))
+            continue
+        rows[date] = {"user_id": user_id, "date": date, "reflection": text}
+
+    payload = list(rows.values())
+    written = 0
+    for start in range(0, len(payload), chunk_size):
+        chunk = payload[start:start + chunk_size]
+        client.table(TABLE).upsert(chunk, on_conflict=CONFLICT_COLUMNS).execute()
+        written += len(chunk)
+    return written, rejected
+
+
+def get_reflection_dates(client, user_id, page_size=DATE_PAGE_SIZE, before=None):
+    # Newest first, dates only. Pass the returned cursor as `before` to fetch the next page;
+    # with the (user_id, date) index each page costs the same however long the history is.
+    query = client.table(TABLE).select("date").eq("user_id", user_id)
+    if before:
+        query = query.lt("date", before)
+    result = query.order("date", desc=True).limit(page_size).execute()
+    dates = [row["date"] for row in result.data]
+    next_cursor = dates[-1] if len(dates) == page_size else None
+    return dates, next_cursor
+
+
+def get_reflection(client, user_id, date):
+    result = client.table(TABLE).select("reflection").eq("user_id", user_id).eq("date", date).limit(1).execute()
+    return result.data[0]["reflection"] if result.data else None
@@ -0,0 +1,353 @@
+# Central outbound request scheduler
+#
+# Every external data source gets a token bucket (sustained rate + burst). Callers queue for a
+# token in one of two priority classes, so a typeahead or a small interactive assessment is served
+# before bulk enrichment that is already waiting on the same source.
+#
+# Each source also has a circuit breaker. Once too many recent requests fail (errors, timeouts,
+# 429/5xx, captcha redirects) it opens and requests fail fast with SourceUnavailable instead of
+# waiting for a token and timing out; after a cool-down one probe request is let through
+# (half-open) and its outcome closes or re-opens the circuit. A URL that just failed is also
+# answered from a short-lived negative cache.
+#
+# Inside request_deadline(seconds) nothing is fetched past the deadline: queued callers give up
+# their place, request timeouts are cut to the time left, and later calls raise DeadlineExceeded.
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import requests
+
+import evidence_store
+import metrics
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# source -> (tokens per second, burst size)
+SOURCE_LIMITS = {
+    "google": (0.5, 2),
+    "companies_house": (2.0, 10),  # published limit is 600 requests per 5 minutes
+    "sbti": (0.2, 1),
+    "openai": (1.0, 5),
+}
+DEFAULT_LIMIT = (1.0, 2)
+
+# Applied when a caller passes no timeout, so no request can hang indefinitely
+DEFAULT_TIMEOUT = 10
+
+# Circuit breaker: trip when at least BREAKER_MIN_REQUESTS outcomes in the last BREAKER_WINDOW
+# seconds include a BREAKER_ERROR_RATE share of failures; stay open for BREAKER_OPEN_SECONDS
+BREAKER_WINDOW = 60.0
+BREAKER_MIN_REQUESTS = 5
+BREAKER_ERROR_RATE = 0.5
+BREAKER_OPEN_SECONDS = 60.0
+NEGATIVE_CACHE_TTL = 300.0
+NEGATIVE_CACHE_SIZE = 10_000
+FAILURE_STATUSES = {429, 500, 502, 503, 504}
+
+_current_priority = contextvars.ContextVar("request_priority", default=BATCH)
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+class SourceUnavailable(requests.RequestException):
+    pass
+
+
+class DeadlineExceeded(SourceUnavailable):
+    pass
+
+
+@contextmanager
+def request_priority(priority):
+    # Everything scheduled inside the block (including nested helper calls) uses this class
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextmanager
+def request_deadline(seconds):
+    # seconds=None leaves any enclosing deadline in place
+    if seconds is None:
+        yield
+        return
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left():
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class SourceQueue:
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {p: {"requests": 0, "total_wait": 0.0, "max_wait": 0.0} for p in PRIORITY_NAMES}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=None):
+        priority = _current_priority.get() if priority is None else priority
+        deadline = _deadline.get()
+        ticket = (priority, next(self._counter))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    at_head = self._waiting[0] == ticket
+                    if at_head and self._tokens >= 1:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= 1
+                        break
+                    # Only the head of the queue needs a timer; the rest wait to be notified
+                    timeout = (1 - self._tokens) / self.rate if at_head else None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise DeadlineExceeded(f"deadline passed while queued for {self.name}")
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                    self._cond.wait(timeout=timeout)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                raise
+            finally:
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            metrics.observe(f"queue_wait:{self.name}", waited)
+            stats = self._stats[priority]
+            stats["requests"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+        return waited
+
+    def stats(self):
+        with self._cond:
+            self._refill()
+            rows = []
+            for priority, name in PRIORITY_NAMES.items():
+                stats = self._stats[priority]
+                rows.append({
+                    "Source": self.name,
+                    "Priority": name,
+                    "Queued": sum(1 for p, _ in self._waiting if p == priority),
+                    "Requests": stats["requests"],
+                    "Avg Wait (s)": round(stats["total_wait"] / stats["requests"], 3) if stats["requests"] else 0.0,
+                    "Max Wait (s)": round(stats["max_wait"], 3),
+                    "Tokens": round(self._tokens, 2),
+                    "Circuit": get_breaker(self.name).state,
+                })
+            return rows
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=BREAKER_WINDOW, min_requests=BREAKER_MIN_REQUESTS,
+                 error_rate=BREAKER_ERROR_RATE, open_seconds=BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._outcomes = deque()
+        self._lock = threading.Lock()
+        self.trips = 0
+
+    def cancel(self):
+        # The allowed request never went out (e.g. deadline); let the next caller probe instead
+        with self._lock:
+            self._probing = False
+
+    def allow(self):
+        # Raises SourceUnavailable while open; lets a single probe through once the cool-down is over.
+        # Returns True for that probe, which must end in record() or cancel().
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        metrics.count_error(f"circuit_open:{self.name}")
+        raise SourceUnavailable(f"{self.name} circuit is {self.state}")
+
+    def record(self, ok):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip(now)
+                return
+            self._outcomes.append((now, ok))
+            while self._outcomes and now - self._outcomes[0][0] > self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.error_rate:
+                self._trip(now)
+
+    def _trip(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self.trips += 1
+        print(f"Circuit opened for {self.name}; failing fast for {self.open_seconds:.0f}s")
+
+
+class NegativeCache:
+    # url -> expiry for requests that just failed, so retries within the TTL fail without a request.
+    # Entries are kept in expiry order (one TTL for all), so inserts drop expired entries from the
+    # front and, past max_entries, the ones closest to expiry.
+    def __init__(self, ttl=NEGATIVE_CACHE_TTL, max_entries=NEGATIVE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expiry = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._expiry)
+
+    def check(self, url):
+        with self._lock:
+            expiry = self._expiry.get(url)
+            if expiry is not None and expiry <= time.monotonic():
+                del self._expiry[url]
+                expiry = None
+        metrics.record_cache("negative", expiry is not None)
+        return expiry is not None
+
+    def add(self, url):
+        now = time.monotonic()
+        with self._lock:
+            self._expiry.pop(url, None)
+            self._expiry[url] = now + self.ttl
+            while self._expiry and (len(self._expiry) > self.max_entries or next(iter(self._expiry.values())) <= now):
+                self._expiry.popitem(last=False)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+_breakers = {}
+_negative_cache = NegativeCache()
+
+
+def get_queue(source):
+    with _queues_lock:
+        if source not in _queues:
+            rate, burst = SOURCE_LIMITS.get(source, DEFAULT_LIMIT)
+            _queues[source] = SourceQueue(source, rate, burst)
+        return _queues[source]
+
+
+def get_breaker(source):
+    with _queues_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(source)
+        return _breakers[source]
+
+
+def acquire(source, priority=None):
+    return get_queue(source).acquire(priority)
+
+
+def _is_failure(response):
+    # Rate limiting, server errors and Google's captcha interstitial all mean "source unusable now"
+    return response.status_code in FAILURE_STATUSES or "/sorry/" in (response.url or "")
+
+
+def scheduled_get(source, url, priority=None, **kwargs):
+    # In evidence replay mode the archive answers without a token or any network access
+    mode = evidence_store.get_mode()
+    if mode == "replay":
+        return evidence_store.replay(url, kwargs.get("params"))
+    remaining = time_left()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"deadline passed before {source} request")
+    if _negative_cache.check(url):
+        raise SourceUnavailable(f"{source} request failed recently: {url}")
+    breaker = get_breaker(source)
+    probe = breaker.allow()
+    # Until the request's outcome is recorded, any exit (deadline, KeyboardInterrupt, a bug) releases
+    # the half-open probe this call holds, so the breaker cannot stay stuck waiting for it
+    recorded = False
+    try:
+        acquire(source, priority)
+        metrics.count_request(source)
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        remaining = time_left()
+        cut_short = remaining is not None and remaining < kwargs["timeout"]
+        if cut_short:
+            kwargs["timeout"] = max(remaining, 0.1)
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.Timeout as e:
+            if cut_short:
+                # Our deadline, not the source's fault: no breaker failure, no negative cache entry
+                raise DeadlineExceeded(f"deadline passed during {source} request") from e
+            metrics.count_error(f"request:{source}")
+            breaker.record(False)
+            recorded = True
+            _negative_cache.add(url)
+            raise
+        except Exception:
+            metrics.count_error(f"request:{source}")
+            breaker.record(False)
+            recorded = True
+            _negative_cache.add(url)
+            raise
+        if _is_failure(response):
+            metrics.count_error(f"request:{source}")
+            breaker.record(False)
+            recorded = True
+            _negative_cache.add(url)
+            raise SourceUnavailable(f"{source} returned HTTP {response.status_code}")
+        breaker.record(True)
+        recorded = True
+    finally:
+        if probe and not recorded:
+            breaker.cancel()
+    if mode == "record":
+        evidence_store.record(source, url, kwargs.get("params"), response)
+    return response
+
+
+def scheduler_stats():
+    with _queues_lock:
+        queues = list(_queues.values())
+    return [row for queue in queues for row in queue.stats()]
@@ -0,0 +1,104 @@
+# Server-side paginated browsing over a large result frame
+#
+# The frame stays in the Streamlit session; only the requested page is sent to the browser.
+# Sort orders and filter masks are built once per result, and the filtered ordering for the
+# current view is cached, so paging costs only the page slice:
+#
+#   browser = ResultBrowser(result_df)
+#   page_df, total = browser.page(sort_by="Spend", descending=True, filters={"RAG Rating": ["Red"]},
+#                                 ranges={"ESG Score": (1, 5)}, page=0, page_size=100)
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+SORT_COLUMNS = ["Spend", "ESG Score", "Scope 1 & 2 Emissions (kg CO2e)", "Supplier", "RAG Rating", "Category"]
+FILTER_COLUMNS = ["RAG Rating", "Category", "Region"]
+RANGE_COLUMNS = ["ESG Score", "Spend"]
+PAGE_SIZES = [50, 100, 250, 500]
+VIEW_CACHE_SIZE = 16
+
+
+class ResultBrowser:
+    def __init__(self, df):
+        self.df = df
+        self.length = len(df)
+        positions = np.arange(self.length)
+
+        # column -> (ascending order, descending order); ties keep input order both ways
+        self._orders = {}
+        for column in SORT_COLUMNS:
+            if column not in df.columns:
+                continue
+            if pd.api.types.is_numeric_dtype(df[column]):
+                keys = pd.to_numeric(df[column], errors="coerce").astype("float64").fillna(-np.inf).to_numpy()
+            else:
+                keys, _ = pd.factorize(df[column].astype(object), sort=True)
+            self._orders[column] = (np.lexsort((positions, keys)), np.lexsort((positions, -keys)))
+
+        # column -> {value: boolean mask}
+        self._masks = {}
+        for column in FILTER_COLUMNS:
+            if column not in df.columns:
+                continue
+            codes, values = pd.factorize(df[column].astype(object).fillna("Unknown"))
+            self._masks[column] = {value: codes == code for code, value in enumerate(values)}
+
+        # column -> (sorted values, positions in that order) for range filters
+        self._ranges = {}
+        for column in RANGE_COLUMNS:
+            if column in df.columns:
+                values = pd.to_numeric(df[column], errors="coerce").fillna(0).to_numpy()
+                order = np.argsort(values, kind="stable")
+                self._ranges[column] = (values[order], order)
+
+        self._views = OrderedDict()
+
+    def sort_columns(self):
+        return list(self._orders)
+
+    def filter_values(self, column):
+        return sorted(self._masks.get(column, {}), key=str)
+
+    def value_range(self, column):
+        values = self._ranges[column][0]
+        return (float(values[0]), float(values[-1])) if len(values) else (0.0, 0.0)
+
+    def _mask(self, filters, ranges):
+        mask = np.ones(self.length, dtype=bool)
+        for column, selected in (filters or {}).items():
+            if selected:
+                column_masks = self._masks[column]
+                mask &= np.logical_or.reduce([column_masks[value] for value in selected if value in column_masks]
+                                             or [np.zeros(self.length, dtype=bool)])
+        for column, (low, high) in (ranges or {}).items():
+            values, order = self._ranges[column]
+            start, stop = np.searchsorted(values, low, "left"), np.searchsorted(values, high, "right")
+            in_range = np.zeros(self.length, dtype=bool)
+            in_range[order[start:stop]] = True
+            mask &= in_range
+        return mask
+
+    def view(self, sort_by=None, descending=False, filters=None, ranges=None):
+        # Row positions matching the filters, in display order
+        key = (
+            sort_by, descending,
+            tuple(sorted((column, tuple(sorted(map(str, values)))) for column, values in (filters or {}).items() if values)),
+            tuple(sorted((ranges or {}).items())),
+        )
+        if key in self._views:
+            self._views.move_to_end(key)
+            return self._views[key]
+        order = self._orders[sort_by][1 if descending else 0] if sort_by in self._orders else np.arange(self.length)
+        positions = order[self._mask(filters, ranges)[order]]
+        self._views[key] = positions
+        if len(self._views) > VIEW_CACHE_SIZE:
+            self._views.popitem(last=False)
+        return positions
+
+    def page(self, sort_by=None, descending=False, filters=None, ranges=None, page=0, page_size=PAGE_SIZES[1]):
+        # (page frame, number of matching rows)
+        positions = self.view(sort_by, descending, filters, ranges)
+        start = page * page_size
+        return self.df.iloc[positions[start:start + page_size]], len(positions)
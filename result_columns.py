@@ -0,0 +1,131 @@
+# Columnar accumulator for assessment results
+#
+# Rows are appended straight into typed buffers instead of a list of dicts, so a large run
+# holds one small integer per repeated label ("Unknown", "Amber", ...) rather than a dict per
+# supplier. to_frame() hands the buffers to pandas without re-inferring object columns.
+#
+# Missing values (None, NaN, pd.NA) stay missing: flags become nullable booleans, and an integer
+# column with any gap becomes a nullable Int column rather than showing 0. A value that cannot be
+# stored in its column is treated as missing and listed in .invalid, never silently written as 0.
+#
+# Schema convention for callers: repeated labels (ratings, categories, yes/no text) are "category",
+# small bounded scores are "int8", and money or anything derived from it (spend, emissions, scope
+# splits) is "float64": float32 keeps about 7 significant digits, too few for large values rounded
+# to pence. "float32" is only for bounded ratios such as sentiment polarity.
+
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# kind -> (array typecode, numpy dtype, placeholder written for a missing value)
+NUMERIC_KINDS = {
+    "int8": ("b", np.int8, 0),
+    "int16": ("h", np.int16, 0),
+    "int32": ("i", np.int32, 0),
+    "float32": ("f", np.float32, float("nan")),
+    "float64": ("d", np.float64, float("nan")),
+}
+
+
+def _is_missing(value):
+    return value is None or value is pd.NA or (isinstance(value, (float, np.floating)) and np.isnan(value))
+
+
+class ResultColumns:
+    # schema: {column name: kind}, kind is one of "category", "bool", "str" or a NUMERIC_KINDS key.
+    # Columns not in the schema are kept as plain object columns.
+
+    def __init__(self, schema):
+        self.schema = dict(schema)
+        self.length = 0
+        self._buffers = {}
+        self._categories = {}
+        # int column -> row positions holding a placeholder for a missing value
+        self._missing = {}
+        # {"row", "column", "value"} for every value that did not fit its column
+        self.invalid = []
+        for name, kind in self.schema.items():
+            self._add_column(name, kind)
+
+    def _add_column(self, name, kind):
+        if kind == "category":
+            self._buffers[name] = array("i")
+            self._categories[name] = {}
+        elif kind == "bool":
+            # -1 marks a missing flag so to_frame() can produce a nullable boolean
+            self._buffers[name] = array("b")
+        elif kind in NUMERIC_KINDS:
+            self._buffers[name] = array(NUMERIC_KINDS[kind][0])
+            self._missing[name] = []
+        elif kind == "str":
+            self._buffers[name] = []
+        else:
+            raise ValueError(f"Unknown column kind '{kind}' for '{name}'")
+
+    def append(self, row):
+        for name, value in row.items():
+            if name not in self.schema:
+                self.schema[name] = "str"
+                self._add_column(name, "str")
+                self._buffers[name].extend([None] * self.length)
+        for name, kind in self.schema.items():
+            value = row.get(name)
+            buffer = self._buffers[name]
+            if kind == "category":
+                codes = self._categories[name]
+                if _is_missing(value):
+                    buffer.append(-1)
+                else:
+                    buffer.append(codes.setdefault(value, len(codes)))
+            elif kind == "bool":
+                buffer.append(-1 if _is_missing(value) else int(bool(value)))
+            elif kind in NUMERIC_KINDS:
+                self._append_number(name, kind, value)
+            else:
+                buffer.append(value)
+        self.length += 1
+
+    def _append_number(self, name, kind, value):
+        buffer = self._buffers[name]
+        placeholder = NUMERIC_KINDS[kind][2]
+        if not _is_missing(value):
+            if isinstance(value, (float, np.floating)) and buffer.typecode not in "fd" and float(value).is_integer():
+                value = int(value)
+            try:
+                buffer.append(value)
+                return
+            except (TypeError, OverflowError, ValueError):
+                self.invalid.append({"row": self.length, "column": name, "value": value})
+        buffer.append(placeholder)
+        if placeholder == 0:
+            self._missing[name].append(self.length)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return self.length
+
+    def to_frame(self):
+        data = {}
+        for name, kind in self.schema.items():
+            buffer = self._buffers[name]
+            if kind == "category":
+                codes = np.frombuffer(buffer, dtype=np.int32).copy() if self.length else np.empty(0, dtype=np.int32)
+                data[name] = pd.Categorical.from_codes(codes, categories=list(self._categories[name]))
+            elif kind == "bool":
+                raw = np.frombuffer(buffer, dtype=np.int8).copy() if self.length else np.empty(0, dtype=np.int8)
+                data[name] = pd.arrays.BooleanArray(raw == 1, raw < 0)
+            elif kind in NUMERIC_KINDS:
+                dtype = NUMERIC_KINDS[kind][1]
+                values = np.frombuffer(buffer, dtype=dtype).copy() if self.length else np.empty(0, dtype=dtype)
+                if self._missing[name]:
+                    mask = np.zeros(self.length, dtype=bool)
+                    mask[self._missing[name]] = True
+                    values = pd.arrays.IntegerArray(values, mask)
+                data[name] = values
+            else:
+                data[name] = pd.array(buffer, dtype=object)
+        return pd.DataFrame(data)
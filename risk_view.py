@@ -0,0 +1,125 @@
+# Precomputed risk view over the known supplier universe
+#
+# A scheduled batch run enriches and scores every known supplier and upserts the spend-independent
+# part of each result into one parquet file, with the time its evidence was gathered:
+#
+#   python batch_runner.py known_suppliers.csv -o universe.parquet --refresh-view   # e.g. nightly
+#
+# Interactive assessments then serve those suppliers with a dict lookup (company number first,
+# normalised name second) and only run live enrichment for the rest. Spend, category, region and
+# emissions always come from the uploaded row. Entries older than MAX_AGE_DAYS are ignored, so a
+# lapsed schedule degrades to live enrichment rather than stale ratings.
+
+import os
+import time
+
+import pandas as pd
+
+import metrics
+from entity_resolution import normalize_company_number, normalize_name
+
+LOOKUP_DIR = "lookups"
+VIEW_FILE = "risk_view.parquet"
+MAX_AGE_DAYS = 30
+
+# Result columns that do not depend on the uploaded row
+VIEW_RESULT_COLUMNS = [
+    "ESG Score", "RAG Rating", "Confidence Level", "Justification", "News Sentiment", "Sentiment Score",
+    "B Corp", "Modern Slavery Statement", "LLW Accredited", "Fair Payment Code", "SBTi Committed",
+    "Modern Slavery Statement Year", "Modern Slavery Coverage", "Evidence Date",
+]
+VIEW_COLUMNS = ["company_number", "name_key", "Supplier", "evidence_time"] + VIEW_RESULT_COLUMNS
+
+_view = None
+_view_mtime = None
+
+
+def evidence_time(evidence_date):
+    # Epoch seconds of an "Evidence Date": UTC ISO stamps ("...Z"), or the local-time stamps written
+    # by earlier runs; 0.0 (expired) when missing or unreadable
+    try:
+        stamp = pd.Timestamp(evidence_date)
+    except (TypeError, ValueError):
+        return 0.0
+    if stamp is pd.NaT:
+        return 0.0
+    if stamp.tzinfo is None:
+        return time.mktime(stamp.timetuple())
+    return stamp.timestamp()
+
+
+def update_view(result_df, lookup_dir=LOOKUP_DIR):
+    # Upserts assessed suppliers into the view; rows scored on incomplete evidence are left out
+    # so they never shadow a complete entry. Returns the number of suppliers in the view.
+    global _view
+    complete = ~result_df["Justification"].astype(str).str.contains("Evidence unavailable", regex=False)
+    fresh = result_df.loc[complete, ["Supplier", "Company Number"] + VIEW_RESULT_COLUMNS]
+    fresh = fresh.astype({column: object for column in fresh.columns
+                          if isinstance(fresh[column].dtype, pd.CategoricalDtype)})
+    fresh.insert(0, "company_number", fresh.pop("Company Number").map(normalize_company_number))
+    fresh.insert(1, "name_key", fresh["Supplier"].map(normalize_name))
+    fresh.insert(3, "evidence_time", fresh["Evidence Date"].map(evidence_time))
+
+    existing = load_view_frame(lookup_dir)
+    combined = pd.concat([existing, fresh], ignore_index=True) if len(existing) else fresh
+    combined = combined[combined["name_key"] != ""]
+    combined = combined.drop_duplicates(["company_number", "name_key"], keep="last")[VIEW_COLUMNS]
+    os.makedirs(lookup_dir, exist_ok=True)
+    path = os.path.join(lookup_dir, VIEW_FILE)
+    combined.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    _view = None
+    return len(combined)
+
+
+def load_view_frame(lookup_dir=LOOKUP_DIR):
+    path = os.path.join(lookup_dir, VIEW_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=VIEW_COLUMNS)
+    return pd.read_parquet(path)
+
+
+class RiskView:
+    def __init__(self, view_df, max_age_days=MAX_AGE_DAYS):
+        self.max_age = max_age_days * 86400
+        records = view_df.to_dict(orient="records")
+        self.by_number = {}
+        self.by_name = {}
+        for record in records:
+            # Keep the most recent evidence when several entries share a key
+            for index, key in ((self.by_number, record["company_number"]), (self.by_name, record["name_key"])):
+                current = index.get(key)
+                if key and (current is None or record["evidence_time"] >= current["evidence_time"]):
+                    index[key] = record
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def lookup(self, company_number=None, name=None):
+        # A numbered row is served by its number or not at all: a name match could be another
+        # company, or an unnumbered entry that would then be labelled with the row's number.
+        # Only unnumbered rows fall back to the name.
+        number = normalize_company_number(company_number)
+        if number:
+            record = self.by_number.get(number)
+        else:
+            record = self.by_name.get(normalize_name(name))
+        if record is not None and record["evidence_time"] < time.time() - self.max_age:
+            record = None
+        metrics.record_cache("risk_view", record is not None)
+        return record
+
+
+def get_risk_view(lookup_dir=LOOKUP_DIR):
+    # Reloaded whenever the scheduled job has rewritten the file
+    global _view, _view_mtime
+    path = os.path.join(lookup_dir, VIEW_FILE)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if _view is None or mtime != _view_mtime:
+        try:
+            _view = RiskView(load_view_frame(lookup_dir))
+        except Exception as e:
+            print(f"Risk view not loaded ({path}): {e}")
+            _view = RiskView(pd.DataFrame(columns=VIEW_COLUMNS))
+        _view_mtime = mtime
+    return _view
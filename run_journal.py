@@ -0,0 +1,140 @@
+# Crash-safe checkpoint journal for long assessment runs
+#
+# Every finished supplier result is appended as one JSON line to runs/<run_id>.jsonl. A run that
+# dies part-way (exception, Streamlit rerun, container restart) is resumed by opening the same
+# run id: completed keys are skipped and their stored rows reused. When the run completes, the
+# journal is compacted into runs/<run_id>.parquet and the line log removed. runs/<run_id>.json
+# records when the run started and finished.
+
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+RUNS_DIR = os.getenv("ESG_RUNS_DIR", "runs")
+
+
+# Default run ids are a hash of the input and options only, so a run interrupted before midnight
+# still resumes the next day; the dates live in the run's metadata. options holds everything else
+# that changes the output (see esg_pipeline.run_options), so a run with other settings or
+# refreshed datasets never resumes or returns one made under the old ones.
+
+def _options_digest(options):
+    return json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8")
+
+
+def default_run_id(path, options=None):
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{stat.st_size}|{int(stat.st_mtime)}".encode("utf-8") + _options_digest(options)
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def frame_run_id(df, options=None):
+    raw = pd.util.hash_pandas_object(df, index=True).values.tobytes() + _options_digest(options)
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def _utc_now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def row_key(row):
+    return f"{row.name}|{row.get('Supplier')}"
+
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class RunJournal:
+    def __init__(self, run_id, directory=RUNS_DIR):
+        self.run_id = run_id
+        self.directory = directory
+        self.journal_path = os.path.join(directory, f"{run_id}.jsonl")
+        self.final_path = os.path.join(directory, f"{run_id}.parquet")
+        self.meta_path = os.path.join(directory, f"{run_id}.json")
+        self._file = None
+
+    def is_finished(self):
+        return os.path.exists(self.final_path)
+
+    def load_final(self):
+        return pd.read_parquet(self.final_path)
+
+    def discard_final(self):
+        # The next run under this id starts from scratch instead of returning the finished result
+        for path in (self.final_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def metadata(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_metadata(self, **fields):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run_id": self.run_id, **self.metadata(), **fields}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def completed(self):
+        # key -> result row. A crash can leave a half-written last line; it is ignored and redone.
+        records = {}
+        if not os.path.exists(self.journal_path):
+            return records
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[record["key"]] = record["row"]
+        return records
+
+    def _open(self):
+        if self._file is None:
+            if "started" not in self.metadata():
+                self._update_metadata(started=_utc_now())
+            self._file = open(self.journal_path, "a+", encoding="utf-8")
+            # Start on a fresh line if the previous process died mid-write
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        return self._file
+
+    def append(self, key, row):
+        f = self._open()
+        f.write(json.dumps({"key": key, "row": row}, default=_json_default) + "\n")
+        f.flush()
+
+    def sync(self):
+        # Called once per processed batch rather than per line; fsync is the expensive part
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def compact(self, result_df):
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.final_path + ".tmp"
+        result_df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.final_path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._update_metadata(finished=_utc_now())
+        return self.final_path
@@ -0,0 +1,74 @@
+# Process-wide single-flight coalescing for evidence lookups
+#
+# Streamlit sessions (and the I/O threads of one run) share this process. When two of them need
+# the same evidence at the same time, only the first issues the requests; the others wait for its
+# result instead of scraping the same supplier again:
+#
+#   coalesce("news", normalize_name(supplier), fetch_news_page, supplier)
+#
+# Calls are keyed by evidence type, normalised supplier and evidence mode (a replaying or recording
+# session never joins a live one). A waiter gives up at its own request deadline. If the call it
+# waited on ran out of *its* deadline, the waiter runs the call itself rather than inherit a
+# failure that was not its own. Nothing is cached: once a call finishes, its key is free again.
+
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import evidence_store
+import metrics
+from request_scheduler import DeadlineExceeded, time_left
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn, *args, **kwargs):
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+            metrics.record_cache("single_flight", not leader)
+            if leader:
+                return self._lead(key, future, fn, args, kwargs)
+            remaining = time_left()
+            try:
+                return future.result(timeout=None if remaining is None else max(remaining, 0))
+            except FutureTimeout:
+                raise DeadlineExceeded(f"deadline passed waiting for in-flight {key[0]} lookup") from None
+            except DeadlineExceeded:
+                # The leader's deadline, not ours: take over if we still have time
+                remaining = time_left()
+                if remaining is not None and remaining <= 0:
+                    raise
+
+    def _lead(self, key, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_flight = SingleFlight()
+
+
+def coalesce(evidence_type, supplier_key, fn, *args, **kwargs):
+    return _flight.do((evidence_type, supplier_key, evidence_store.get_mode()), fn, *args, **kwargs)
+
+
+def in_flight():
+    return _flight.in_flight()
@@ -0,0 +1,55 @@
+# Incremental parser for markdown tables arriving as a token stream
+
+import re
+
+SEPARATOR_RE = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+
+def split_table_line(line):
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+class MarkdownTableParser:
+    # Feed text chunks as they arrive; each call returns the rows completed by that chunk.
+    # Prose before/after the table (lines without a pipe) is ignored.
+
+    def __init__(self):
+        self.headers = []
+        self.rows = []
+        self._buffer = ""
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        new_rows = []
+        for line in lines:
+            row = self._parse_line(line)
+            if row is not None:
+                new_rows.append(row)
+        return new_rows
+
+    def close(self):
+        # The last row may not end with a newline
+        line, self._buffer = self._buffer, ""
+        row = self._parse_line(line)
+        return [row] if row is not None else []
+
+    def _parse_line(self, line):
+        line = line.strip()
+        if "|" not in line or SEPARATOR_RE.match(line):
+            return None
+        cells = split_table_line(line)
+        if not self.headers:
+            self.headers = cells
+            return None
+        if cells == self.headers:
+            # Some completions repeat the header when a long table is split
+            return None
+        cells = (cells + [""] * len(self.headers))[:len(self.headers)]
+        self.rows.append(cells)
+        return cells
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_runner
+from risk_view import VIEW_RESULT_COLUMNS, update_view
+
+
+def test_supplier_recurring_across_chunks_is_assessed_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({
+        "Supplier": ["Acme Ltd", "Beta", "ACME Limited", "Gamma", "Acme Ltd", "Beta"],
+        "Spend": [100, 200, 300, 400, 500, 600],
+        "Category": ["Construction"] * 6,
+    }).to_csv("suppliers.csv", index=False)
+    assessed = []
+    assess = batch_runner.assess_esg_risks
+
+    def recording_assess(df, **kwargs):
+        assessed.extend(df["Supplier"])
+        return assess(df, **kwargs)
+
+    monkeypatch.setattr(batch_runner, "assess_esg_risks", recording_assess)
+    assert batch_runner.main(["suppliers.csv", "-o", "results.csv", "--chunksize", "2", "--time-budget", "0",
+                              "--no-journal"]) == 0
+
+    assert sorted(assessed) == ["Acme Ltd", "Beta", "Gamma"]
+    result_df = pd.read_csv("results.csv")
+    assert result_df["Supplier"].tolist() == ["Acme Ltd", "Beta", "ACME Limited", "Gamma", "Acme Ltd", "Beta"]
+    assert result_df["Spend"].tolist() == [100, 200, 300, 400, 500, 600]
+    assert result_df["Resolved Entity"].tolist() == ["Acme Ltd", "Beta", "Acme Ltd", "Gamma",
+                                                     "Acme Ltd", "Beta"]
+
+
+def _serve_from_view(suppliers):
+    # Suppliers served by the risk view are complete without any network access, so their chunk
+    # journals are finalised
+    update_view(pd.DataFrame({
+        **{column: [None] * len(suppliers) for column in VIEW_RESULT_COLUMNS},
+        "Supplier": suppliers,
+        "Company Number": [None] * len(suppliers),
+        "ESG Score": range(len(suppliers)),
+        "RAG Rating": ["Green"] * len(suppliers),
+        "Justification": [""] * len(suppliers),
+        "Evidence Date": [time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())] * len(suppliers),
+    }))
+
+
+def test_rerun_with_another_chunksize_does_not_reuse_other_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    suppliers = ["Acme", "Beta", "Gamma", "Delta", "Epsilon"]
+    _serve_from_view(suppliers)
+    pd.DataFrame({"Supplier": suppliers, "Spend": [5, 4, 3, 2, 1], "Category": ["Construction"] * 5}).to_csv(
+        "suppliers.csv", index=False)
+
+    for chunksize in ("2", "3", "1"):
+        assert batch_runner.main(["suppliers.csv", "-o", f"results{chunksize}.csv", "--chunksize", chunksize,
+                                  "--runs-dir", "runs"]) == 0
+        result_df = pd.read_csv(f"results{chunksize}.csv")
+        assert result_df["Supplier"].tolist() == suppliers
+        assert result_df["ESG Score"].tolist() == [0, 1, 2, 3, 4]
+
+
+def test_time_budget_covers_the_whole_run_highest_spend_first(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({
+        "Supplier": ["Small", "Large", "Medium", "Largest", "Tiny"],
+        "Spend": [10, 300, 200, 400, 1],
+        "Category": ["Construction"] * 5,
+    }).to_csv("suppliers.csv", index=False)
+    chunks, budgets = [], []
+    assess = batch_runner.assess_esg_risks
+
+    def recording_assess(df, time_budget=None, **kwargs):
+        chunks.append(df["Supplier"].tolist())
+        budgets.append(time_budget)
+        time.sleep(0.05)
+        return assess(df, time_budget=0, **kwargs)
+
+    monkeypatch.setattr(batch_runner, "assess_esg_risks", recording_assess)
+    assert batch_runner.main(["suppliers.csv", "-o", "results.csv", "--chunksize", "2", "--time-budget", "0.12",
+                              "--no-journal"]) == 0
+
+    assert chunks == [["Largest", "Large"], ["Medium", "Small"], ["Tiny"]]
+    assert budgets[0] <= 0.12 and budgets[1] < budgets[0] - 0.04 and budgets[2] == 0.0
+    result_df = pd.read_csv("results.csv")
+    assert result_df["Supplier"].tolist() == ["Small", "Large", "Medium", "Largest", "Tiny"]
+    assert result_df["Spend"].tolist() == [10, 300, 200, 400, 1]
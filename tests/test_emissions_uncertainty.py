@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import emissions_uncertainty
+from emissions_uncertainty import (CATEGORY_UNCERTAINTY, EMISSIONS_COLUMN, PERCENTILES, SUPPLIER_GSD,
+                                   add_emissions_bands, emissions_bands)
+
+
+def _result_frame(rows=200):
+    return pd.DataFrame({
+        "Supplier": [f"Supplier {i}" for i in range(rows)],
+        EMISSIONS_COLUMN: np.linspace(10.0, 1000.0, rows),
+        "Category": ["Construction", "Utilities", None, "Printing and Paper"] * (rows // 4),
+    })
+
+
+def _assert_ordered(frame, prefix):
+    low, central, high = (frame[f"{prefix} P{p} (kg CO2e)"] for p in PERCENTILES)
+    assert (low <= central).all() and (central <= high).all()
+
+
+def test_bands_are_ordered_for_every_supplier_and_the_portfolio():
+    supplier_bands, portfolio = emissions_bands(_result_frame(), draws=5_000, seed=1)
+    for scope in ("Emissions", "Scope 1", "Scope 2"):
+        _assert_ordered(supplier_bands, scope)
+    _assert_ordered(portfolio.rename(columns=lambda column: f"All {column}"), "All")
+    assert portfolio["Emissions"].tolist() == ["Scope 1 & 2", "Scope 1", "Scope 2"]
+
+
+def test_supplier_percentiles_follow_the_lognormal_spread():
+    result_df = _result_frame(4)
+    supplier_bands, _ = emissions_bands(result_df, draws=40_000, seed=3)
+    # A Construction supplier's ratio to its point estimate is lognormal with the category and
+    # supplier spreads combined; its median is the point estimate
+    sigma = np.hypot(np.log(CATEGORY_UNCERTAINTY["Construction"][0]), np.log(SUPPLIER_GSD))
+    expected = result_df[EMISSIONS_COLUMN].iloc[0] * np.exp(sigma * np.array([-1.6449, 0.0, 1.6449]))
+    actual = [supplier_bands[f"Emissions P{p} (kg CO2e)"].iloc[0] for p in PERCENTILES]
+    assert actual == pytest.approx(expected, rel=0.04)
+
+
+def test_same_seed_gives_the_same_bands():
+    first = emissions_bands(_result_frame(), draws=2_000, seed=7)
+    second = emissions_bands(_result_frame(), draws=2_000, seed=7, workers=1)
+    pd.testing.assert_frame_equal(first[0], second[0])
+    pd.testing.assert_frame_equal(first[1], second[1])
+
+
+def test_large_portfolios_cap_portfolio_draws_but_not_supplier_bands(monkeypatch):
+    full_bands, full_portfolio = emissions_bands(_result_frame(), draws=4_000, seed=5)
+    monkeypatch.setattr(emissions_uncertainty, "MAX_PORTFOLIO_SAMPLES", 200 * 1_500)
+    monkeypatch.setattr(emissions_uncertainty, "MIN_PORTFOLIO_DRAWS", 1_000)
+    capped_bands, capped_portfolio = emissions_bands(_result_frame(), draws=4_000, seed=5)
+    pd.testing.assert_frame_equal(full_bands, capped_bands)
+    _assert_ordered(capped_portfolio.rename(columns=lambda column: f"All {column}"), "All")
+    assert capped_portfolio["P50 (kg CO2e)"].to_numpy() == pytest.approx(full_portfolio["P50 (kg CO2e)"].to_numpy(),
+                                                                         rel=0.1)
+
+
+def test_band_columns_follow_the_point_estimate():
+    banded, _ = add_emissions_bands(_result_frame(8), draws=500)
+    columns = banded.columns.tolist()
+    position = columns.index(EMISSIONS_COLUMN)
+    assert columns[position + 1:position + 4] == [f"Emissions P{p} (kg CO2e)" for p in PERCENTILES]
+    assert len(banded) == 8
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_resolution import cluster_suppliers, fan_out, resolve_entities
+
+
+def test_same_name_under_different_numbers_stays_two_entities():
+    df = pd.DataFrame({
+        "Supplier": ["Acme Ltd", "Acme Ltd", "Acme Limited"],
+        "Company Number": ["01234567", "07654321", " 01234567"],
+        "Spend": [100.0, 50.0, 25.0],
+    })
+    entities, codes = resolve_entities(df)
+    assert len(entities) == 2
+    assert list(codes) == [0, 1, 0]
+    assert list(entities["Company Number"]) == ["01234567", "07654321"]
+    assert list(entities["Spend"]) == [125.0, 50.0]
+
+
+def test_fuzzy_match_does_not_join_different_numbers():
+    df = pd.DataFrame({
+        "Supplier": ["Acme Holdings Ltd", "Acme Holding Ltd"],
+        "Company Number": ["01234567", "07654321"],
+    })
+    assert len(set(cluster_suppliers(df))) == 2
+
+
+def test_rows_without_a_number_inherit_their_entity_number():
+    df = pd.DataFrame({
+        "Supplier": ["Acme Ltd", "ACME Limited"],
+        "Company Number": ["01234567", None],
+        "Spend": [10.0, 5.0],
+    })
+    entities, codes = resolve_entities(df)
+    result = fan_out(entities, df, codes, 0.1)
+    assert list(result["Company Number"]) == ["01234567", "01234567"]
+
+
+def test_fan_out_rejects_evidence_from_another_company():
+    df = pd.DataFrame({"Supplier": ["Acme Ltd", "Acme Ltd"], "Company Number": ["01234567", "07654321"]})
+    entities = pd.DataFrame({"Supplier": ["Acme Ltd"], "Company Number": ["01234567"]})
+    with pytest.raises(ValueError):
+        fan_out(entities, df, [0, 0], 0.1)
+
+
+def test_empty_frame_has_no_entities():
+    entities, codes = resolve_entities(pd.DataFrame({"Supplier": [], "Company Number": [], "Spend": []}))
+    assert len(entities) == 0 and len(codes) == 0
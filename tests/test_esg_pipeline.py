@@ -0,0 +1,97 @@
+import csv
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import esg_pipeline
+from esg_pipeline import ENRICHMENT_FIELDS, SEARCH_QUERIES, assess_esg_risks
+from run_journal import RunJournal
+
+
+def _cache(supplier, flags, **kwargs):
+    esg_pipeline.append_enrichment_lookup(supplier, {key: key in flags for key in ENRICHMENT_FIELDS}, **kwargs)
+
+
+def test_cached_flags_apply_when_the_time_budget_is_already_spent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Enriched on an earlier run under their registered names
+    _cache("ACME HOLDINGS LIMITED", {"b_corp", "llw"}, input_name="Acme")
+    _cache("BETA LIMITED", {"fair_payment"}, company_number="01234567")
+    df = pd.DataFrame({
+        "Supplier": ["Acme", "Beta", "Gamma"],
+        "Company Number": [None, "1234567", None],
+        "Spend": [300.0, 200.0, 100.0],
+    })
+
+    result_df = assess_esg_risks(df, time_budget=0, use_view=False)
+
+    acme, beta, gamma = (result_df.iloc[i] for i in range(3))
+    assert acme["B Corp"] and acme["LLW Accredited"] and not acme["Fair Payment Code"]
+    assert acme["Justification"].endswith("Evidence unavailable: news")
+    assert acme["Confidence Level"] == 1
+    assert beta["Fair Payment Code"] and not beta["B Corp"]
+    assert beta["Justification"].endswith("Evidence unavailable: news")
+    # Nothing cached and nothing fetched: every live check is reported missing
+    assert gamma["Justification"] == "Evidence unavailable: b_corp, llw, fair_payment, news"
+
+
+def test_files_without_the_input_name_column_are_upgraded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(esg_pipeline.ENRICHMENT_LOOKUP_FILE, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Supplier", "Company Number"] + ENRICHMENT_FIELDS)
+        writer.writeheader()
+        writer.writerow({"Supplier": "Old Co", "Company Number": "", **{key: "False" for key in ENRICHMENT_FIELDS}})
+    _cache("NEW CO LIMITED", {"sbti"}, input_name="New Co")
+
+    lookup = esg_pipeline.load_enrichment_lookup()
+    assert set(lookup) == {"Old Co", "NEW CO LIMITED", "New Co"}
+    assert lookup["New Co"]["sbti"] and not lookup["Old Co"]["sbti"]
+
+
+def test_cache_hits_skip_the_companies_house_lookup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _cache("ACME HOLDINGS LIMITED", {"b_corp"}, input_name="Acme")
+    _cache("BETA LIMITED", {"llw"}, company_number="01234567")
+    looked_up = []
+    monkeypatch.setattr(esg_pipeline, "_lookup_registered_name",
+                        lambda name, number: looked_up.append(name) or "GAMMA LIMITED")
+    monkeypatch.setattr(esg_pipeline, "fetch_live_pages", lambda name: {})
+    lookup = esg_pipeline.load_enrichment_lookup()
+
+    acme = esg_pipeline.collect_evidence("Acme", lookup, include_news=False)
+    beta = esg_pipeline.collect_evidence("Beta", lookup, include_news=False, company_number="1234567")
+    gamma = esg_pipeline.collect_evidence("Gamma", lookup, include_news=False)
+
+    assert acme["cached_info"]["b_corp"] and beta["cached_info"]["llw"]
+    assert gamma["cached_info"] is None and gamma["registered_name"] == "GAMMA LIMITED"
+    assert looked_up == ["Gamma"]
+
+
+def test_resumed_and_finished_runs_keep_the_fresh_dtypes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(esg_pipeline, "_lookup_registered_name", lambda name, number: None)
+    monkeypatch.setattr(esg_pipeline, "fetch_live_pages", lambda name: {key: "<html></html>" for key in SEARCH_QUERIES})
+    monkeypatch.setattr(esg_pipeline, "fetch_news_page", lambda name: "<html></html>")
+    # No Region column: it is missing on every row, which parquet alone would read back as object
+    df = pd.DataFrame({
+        "Supplier": ["Acme", "Beta", "Acme Ltd"],
+        "Company Number": [None, "1234567", None],
+        "Spend": [300.0, 200.0, 100.0],
+        "Category": ["IT", "IT", "Catering"],
+    })
+    fresh = assess_esg_risks(df, use_view=False)
+
+    interrupted = RunJournal("run", directory="runs")
+    monkeypatch.setattr(interrupted, "compact", lambda result_df: None)
+    assess_esg_risks(df, use_view=False, journal=interrupted)
+    resumed = assess_esg_risks(df, use_view=False, journal=RunJournal("run", directory="runs"))
+    finished = assess_esg_risks(df, use_view=False, journal=RunJournal("run", directory="runs"))
+
+    assert isinstance(fresh["Category"].dtype, pd.CategoricalDtype)
+    assert resumed.dtypes.to_dict() == fresh.dtypes.to_dict()
+    assert finished.dtypes.to_dict() == fresh.dtypes.to_dict()
+    pd.testing.assert_frame_equal(finished.drop(columns="Evidence Date"), resumed.drop(columns="Evidence Date"),
+                                  check_categorical=False)
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import evidence_store
+import request_scheduler
+from evidence_store import EvidenceNotRecorded, evidence_mode, record, replay, store_stats
+
+# Not valid UTF-8, so any decode/re-encode on the way through would show
+BODY = "<h3>Acme fined</h3>".encode("utf-8") + bytes(range(256))
+
+
+def _response(url, body=BODY, status=200):
+    response = requests.models.Response()
+    response.status_code = status
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers = requests.structures.CaseInsensitiveDict({"Content-Type": "text/html", "Set-Cookie": "x"})
+    response._content = body
+    return response
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # scheduled_get uses the default store path, which is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return evidence_store.STORE_PATH
+
+
+def test_recorded_response_replays_byte_identical_without_the_network(store, monkeypatch):
+    url = "https://example.invalid/search?q=acme"
+    monkeypatch.setattr(request_scheduler.requests, "get", lambda url, **kwargs: _response(url))
+    with evidence_mode("record"):
+        request_scheduler.scheduled_get("evidence-test", url)
+
+    def no_network(url, **kwargs):
+        raise AssertionError("replay must not touch the network")
+
+    monkeypatch.setattr(request_scheduler.requests, "get", no_network)
+    with evidence_mode("replay"):
+        replayed = request_scheduler.scheduled_get("evidence-test", url)
+        assert replayed.content == BODY
+        assert replayed.status_code == 200
+        assert dict(replayed.headers) == {"Content-Type": "text/html"}
+        with pytest.raises(EvidenceNotRecorded):
+            request_scheduler.scheduled_get("evidence-test", "https://example.invalid/search?q=beta")
+
+
+def test_params_are_part_of_the_request_key(store):
+    record("test", "https://example.invalid/api", {"q": "acme"}, _response("https://example.invalid/api"), path=store)
+    assert replay("https://example.invalid/api", {"q": "acme"}, path=store).content == BODY
+    with pytest.raises(EvidenceNotRecorded):
+        replay("https://example.invalid/api", {"q": "beta"}, path=store)
+
+
+def test_identical_bodies_are_stored_once(store):
+    for url in ("https://example.invalid/a", "https://example.invalid/b", "https://example.invalid/a"):
+        record("test", url, None, _response(url), path=store)
+    record("test", "https://example.invalid/c", None, _response("https://example.invalid/c", body=b"other"), path=store)
+    stats = store_stats(path=store)
+    assert stats["requests"] == 3
+    assert stats["blobs"] == 2
+    assert stats["raw_bytes"] == len(BODY) + len(b"other")
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporters import export_to_pdf
+
+
+def test_pdf_export_survives_characters_outside_latin1():
+    df = pd.DataFrame({
+        "Supplier": ["O’Brien Catering"],
+        "Justification": ["Spend of €1,200 — no statement on file"],
+    })
+
+    pdf_bytes = export_to_pdf(df)
+
+    assert pdf_bytes.startswith(b"%PDF")
@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import iter_supplier_chunks, read_suppliers
+
+CSV = (
+    "supplier , Spend,Category,Unused\n"
+    'Acme,"£1,200",IT,x\n'
+    ",5,IT,x\n"
+    "Beta,abc,,x\n"
+    "Gamma,1,IT,x,y,z\n"
+    "Delta,2,Utilities,x\n"
+).encode("utf-8")
+
+
+def _value_issues(issues):
+    return {(issue["row"], issue["reason"]) for issue in issues
+            if issue["reason"].startswith(("Missing", "Unparseable"))}
+
+
+def test_bad_rows_are_reported_not_fatal():
+    df, issues = read_suppliers(io.BytesIO(CSV))
+    assert list(df["Supplier"]) == ["Acme", "Beta", "Delta"]
+    assert list(df["Spend"]) == [1200.0, 0.0, 2.0]
+    assert list(df["Category"].astype(str)) == ["IT", "Unknown", "Utilities"]
+    assert _value_issues(issues) == {(2, "Missing supplier name"), (3, "Unparseable Spend: 'abc'")}
+    # The over-long Gamma line is skipped and reported
+    assert len(issues) == 3
+
+
+def test_chunked_reads_report_the_same_row_numbers():
+    chunks = list(iter_supplier_chunks(io.BytesIO(CSV), chunksize=2))
+    issues = [issue for _, chunk_issues in chunks for issue in chunk_issues]
+    assert [supplier for df, _ in chunks for supplier in df["Supplier"]] == ["Acme", "Beta", "Delta"]
+    assert _value_issues(issues) == {(2, "Missing supplier name"), (3, "Unparseable Spend: 'abc'")}
+    assert len(issues) == 3
+
+
+def test_missing_required_column_is_fatal():
+    with pytest.raises(ValueError, match="Category"):
+        read_suppliers(io.BytesIO(b"Supplier,Spend\nAcme,1\n"))
+
+
+def test_rows_after_a_skipped_line_keep_their_own_row_numbers():
+    data = (
+        "Supplier,Spend,Category\n"
+        "Acme,1,IT\n"
+        "Beta,1,IT,x,y\n"
+        "\n"
+        "Gamma,abc,IT\n"
+        ",2,IT\n"
+    ).encode("utf-8")
+    for chunksize in (None, 2):
+        chunks = list(iter_supplier_chunks(io.BytesIO(data), chunksize=chunksize))
+        issues = [issue for _, chunk_issues in chunks for issue in chunk_issues]
+        assert [supplier for df, _ in chunks for supplier in df["Supplier"]] == ["Acme", "Gamma"]
+        # The over-long line is data row 2 and the blank line row 3, so Gamma is row 4
+        assert _value_issues(issues) == {(4, "Unparseable Spend: 'abc'"), (5, "Missing supplier name")}
+        assert [issue["row"] for issue in issues if issue["reason"].startswith("Skipping")] == [2]
+
+
+def test_rows_after_a_blank_sheet_row_keep_their_sheet_row_numbers():
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for values in (["Supplier", "Spend", "Category"], ["Acme", 1, "IT"], [None, None, None], ["Beta", "abc", "IT"]):
+        sheet.append(values)
+    upload = io.BytesIO()
+    workbook.save(upload)
+    upload.name = "suppliers.xlsx"
+
+    for chunksize in (None, 1):
+        upload.seek(0)
+        chunks = list(iter_supplier_chunks(upload, chunksize=chunksize))
+        issues = [issue for _, chunk_issues in chunks for issue in chunk_issues]
+        assert [supplier for df, _ in chunks for supplier in df["Supplier"]] == ["Acme", "Beta"]
+        assert _value_issues(issues) == {(3, "Unparseable Spend: 'abc'")}
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_cache
+from llm_cache import cache_key, cached_completion, cached_stream, get_cached, put_cached
+
+MESSAGES = [{"role": "system", "content": "Rate ESG risk."}, {"role": "user", "content": "Acme Ltd\n  Construction"}]
+
+
+class Completions:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, model, messages, temperature):
+        self.calls += 1
+        return f"response {self.calls}"
+
+
+def test_second_identical_call_is_a_hit(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    create = Completions()
+    assert cached_completion(create, "gpt-4", MESSAGES, 0.2, path=path) == "response 1"
+    assert cached_completion(create, "gpt-4", MESSAGES, 0.2, path=path) == "response 1"
+    assert create.calls == 1
+
+
+def test_whitespace_does_not_change_the_key_but_content_model_and_temperature_do():
+    key = cache_key("gpt-4", MESSAGES, 0.2)
+    reindented = [{"role": "system", "content": "  Rate   ESG risk. "},
+                  {"role": "user", "content": "Acme Ltd\n\n      Construction\n"}]
+    assert cache_key("gpt-4", reindented, 0.2) == key
+    assert cache_key("gpt-4o", MESSAGES, 0.2) != key
+    assert cache_key("gpt-4", MESSAGES, 0.7) != key
+    assert cache_key("gpt-4", MESSAGES[:1] + [{"role": "user", "content": "Beta Ltd\nConstruction"}], 0.2) != key
+
+
+def test_changed_prompt_misses_and_is_stored_separately(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    create = Completions()
+    cached_completion(create, "gpt-4", MESSAGES, 0.2, path=path)
+    other = MESSAGES[:1] + [{"role": "user", "content": "Beta Ltd"}]
+    assert cached_completion(create, "gpt-4", other, 0.2, path=path) == "response 2"
+    assert cached_completion(create, "gpt-4", MESSAGES, 0.2, path=path) == "response 1"
+    assert create.calls == 2
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm.sqlite")
+    put_cached("key", "gpt-4", "stale", path=path)
+    assert get_cached("key", path=path, ttl=60) == "stale"
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 120)
+    assert get_cached("key", path=path, ttl=60) is None
+    assert get_cached("key", path=path, ttl=None) is None
+
+
+def test_failures_are_not_cached(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+
+    def failing(model, messages, temperature):
+        raise RuntimeError("API down")
+
+    with pytest.raises(RuntimeError):
+        cached_completion(failing, "gpt-4", MESSAGES, 0.2, path=path)
+    assert cached_completion(Completions(), "gpt-4", MESSAGES, 0.2, path=path) == "response 1"
+
+
+def test_stream_is_stored_only_once_fully_consumed(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+
+    def stream(model, messages, temperature):
+        yield from ["| Supplier |", " Acme |"]
+
+    partial = cached_stream(stream, "gpt-4", MESSAGES, 0.2, path=path)
+    next(partial)
+    partial.close()
+    assert get_cached(cache_key("gpt-4", MESSAGES, 0.2), path=path) is None
+    assert "".join(cached_stream(stream, "gpt-4", MESSAGES, 0.2, path=path)) == "| Supplier | Acme |"
+    assert list(cached_stream(stream, "gpt-4", MESSAGES, 0.2, path=path)) == ["| Supplier | Acme |"]
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    put_cached("old", "gpt-4", "x" * 60, path=path, max_bytes=100)
+    put_cached("new", "gpt-4", "y" * 60, path=path, max_bytes=100)
+    assert get_cached("old", path=path) is None
+    assert get_cached("new", path=path) == "y" * 60
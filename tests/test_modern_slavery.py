@@ -0,0 +1,58 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modern_slavery import StatementIndex, build_index, read_registry_export
+
+EXPORT_2023 = (
+    "Organisation Name,Company Number,Statement Year,Group Submission,Statement URL\n"
+    "Acme Ltd,1234567,2022,No,https://acme.example/2022\n"
+    "Acme Ltd,1234567,2023,Yes,https://acme.example/2023\n"
+    "Beta Holdings plc,07654321,2023,No,https://beta.example\n"
+    "Gamma Trading,,2023,No,https://gamma.example\n"
+)
+# An older export: other headers, and no year column at all
+EXPORT_OLD = (
+    "Company name,Companies House Number,Statement end date\n"
+    "ACME LIMITED,01234567,31/03/2021\n"
+    "Gamma Trading,,31/12/2021\n"
+)
+
+
+def _export(text):
+    return read_registry_export(io.StringIO(text))
+
+
+def _index():
+    return build_index([_export(EXPORT_2023), _export(EXPORT_OLD)])
+
+
+def test_export_headers_are_matched_through_their_aliases():
+    df = _export(EXPORT_OLD)
+    assert df["organisation"].tolist() == ["ACME LIMITED", "Gamma Trading"]
+    assert df["company_number"].tolist()[0] == "01234567"
+    assert df["period_end"].tolist() == ["31/03/2021", "31/12/2021"]
+    # Fields the export lacks are present and empty
+    assert df["year"].isna().all() and df["statement_url"].isna().all()
+
+
+def test_latest_statement_per_organisation_with_every_year():
+    index_df = _index().set_index("organisation")
+    assert len(index_df) == 3
+    acme = index_df.loc["Acme Ltd"]
+    assert (acme["company_number"], acme["latest_year"], acme["years"]) == ("01234567", 2023, "2021,2022,2023")
+    assert acme["statement_url"] == "https://acme.example/2023" and acme["group_statement"]
+    assert index_df.loc["Gamma Trading", "years"] == "2021,2023"
+
+
+def test_name_fallback_never_matches_a_supplier_with_another_number():
+    index = StatementIndex(_index())
+    assert index.lookup("1234567", "Anything")["organisation"] == "Acme Ltd"
+    # Beta is registered under 07654321: a supplier numbered otherwise is not credited by name
+    assert index.lookup("99999999", "Beta Holdings") is None
+    assert index.lookup(None, "Beta Holdings Limited")["company_number"] == "07654321"
+    # Gamma's entries carry no number, so only the name can identify it
+    assert index.lookup("99999999", "Gamma Trading")["latest_year"] == 2023
+    assert index.lookup(None, "Unknown Co", "gamma trading")["organisation"] == "Gamma Trading"
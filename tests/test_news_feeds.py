@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import news_feeds
+from entity_resolution import normalize_name
+from news_feeds import NameMatcher
+
+NAMES = ["Acme Ltd", "Acme Holdings plc", "Holdings Group", "Bet", "Beta", "Alpha Beta Gamma", "Beta Gamma",
+         "aaa", "aaa aaa"]
+HEADLINES = [
+    "Acme Holdings fined over pollution",
+    "Alpha Beta Gamma and Beta Gamma merge",
+    "Betamax revival: no supplier here",
+    "ACME LTD. wins contract; Holdings Group objects",
+    "aaa aaa aaa",
+    "",
+]
+
+
+@pytest.fixture
+def pure_python(monkeypatch):
+    monkeypatch.setattr(news_feeds, "ahocorasick", None)
+
+
+def _expected(names, text):
+    padded = f" {normalize_name(text)} "
+    return {key for key in map(normalize_name, names)
+            if len(key) >= news_feeds.MIN_PATTERN_LENGTH and f" {key} " in padded}
+
+
+def test_fallback_matches_whole_names_only(pure_python):
+    matcher = NameMatcher(NAMES)
+    assert matcher.find("Acme Holdings fined over pollution") == {"acme", "acme holdings"}
+    assert matcher.find("Betamax revival: no supplier here") == set()
+
+
+def test_fallback_agrees_with_a_brute_force_scan(pure_python):
+    matcher = NameMatcher(NAMES)
+    for headline in HEADLINES:
+        assert matcher.find(headline) == _expected(NAMES, headline), headline
+
+
+def test_no_names_match_nothing(pure_python):
+    assert NameMatcher([]).find("Acme Ltd") == set()
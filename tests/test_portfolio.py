@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import build_cube, entity_keys
+
+
+def _result_frame():
+    # Two different companies trading as "Acme", plus an unnumbered supplier seen twice
+    return pd.DataFrame({
+        "Supplier": ["Acme", "Acme", "ACME Ltd", "Beta", "Beta Limited"],
+        "Resolved Entity": ["Acme", "Acme", "Acme", "Beta", "Beta"],
+        "Company Number": ["01234567", "07654321", "1234567", None, None],
+        "Spend": [100.0, 200.0, 300.0, 50.0, 50.0],
+        "Scope 1 & 2 Emissions (kg CO2e)": [10.0, 45.0, 30.0, 5.0, 5.0],
+        "ESG Score": [0, 1, 0, 2, 2],
+        "RAG Rating": ["Green", "Amber", "Green", "Red", "Red"],
+        "Category": ["Construction"] * 5,
+    })
+
+
+def test_entities_are_keyed_on_company_number_before_name():
+    assert entity_keys(_result_frame()).tolist() == ["#01234567", "#07654321", "#01234567", "Beta", "Beta"]
+
+
+def test_suppliers_sharing_a_name_are_counted_and_ranked_apart():
+    cube = build_cube(_result_frame())
+    assert cube["totals"]["Suppliers"] == 3
+    assert cube["by_category"]["Suppliers"].tolist() == [3]
+    assert cube["by_rag"].set_index("RAG Rating")["Suppliers"].to_dict() == {"Green": 1, "Amber": 1, "Red": 1}
+    top = cube["top_emitters"]
+    assert top["Supplier"].tolist() == ["Acme", "Acme", "Beta"]
+    assert top["Company Number"].iloc[:2].tolist() == ["07654321", "01234567"]
+    assert pd.isna(top["Company Number"].iloc[2])
+    assert top["Emissions (kg CO2e)"].tolist() == [45.0, 40.0, 10.0]
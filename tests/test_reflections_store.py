@@ -0,0 +1,71 @@
+import csv
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reflections_store import parse_reflection_date, save_reflections_batch
+
+
+class RecordingClient:
+    # Records the rows of every upsert call, in the shape of the Supabase/PostgREST query builder
+    def __init__(self):
+        self.upserts = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.upserts.append((rows, on_conflict))
+        return self
+
+    def execute(self):
+        return None
+
+
+def _csv_rows(text):
+    return csv.DictReader(io.StringIO(text))
+
+
+def test_csv_import_skips_malformed_rows_and_reports_them():
+    client = RecordingClient()
+    written, rejected = save_reflections_batch(client, "user-1", _csv_rows(
+        "date,reflection\n"
+        "2024-01-05,First\n"
+        "05/01/2024,Same day again\n"
+        "not a date,Lost\n"
+        "2024-02-30,Impossible\n"
+        "2024-3-1,Short ISO\n"
+        "2024-03-02\n"
+    ))
+    assert written == 2
+    rows = [row for chunk, _ in client.upserts for row in chunk]
+    assert [(row["date"], row["reflection"]) for row in rows] == [
+        ("2024-01-05", "Same day again"), ("2024-03-01", "Short ISO"),
+    ]
+    assert [number for number, _ in rejected] == [3, 4, 6]
+    assert "unrecognised date 'not a date'" in rejected[0][1]
+    assert rejected[2][1] == "missing 'reflection'"
+
+
+def test_csv_without_a_reflection_column_rejects_every_row():
+    client = RecordingClient()
+    written, rejected = save_reflections_batch(client, "user-1", _csv_rows("date,text\n2024-01-05,Hello\n"))
+    assert written == 0
+    assert rejected == [(1, "missing 'reflection'")]
+    assert client.upserts == []
+
+
+def test_rows_are_upserted_in_chunks_on_the_user_date_key():
+    client = RecordingClient()
+    entries = [(f"2024-01-{day:02d}", f"Day {day}") for day in range(1, 8)]
+    written, rejected = save_reflections_batch(client, "user-1", entries, chunk_size=3)
+    assert (written, rejected) == (7, [])
+    assert [len(chunk) for chunk, _ in client.upserts] == [3, 3, 1]
+    assert {conflict for _, conflict in client.upserts} == {"user_id,date"}
+
+
+def test_dates_parse_from_iso_and_day_first_text():
+    assert parse_reflection_date("05/01/2024") == "2024-01-05"
+    assert parse_reflection_date(" 2024-1-5 ") == "2024-01-05"
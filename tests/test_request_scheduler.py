@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import request_scheduler
+from request_scheduler import (BATCH, CLOSED, HALF_OPEN, INTERACTIVE, OPEN, CircuitBreaker, DeadlineExceeded,
+                               NegativeCache, SourceQueue, SourceUnavailable, request_deadline)
+
+
+def test_burst_is_served_without_waiting():
+    queue = SourceQueue("test", rate=1.0, burst=3)
+    assert all(queue.acquire(BATCH) < 0.05 for _ in range(3))
+
+
+def test_interactive_caller_overtakes_queued_batch_callers():
+    queue = SourceQueue("test", rate=10.0, burst=1)
+    queue.acquire(BATCH)
+    order = []
+
+    def take(priority, label):
+        queue.acquire(priority)
+        order.append(label)
+
+    batch = [threading.Thread(target=take, args=(BATCH, f"batch{i}")) for i in range(2)]
+    for thread in batch:
+        thread.start()
+        time.sleep(0.02)
+    interactive = threading.Thread(target=take, args=(INTERACTIVE, "interactive"))
+    interactive.start()
+    for thread in batch + [interactive]:
+        thread.join(timeout=5)
+    assert order == ["interactive", "batch0", "batch1"]
+
+
+def test_deadline_gives_up_the_place_in_the_queue():
+    queue = SourceQueue("test", rate=0.1, burst=1)
+    queue.acquire(BATCH)
+    with request_deadline(0.05), pytest.raises(DeadlineExceeded):
+        queue.acquire(BATCH)
+    assert queue._waiting == []
+
+
+def _open_breaker():
+    breaker = CircuitBreaker("test", min_requests=2, error_rate=0.5, open_seconds=0.05)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_breaker_stays_closed_below_the_minimum_sample():
+    breaker = CircuitBreaker("test", min_requests=3, error_rate=0.5)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    assert breaker.allow() is False
+
+
+def test_open_breaker_fails_fast_until_the_cool_down_ends():
+    breaker = _open_breaker()
+    with pytest.raises(SourceUnavailable):
+        breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(SourceUnavailable):
+        breaker.allow()
+
+
+def test_probe_outcome_closes_or_reopens_the_circuit():
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+
+def test_unexpected_error_releases_the_probe(monkeypatch):
+    breaker = _open_breaker()
+    time.sleep(0.06)
+    monkeypatch.setitem(request_scheduler._breakers, "test", breaker)
+
+    def interrupted(url, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(request_scheduler.requests, "get", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        request_scheduler.scheduled_get("test", "http://example.invalid/probe")
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is True
+
+
+def test_negative_cache_is_bounded_and_drops_expired_entries():
+    cache = NegativeCache(ttl=60.0, max_entries=3)
+    for i in range(5):
+        cache.add(f"http://example.invalid/{i}")
+    assert len(cache) == 3
+    assert not cache.check("http://example.invalid/0")
+    assert cache.check("http://example.invalid/4")
+
+    cache = NegativeCache(ttl=0.05, max_entries=100)
+    cache.add("http://example.invalid/old")
+    time.sleep(0.06)
+    cache.add("http://example.invalid/new")
+    assert len(cache) == 1
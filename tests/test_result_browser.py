@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_browser import ResultBrowser
+
+
+def _result_frame():
+    return pd.DataFrame({
+        "Supplier": ["Acme", "Beta", "Gamma", "Delta"],
+        "Spend": [100.0, 400.0, 300.0, 200.0],
+        "ESG Score": pd.array([2, None, -1, 2], dtype="Int8"),
+        "RAG Rating": pd.Categorical(["Red", "Amber", "Green", "Red"]),
+    })
+
+
+def test_missing_score_in_a_nullable_integer_column_sorts_last_when_descending():
+    browser = ResultBrowser(_result_frame())
+    page_df, total = browser.page(sort_by="ESG Score", descending=True)
+    assert total == 4
+    assert page_df["Supplier"].tolist() == ["Acme", "Delta", "Gamma", "Beta"]
+    page_df, _ = browser.page(sort_by="ESG Score")
+    assert page_df["Supplier"].tolist() == ["Beta", "Gamma", "Acme", "Delta"]
+
+
+def test_filters_and_ranges_combine_with_paging():
+    browser = ResultBrowser(_result_frame())
+    page_df, total = browser.page(sort_by="Spend", descending=True, filters={"RAG Rating": ["Red", "Green"]},
+                                  ranges={"Spend": (150.0, 400.0)}, page=0, page_size=1)
+    assert total == 2
+    assert page_df["Supplier"].tolist() == ["Gamma"]
+    page_df, _ = browser.page(sort_by="Spend", descending=True, filters={"RAG Rating": ["Red", "Green"]},
+                              ranges={"Spend": (150.0, 400.0)}, page=1, page_size=1)
+    assert page_df["Supplier"].tolist() == ["Delta"]
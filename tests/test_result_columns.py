@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_columns import ResultColumns
+
+SCHEMA = {
+    "Supplier": "str",
+    "Spend": "float64",
+    "ESG Score": "int8",
+    "Sentiment Score": "float32",
+    "RAG Rating": "category",
+    "B Corp": "bool",
+}
+
+
+def _row(supplier, **values):
+    return {"Supplier": supplier, "Spend": 100.0, "ESG Score": 1, "Sentiment Score": 0.5, "RAG Rating": "Amber",
+            "B Corp": True, **values}
+
+
+def test_complete_columns_round_trip_with_their_schema_dtypes():
+    results = ResultColumns(SCHEMA)
+    results.extend([_row("Acme"), _row("Beta", **{"ESG Score": -2, "RAG Rating": "Green", "B Corp": False})])
+    frame = results.to_frame()
+    assert pd.api.types.is_string_dtype(frame["Supplier"])
+    assert frame.drop(columns=["Supplier"]).dtypes.to_dict() == {
+        "Spend": np.dtype("float64"),
+        "ESG Score": np.dtype("int8"),
+        "Sentiment Score": np.dtype("float32"),
+        "RAG Rating": pd.CategoricalDtype(["Amber", "Green"]),
+        "B Corp": pd.BooleanDtype(),
+    }
+    assert frame["ESG Score"].tolist() == [1, -2]
+    assert frame["B Corp"].tolist() == [True, False]
+    assert results.invalid == []
+
+
+def test_missing_values_stay_missing():
+    results = ResultColumns(SCHEMA)
+    results.extend([
+        _row("Acme"),
+        _row("Beta", **{"ESG Score": None, "Spend": np.nan, "RAG Rating": None, "B Corp": pd.NA}),
+        _row("Gamma", **{"ESG Score": 3.0}),
+    ])
+    frame = results.to_frame()
+    assert frame["ESG Score"].dtype == pd.Int8Dtype()
+    assert frame["ESG Score"].isna().tolist() == [False, True, False]
+    assert frame["ESG Score"].iloc[2] == 3
+    assert np.isnan(frame["Spend"].iloc[1])
+    assert pd.isna(frame["RAG Rating"].iloc[1])
+    assert pd.isna(frame["B Corp"].iloc[1])
+    assert results.invalid == []
+
+
+def test_values_that_do_not_fit_are_reported_and_stored_as_missing():
+    results = ResultColumns(SCHEMA)
+    results.extend([_row("Acme", **{"ESG Score": 300}), _row("Beta", **{"ESG Score": "high"}),
+                    _row("Gamma", **{"ESG Score": 2.5})])
+    frame = results.to_frame()
+    assert frame["ESG Score"].isna().all()
+    assert [(issue["row"], issue["value"]) for issue in results.invalid] == [(0, 300), (1, "high"), (2, 2.5)]
+
+
+def test_columns_outside_the_schema_are_added_as_text():
+    results = ResultColumns(SCHEMA)
+    results.append(_row("Acme"))
+    results.append(_row("Beta", Note="late column"))
+    frame = results.to_frame()
+    assert pd.isna(frame["Note"].iloc[0]) and frame["Note"].iloc[1] == "late column"
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_view import VIEW_COLUMNS, RiskView
+
+
+def _view(*entries, age_days=0):
+    now = time.time() - age_days * 86400
+    rows = [{**dict.fromkeys(VIEW_COLUMNS), "company_number": number, "name_key": name_key, "Supplier": name_key,
+             "evidence_time": now}
+            for number, name_key in entries]
+    return RiskView(pd.DataFrame(rows, columns=VIEW_COLUMNS))
+
+
+def test_numbered_row_is_served_by_its_number_only():
+    view = _view(("01234567", "alpha"), ("", "beta"))
+    assert view.lookup("1234567", "Something Else")["name_key"] == "alpha"
+    # Another company's number, or an entry that has none, is never matched by name
+    assert view.lookup("99999999", "Alpha Ltd") is None
+    assert view.lookup("99999999", "Beta") is None
+
+
+def test_unnumbered_row_falls_back_to_the_name():
+    view = _view(("01234567", "alpha"), ("", "beta"))
+    assert view.lookup(None, "Beta Limited")["name_key"] == "beta"
+    assert view.lookup("", "Alpha")["company_number"] == "01234567"
+    assert view.lookup(None, "Gamma") is None
+
+
+def test_expired_entries_are_ignored():
+    view = _view(("01234567", "alpha"), age_days=31)
+    assert view.lookup("01234567", "Alpha") is None
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run_journal
+from run_journal import RunJournal, frame_run_id
+
+
+def test_completed_rows_survive_a_restart(tmp_path):
+    journal = RunJournal("run", directory=tmp_path)
+    journal.append("0|Acme", {"Supplier": "Acme", "ESG Score": 1})
+    journal.append("1|Beta", {"Supplier": "Beta", "ESG Score": -1})
+    journal.close()
+    assert RunJournal("run", directory=tmp_path).completed() == {
+        "0|Acme": {"Supplier": "Acme", "ESG Score": 1},
+        "1|Beta": {"Supplier": "Beta", "ESG Score": -1},
+    }
+
+
+def test_torn_last_line_is_ignored_and_appending_resumes_on_a_fresh_line(tmp_path):
+    journal = RunJournal("run", directory=tmp_path)
+    journal.append("0|Acme", {"Supplier": "Acme"})
+    journal.close()
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"key": "1|Beta", "row": {"Supp')
+
+    resumed = RunJournal("run", directory=tmp_path)
+    assert list(resumed.completed()) == ["0|Acme"]
+    resumed.append("1|Beta", {"Supplier": "Beta"})
+    resumed.close()
+    assert list(RunJournal("run", directory=tmp_path).completed()) == ["0|Acme", "1|Beta"]
+
+
+def test_compact_replaces_the_line_log_with_the_final_result(tmp_path):
+    journal = RunJournal("run", directory=tmp_path)
+    journal.append("0|Acme", {"Supplier": "Acme"})
+    result_df = pd.DataFrame({"Supplier": ["Acme"], "ESG Score": [1]})
+    journal.compact(result_df)
+    assert journal.is_finished()
+    assert not os.path.exists(journal.journal_path)
+    pd.testing.assert_frame_equal(journal.load_final(), result_df)
+
+
+def test_run_id_follows_the_input_and_the_options():
+    df = pd.DataFrame({"Supplier": ["Acme"], "Spend": [100.0]})
+    assert frame_run_id(df) == frame_run_id(df.copy())
+    assert frame_run_id(df, {"news_source": "live"}) != frame_run_id(df, {"news_source": "feeds"})
+    assert frame_run_id(df) != frame_run_id(df.assign(Spend=200.0))
+
+
+def test_run_id_does_not_change_with_the_date(monkeypatch):
+    df = pd.DataFrame({"Supplier": ["Acme"], "Spend": [100.0]})
+    today = frame_run_id(df)
+    monkeypatch.setattr(run_journal.time, "strftime", lambda *args: "20991231")
+    assert frame_run_id(df) == today
+
+
+def test_metadata_records_start_and_finish_and_discard_starts_over(tmp_path):
+    journal = RunJournal("run", directory=tmp_path)
+    journal.append("0|Acme", {"Supplier": "Acme"})
+    assert set(journal.metadata()) == {"run_id", "started"}
+    journal.compact(pd.DataFrame({"Supplier": ["Acme"]}))
+    assert set(journal.metadata()) == {"run_id", "started", "finished"}
+
+    journal.discard_final()
+    assert not journal.is_finished()
+    assert journal.completed() == {}
+    assert journal.metadata() == {}
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from request_scheduler import DeadlineExceeded, request_deadline, time_left
+from single_flight import SingleFlight
+
+CALLERS = 8
+
+
+def _run_concurrently(flight, fn, deadlines=None):
+    # Every caller asks for the same key at once; returns {caller: result or exception}
+    outcomes = {}
+    start = threading.Barrier(CALLERS)
+
+    def call(caller):
+        start.wait()
+        # Later callers arrive while the first is still running
+        time.sleep(0.01 * bool(caller))
+        with request_deadline((deadlines or {}).get(caller)):
+            try:
+                outcomes[caller] = flight.do(("news", "acme", "off"), fn)
+            except Exception as e:
+                outcomes[caller] = e
+
+    threads = [threading.Thread(target=call, args=(caller,)) for caller in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_call_and_its_result():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return "page"
+
+    assert _run_concurrently(flight, fetch) == {caller: "page" for caller in range(CALLERS)}
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_concurrent_callers_share_one_call_and_its_exception():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ConnectionError("source down")
+
+    outcomes = _run_concurrently(flight, fetch)
+    assert len(calls) == 1
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes.values())
+    assert len({id(outcome) for outcome in outcomes.values()}) == 1
+
+
+def test_waiter_takes_over_when_the_leader_runs_out_of_its_deadline():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        remaining = time_left()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("leader's deadline")
+        return "page"
+
+    # Caller 0 leads with a deadline shorter than the fetch; the rest have none
+    outcomes = _run_concurrently(flight, fetch, deadlines={0: 0.05})
+    assert isinstance(outcomes.pop(0), DeadlineExceeded)
+    assert outcomes == {caller: "page" for caller in range(1, CALLERS)}
+    # The leader's call, then exactly one takeover shared by the other waiters
+    assert len(calls) == 2
+
+
+def test_waiter_gives_up_at_its_own_deadline():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=(("news", "acme", "off"), release.wait))
+    leader.start()
+    time.sleep(0.02)
+    try:
+        with request_deadline(0.05), pytest.raises(DeadlineExceeded):
+            flight.do(("news", "acme", "off"), release.wait)
+    finally:
+        release.set()
+        leader.join(timeout=5)
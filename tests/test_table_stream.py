@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_stream import MarkdownTableParser
+
+TABLE = (
+    "Here is the assessment:\n"
+    "| Supplier | RAG | Notes |\n"
+    "|---|:---:|---|\n"
+    "| Acme Ltd | Green | Certified B Corp |\n"
+    "| Beta plc | Red |\n"
+    "| Supplier | RAG | Notes |\n"
+    "| Gamma | Amber | a | extra |\n"
+    "Let me know if you need more."
+)
+ROWS = [
+    ["Acme Ltd", "Green", "Certified B Corp"],
+    ["Beta plc", "Red", ""],
+    ["Gamma", "Amber", "a"],
+]
+
+
+def _parse_in_pieces(text, size):
+    parser = MarkdownTableParser()
+    emitted = []
+    for start in range(0, len(text), size):
+        emitted.extend(parser.feed(text[start:start + size]))
+    emitted.extend(parser.close())
+    return parser, emitted
+
+
+def test_rows_are_the_same_whatever_the_chunk_boundaries():
+    for size in (1, 2, 3, 7, 16, len(TABLE)):
+        parser, emitted = _parse_in_pieces(TABLE, size)
+        assert parser.headers == ["Supplier", "RAG", "Notes"]
+        assert emitted == ROWS
+        assert parser.rows == ROWS
+
+
+def test_a_row_is_emitted_only_once_its_line_is_complete():
+    parser = MarkdownTableParser()
+    assert parser.feed("| Supplier | RAG |\n|---|---|\n| Acme | Gre") == []
+    assert parser.feed("en |\n") == [["Acme", "Green"]]
+
+
+def test_close_emits_a_last_row_without_a_newline():
+    parser = MarkdownTableParser()
+    parser.feed("| Supplier | RAG |\n|---|---|\n| Acme | Green |")
+    assert parser.close() == [["Acme", "Green"]]
+    assert parser.close() == []
@@ -0,0 +1,36 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from esg_pipeline import score_supplier
+from what_if import FLAG_COLUMNS, EvidenceMatrix
+
+
+def _scored_frame():
+    rows = []
+    for flags in itertools.product([False, True], repeat=len(FLAG_COLUMNS)):
+        for sentiment in (-0.6, 0.0, 0.4):
+            info = dict(zip(FLAG_COLUMNS, flags))
+            score, rating, _, justification = score_supplier(info, sentiment)
+            row = {column: info[key] for key, column in FLAG_COLUMNS.items()}
+            row.update({"ESG Score": score, "RAG Rating": rating, "Justification": ", ".join(justification),
+                        "Sentiment Score": sentiment})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_default_parameters_reproduce_every_stored_rating():
+    result_df = _scored_frame()
+    assert EvidenceMatrix(result_df).mismatches(result_df).empty
+
+
+def test_missing_sentiment_falls_back_to_the_justification():
+    result_df = _scored_frame().assign(**{"Sentiment Score": np.nan})
+    assert EvidenceMatrix(result_df).mismatches(result_df).empty
+    result_df = result_df.drop(columns=["Sentiment Score"])
+    assert EvidenceMatrix(result_df).mismatches(result_df).empty
@@ -1,16 +1,22 @@
 import streamlit as st
 from supabase import create_client, Client
 from datetime import datetime
+import csv
+import io
 import os
 from dotenv import load_dotenv
+import reflections_store
 
 # Load environment variables from .env
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# Connect to Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Connect to Supabase once per browser session. Not st.cache_resource: sign-in stores the
+# user's session on the client, which must not be shared between users.
+if "supabase" not in st.session_state:
+    st.session_state.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Client = st.session_state.supabase
 
 # Session management (simplified for Streamlit)
 if "user" not in st.session_state:
@@ -32,16 +38,46 @@ def login(email, password):
         st.error(f"Login failed: {e}")
         return None
 
+@st.cache_resource
+def reflection_versions():
+    # Process-wide per-user counter; bumping it on save makes that user's cached reads stale
+    return {}
+
+def invalidate_reflections(user_id):
+    versions = reflection_versions()
+    versions[user_id] = versions.get(user_id, 0) + 1
+
+@st.cache_data(ttl=600, max_entries=1000)
+def cached_reflection_dates(_client, user_id, version, before=None):
+    return reflections_store.get_reflection_dates(_client, user_id, before=before)
+
+@st.cache_data(ttl=600, max_entries=1000)
+def cached_reflection(_client, user_id, version, date):
+    return reflections_store.get_reflection(_client, user_id, date)
+
 def save_reflection(user_id, date, entry):
-    existing = supabase.table("reflections").select("*").eq("user_id", user_id).eq("date", date).execute()
-    if existing.data:
-        supabase.table("reflections").update({"reflection": entry}).eq("user_id", user_id).eq("date", date).execute()
-    else:
-        supabase.table("reflections").insert({"user_id": user_id, "date": date, "reflection": entry}).execute()
+    reflections_store.save_reflection(supabase, user_id, date, entry)
+    invalidate_reflections(user_id)
 
-def get_user_reflections(user_id):
-    result = supabase.table("reflections").select("*").eq("user_id", user_id).order("date", desc=False).execute()
-    return result.data
+def import_reflections(user_id, uploaded_file):
+    # CSV with "date" and "reflection" columns, written as chunked bulk upserts
+    reader = csv.DictReader(io.StringIO(uploaded_file.getvalue().decode("utf-8")))
+    count, rejected = reflections_store.save_reflections_batch(supabase, user_id, reader)
+    invalidate_reflections(user_id)
+    return count, rejected
+
+def get_reflection_dates(user_id, pages=1):
+    version = reflection_versions().get(user_id, 0)
+    dates, cursor = [], None
+    for _ in range(pages):
+        page, cursor = cached_reflection_dates(supabase, user_id, version, cursor)
+        dates.extend(page)
+        if cursor is None:
+            break
+    return dates, cursor is not None
+
+def get_reflection(user_id, date):
+    return cached_reflection(supabase, user_id, reflection_versions().get(user_id, 0), date)
 
 # Streamlit App
 st.set_page_config(page_title="The Ready Soul", layout="centered")
@@ -74,14 +110,28 @@ else:
         save_reflection(st.session_state.user.id, today, entry)
         st.success("Reflection saved.")
 
+    with st.expander("📥 Import Reflections"):
+        import_file = st.file_uploader("CSV with 'date' and 'reflection' columns", type=["csv"])
+        if import_file and st.button("Import"):
+            try:
+                count, rejected = import_reflections(st.session_state.user.id, import_file)
+                st.success(f"Imported {count} reflections.")
+                for number, error in rejected:
+                    st.warning(f"Reflection {number} skipped: {error}")
+            except Exception as e:
+                st.error(f"Import failed: {e}")
+
     st.markdown("---")
     st.subheader("📅 View Past Reflections")
-    reflections = get_user_reflections(st.session_state.user.id)
-    if reflections:
-        date_options = [r["date"] for r in reflections]
-        selected_date = st.selectbox("Select a date", date_options[::-1])
-        selected = next(r for r in reflections if r["date"] == selected_date)
-        updated_entry = st.text_area("Edit Reflection", selected["reflection"])
+    if "reflection_pages" not in st.session_state:
+        st.session_state.reflection_pages = 1
+    date_options, has_more = get_reflection_dates(st.session_state.user.id, st.session_state.reflection_pages)
+    if date_options:
+        selected_date = st.selectbox("Select a date", date_options)
+        if has_more and st.button("Load older dates"):
+            st.session_state.reflection_pages += 1
+            st.experimental_rerun()
+        updated_entry = st.text_area("Edit Reflection", get_reflection(st.session_state.user.id, selected_date) or "")
         if st.button("Update Reflection"):
             save_reflection(st.session_state.user.id, selected_date, updated_entry)
             st.success("Reflection updated.")
@@ -90,4 +140,5 @@ else:
 
     if st.button("Logout"):
         st.session_state.user = None
+        st.session_state.reflection_pages = 1
         st.experimental_rerun()
@@ -0,0 +1,79 @@
+# What-if re-scoring of a finished assessment
+#
+# The evidence behind every rating (the five registry/page flags and the news polarity) is kept
+# as a matrix built once per result. Re-scoring with other weights, another negative-news cut-off
+# or other RAG thresholds is then one matrix-vector product, with no network calls:
+#
+#   matrix = EvidenceMatrix(result_df)
+#   rescored = matrix.rescore(result_df, weights={**SCORING_WEIGHTS, "negative_news": 3}, rag_thresholds=(0, 2))
+#
+# With the default parameters the scores match score_supplier() exactly; mismatches(result_df)
+# lists any rows where they do not.
+
+import numpy as np
+import pandas as pd
+
+from esg_pipeline import EVIDENCE_LABELS, NEGATIVE_SENTIMENT, RAG_THRESHOLDS, SCORING_WEIGHTS
+from portfolio import RAG_ORDER
+
+# weight key -> result column holding that evidence flag
+FLAG_COLUMNS = {
+    "b_corp": "B Corp",
+    "modern_slavery_statement": "Modern Slavery Statement",
+    "llw": "LLW Accredited",
+    "fair_payment": "Fair Payment Code",
+    "sbti": "SBTi Committed",
+}
+
+
+class EvidenceMatrix:
+    def __init__(self, result_df):
+        self.length = len(result_df)
+        self.flags = np.column_stack([
+            result_df[column].fillna(False).to_numpy(dtype=np.int16) if column in result_df.columns
+            else np.zeros(self.length, dtype=np.int16)
+            for column in FLAG_COLUMNS.values()
+        ]) if self.length else np.zeros((0, len(FLAG_COLUMNS)), dtype=np.int16)
+        # Results resumed from journals written before the score was kept have no score; their news
+        # finding is read from the justification instead, whatever the what-if cut-off
+        sentiment = result_df["Sentiment Score"] if "Sentiment Score" in result_df.columns else pd.Series(np.nan, index=result_df.index)
+        self.sentiment = pd.to_numeric(sentiment, errors="coerce").to_numpy(dtype=np.float32)
+        justification = result_df["Justification"] if "Justification" in result_df.columns else pd.Series("", index=result_df.index)
+        self.negative_label = justification.astype(str).str.contains(EVIDENCE_LABELS["negative_news"], regex=False).to_numpy()
+
+    def scores(self, weights=SCORING_WEIGHTS, negative_sentiment=NEGATIVE_SENTIMENT):
+        flag_weights = np.array([weights[key] for key in FLAG_COLUMNS], dtype=np.int16)
+        negative_news = np.where(np.isnan(self.sentiment), self.negative_label,
+                                 self.sentiment < negative_sentiment).astype(np.int16)
+        return self.flags @ flag_weights + weights["negative_news"] * negative_news
+
+    def ratings(self, scores, rag_thresholds=RAG_THRESHOLDS):
+        green_max, amber_max = rag_thresholds
+        codes = np.where(scores <= green_max, 0, np.where(scores <= amber_max, 1, 2))
+        return pd.Categorical.from_codes(codes, categories=RAG_ORDER)
+
+    def rescore(self, result_df, weights=SCORING_WEIGHTS, negative_sentiment=NEGATIVE_SENTIMENT,
+                rag_thresholds=RAG_THRESHOLDS):
+        # A copy of result_df with ESG Score and RAG Rating recomputed; everything else is shared
+        scores = self.scores(weights, negative_sentiment)
+        return result_df.assign(**{
+            "ESG Score": scores.astype(np.int8),
+            "RAG Rating": self.ratings(scores, rag_thresholds),
+        })
+
+    def mismatches(self, result_df):
+        # Rows whose default re-score differs from the stored ESG Score or RAG Rating; empty when the
+        # matrix reproduces the assessment
+        scores = self.scores()
+        stored_scores = pd.to_numeric(result_df["ESG Score"], errors="coerce").to_numpy()
+        stored_ratings = result_df["RAG Rating"].astype(object).to_numpy()
+        differs = (scores != stored_scores) | (np.asarray(self.ratings(scores)).astype(object) != stored_ratings)
+        return result_df[differs]
+
+
+def rating_changes(result_df, rescored):
+    # Baseline RAG (rows) against what-if RAG (columns), as supplier counts
+    return pd.crosstab(
+        pd.Categorical(result_df["RAG Rating"].astype(object), categories=RAG_ORDER),
+        rescored["RAG Rating"], rownames=["Current"], colnames=["What-if"], dropna=False,
+    )